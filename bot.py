@@ -22,6 +22,9 @@ BOT_TOKEN = "8377810720:AAH_HA42Cezxe0apHh24DuyDxAiBvPstGHI"
 # Файл для хранения данных пользователей
 USER_DATA_FILE = "user_data.json"
 
+# Файл со списком заданий (если его нет - используется список TASKS ниже)
+TASKS_FILE = "tasks.json"
+
 # ============================================================================
 # ТЕСТОВЫЕ ДАННЫЕ - СПИСОК ЗАДАНИЙ
 # ============================================================================
@@ -64,6 +67,46 @@ TASKS = [
     }
 ]
 
+# Задания из TASKS_FILE и время изменения файла, из которого они прочитаны
+_tasks_cache = {"mtime": None, "tasks": TASKS, "by_id": {t["id"]: t for t in TASKS}}
+
+
+def get_tasks():
+    """
+    Возвращает актуальный список заданий
+
+    Если есть TASKS_FILE, задания читаются из него и перечитываются
+    только когда файл изменился (проверка - один os.stat),
+    поэтому новые задания появляются без перезапуска бота.
+    """
+    try:
+        mtime = os.stat(TASKS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return _tasks_cache["tasks"]
+
+    if mtime != _tasks_cache["mtime"]:
+        try:
+            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            tasks = data.get("tasks", []) if isinstance(data, dict) else data
+            # Подменяем список и индекс целиком, а не изменяем старые
+            _tasks_cache.update(
+                mtime=mtime,
+                tasks=tasks,
+                by_id={t["id"]: t for t in tasks}
+            )
+            print(f"📋 Загружено заданий из {TASKS_FILE}: {len(tasks)}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Не удалось прочитать {TASKS_FILE}: {e}")
+
+    return _tasks_cache["tasks"]
+
+
+def get_task(task_id):
+    """Возвращает задание по ID или None"""
+    get_tasks()
+    return _tasks_cache["by_id"].get(task_id)
+
 # ============================================================================
 # РАБОТА С ДАННЫМИ ПОЛЬЗОВАТЕЛЕЙ
 # ============================================================================
@@ -203,13 +246,14 @@ async def cmd_help(message: Message):
 @dp.message(Command("tasks"))
 async def cmd_tasks(message: Message):
     """Обработчик команды /tasks - показывает список заданий"""
-    if not TASKS:
+    tasks = get_tasks()
+    if not tasks:
         await message.answer("❌ Пока нет доступных заданий.")
         return
     
     response = "📋 <b>Доступные задания:</b>\n\n"
     
-    for task in TASKS:
+    for task in tasks:
         response += f"<b>ID: {task['id']}</b>\n"
         response += f"📌 {task['title']}\n"
         response += f"📝 {task['description']}\n"
@@ -240,7 +284,7 @@ async def cmd_respond(message: Message):
         return
     
     # Ищем задание
-    task = next((t for t in TASKS if t["id"] == task_id), None)
+    task = get_task(task_id)
     if not task:
         await message.answer(f"❌ Задание с ID {task_id} не найдено!")
         return
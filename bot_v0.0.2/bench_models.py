@@ -0,0 +1,111 @@
+"""
+Benchmark script for data models
+Замер стоимости создания моделей из строк БД
+
+Использование:
+    python bench_models.py [количество строк]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Dict, Any, Optional
+
+from database.models import User, TaskResponse
+
+# Количество строк по умолчанию (примерно длинная история откликов)
+DEFAULT_ROWS = 100_000
+
+# Количество повторов, берется лучший результат
+REPEATS = 5
+
+
+def make_response_rows(count: int) -> List[Dict[str, Any]]:
+    """
+    Строки responses в том виде, в каком их возвращает PostgREST
+
+    Каждая вторая строка - отклик по шаблону (template_id без текста),
+    остальные - произвольный текст
+    """
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i,
+            "user_id": 123456789,
+            "task_id": i % 50 + 1,
+            "task_title": f"Задание {i}",
+            "response_text": None if i % 2 else "Здравствуйте! Готов выполнить задание качественно и в срок.",
+            "template_id": 1 if i % 2 else None,
+            "earned": 50.0,
+            "created_at": (start + timedelta(seconds=i)).isoformat()
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def make_user_rows(count: int) -> List[Dict[str, Any]]:
+    """Строки users в том виде, в каком их возвращает PostgREST"""
+    return [
+        {
+            "id": i,
+            "user_id": 100_000 + i,
+            "username": f"user{i}",
+            "balance": 150.0,
+            "completed_tasks": 3,
+            "role": "free",
+            "created_at": "2026-01-01T00:00:00.000000+00:00"
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def bench(
+    name: str,
+    build: Callable[[Dict[str, Any]], Any],
+    rows: List[Dict[str, Any]],
+    touch: Optional[str] = None
+):
+    """
+    Замерить построение моделей для всех строк и вывести стоимость одной строки
+
+    touch - атрибут, к которому обращаться после построения (ленивые
+    created_at и response_text)
+    """
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        if touch:
+            for row in rows:
+                getattr(build(row), touch)
+        else:
+            for row in rows:
+                build(row)
+        best = min(best, time.perf_counter() - started)
+
+    per_row_us = best / len(rows) * 1_000_000
+    print(f"  {name:<40} {per_row_us:8.3f} мкс/строка  ({best * 1000:8.1f} мс всего)")
+    return per_row_us
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+
+    print(f"\n📊 Построение моделей из {count} строк (лучший из {REPEATS} прогонов)\n")
+
+    response_rows = make_response_rows(count)
+    print("TaskResponse:")
+    slow = bench("from_dict (валидация + fromisoformat)", TaskResponse.from_dict, response_rows)
+    fast = bench("from_row", TaskResponse.from_row, response_rows)
+    bench("from_row + обращение к created_at", TaskResponse.from_row, response_rows, touch="created_at")
+    bench("from_row + обращение к response_text", TaskResponse.from_row, response_rows, touch="response_text")
+    print(f"  ⚡ from_row быстрее в {slow / fast:.1f} раза\n")
+
+    user_rows = make_user_rows(count)
+    print("User:")
+    slow = bench("from_dict (валидация + fromisoformat)", User.from_dict, user_rows)
+    fast = bench("from_row", User.from_row, user_rows)
+    print(f"  ⚡ from_row быстрее в {slow / fast:.1f} раза\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ AI-Фриланс Ассистент - Telegram Bot
 """
 
 import asyncio
+import json
 import logging
 from aiogram import Bot, Dispatcher, Router
 from aiogram.enums import ParseMode
@@ -15,19 +16,31 @@ import config
 
 # Импорт database layer
 from database.supabase_client import SupabaseClient
+from database.sqlite_client import SQLiteClient
 
 # Импорт services
 from services.user_service import UserService
 from services.task_service import TaskService
-from services.ai_service import AIService
+from services.ai_service import AIService, TEMPLATES
+from services.ai_backend import create_backend
+from services.request_loader import RequestLoader, bind_request_loader, reset_request_loader
+from services.task_sources import JsonTaskSource, StorageTaskSource
+from services.catalog_watcher import CatalogWatcher
+from services.subscription_service import SubscriptionService
+from services.delivery_engine import DeliveryEngine
+from services.auto_earn import AutoEarnEngine
+
+# Ingestion
+from ingestion import IngestionPipeline, FlRuSource, KworkSource
 
 # Импорт handlers
 from handlers import start_handler, profile_handler, tasks_handler, balance_handler, callback_handler
-from handlers import payments_handler, info_handler
+from handlers import payments_handler, info_handler, subscriptions_handler, admin_handler
 
 # Импорт payments
 from payments.crypto import CryptoPaymentService
 from payments.freekassa import FreeKassaService
+from payments.invoice_poller import InvoicePoller
 
 # Импорт utils
 from utils.error_handler import setup_error_handler
@@ -60,18 +73,109 @@ bot = Bot(
 # Инициализация dispatcher
 dp = Dispatcher()
 
-# Инициализация database client
-db_client = SupabaseClient(config.SUPABASE_URL, config.SUPABASE_KEY)
+# Инициализация database client (хранилище выбирается в config.STORAGE_BACKEND)
+if config.STORAGE_BACKEND == "sqlite":
+    db_client = SQLiteClient(config.SQLITE_PATH, timeout=config.DB_TIMEOUT)
+else:
+    db_client = SupabaseClient(
+        config.SUPABASE_URL,
+        config.SUPABASE_KEY,
+        pool_size=config.DB_POOL_SIZE,
+        max_concurrency=config.DB_MAX_CONCURRENCY,
+        timeout=config.DB_TIMEOUT
+    )
 
 # Инициализация services
-user_service = UserService(db_client)
-ai_service = AIService()
-task_service = TaskService(db_client, ai_service)
+user_service = UserService(
+    db_client,
+    cache_size=config.USER_CACHE_SIZE,
+    cache_ttl=config.USER_CACHE_TTL
+)
+ai_service = AIService(
+    create_backend(config.AI_BACKEND, TEMPLATES, max_batch=config.AI_BATCH_SIZE),
+    max_concurrency=config.AI_MAX_CONCURRENCY,
+    timeout=config.AI_TIMEOUT,
+    cache_size=config.AI_CACHE_SIZE,
+    cache_ttl=config.AI_CACHE_TTL
+)
+task_service = TaskService(
+    db_client,
+    ai_service,
+    user_cache=user_service.cache,
+    max_ingested_tasks=config.INGEST_MAX_TASKS,
+    responded_cache_size=config.USER_CACHE_SIZE
+)
+
+# Доставка уведомлений и рассылок с учетом лимитов Telegram
+delivery_engine = DeliveryEngine(
+    bot,
+    db_client,
+    rate=config.DELIVERY_RATE,
+    chat_rate=config.DELIVERY_CHAT_RATE,
+    workers=config.DELIVERY_WORKERS
+)
+# Автоматические отклики за пользователей с включенным автозаработком
+auto_earn_engine = AutoEarnEngine(
+    db_client,
+    task_service,
+    interval=config.AUTO_EARN_INTERVAL,
+    daily_limit=config.AUTO_EARN_DAILY_LIMIT,
+    workers=config.AUTO_EARN_WORKERS,
+    batch_size=config.AUTO_EARN_BATCH_SIZE
+)
+subscription_service = SubscriptionService(
+    db_client,
+    task_service,
+    delivery_engine,
+    max_per_user=config.SUBSCRIPTIONS_PER_USER,
+    queue_size=config.NOTIFY_QUEUE_SIZE,
+    notify_limit=config.NOTIFY_LIMIT,
+    notify_interval=config.NOTIFY_INTERVAL
+)
+
+# Источник каталога заданий (builtin - встроенный список TASKS)
+catalog_watcher = None
+if config.TASKS_SOURCE == "json":
+    catalog_watcher = CatalogWatcher(task_service, JsonTaskSource(config.TASKS_FILE), interval=config.TASKS_RELOAD_INTERVAL)
+elif config.TASKS_SOURCE == "storage":
+    catalog_watcher = CatalogWatcher(task_service, StorageTaskSource(db_client), interval=config.TASKS_RELOAD_INTERVAL)
+
+# Конвейер заданий с бирж
+exchange_sources = []
+if config.INGEST_FLRU_URL:
+    exchange_sources.append(FlRuSource(config.INGEST_FLRU_URL, poll_interval=config.INGEST_POLL_INTERVAL))
+if config.INGEST_KWORK_URL:
+    exchange_sources.append(KworkSource(config.INGEST_KWORK_URL, poll_interval=config.INGEST_POLL_INTERVAL))
+
+ingestion_pipeline = None
+if exchange_sources:
+    ingestion_pipeline = IngestionPipeline(
+        task_service,
+        db_client,
+        exchange_sources,
+        queue_size=config.INGEST_QUEUE_SIZE,
+        batch_size=config.INGEST_BATCH_SIZE,
+        flush_interval=config.INGEST_FLUSH_INTERVAL
+    )
 
 # Инициализация payment service
 crypto_service = None
+invoice_poller = None
 if config.CRYPTOBOT_TOKEN:
-    crypto_service = CryptoPaymentService(config.CRYPTOBOT_TOKEN)
+    crypto_service = CryptoPaymentService(
+        config.CRYPTOBOT_TOKEN,
+        pool_size=config.CRYPTOBOT_POOL_SIZE,
+        timeout=config.CRYPTOBOT_TIMEOUT,
+        retries=config.CRYPTOBOT_RETRIES
+    )
+    invoice_poller = InvoicePoller(
+        db_client,
+        crypto_service,
+        user_service,
+        min_interval=config.INVOICE_POLL_MIN_INTERVAL,
+        max_interval=config.INVOICE_POLL_MAX_INTERVAL,
+        batch_size=config.INVOICE_POLL_BATCH_SIZE
+    )
     logger.info("CryptoBot payment service инициализирован")
 else:
     logger.warning("CryptoBot payment service не инициализирован (отсутствует токен)")
@@ -98,7 +202,16 @@ async def inject_services_message(handler, event, data):
     data['user_service'] = user_service
     data['task_service'] = task_service
     data['ai_service'] = ai_service
-    return await handler(event, data)
+    data['subscription_service'] = subscription_service
+    data['delivery_engine'] = delivery_engine
+    # Загрузчик данных живет ровно один update
+    loader = RequestLoader(db_client)
+    data['loader'] = loader
+    token = bind_request_loader(loader)
+    try:
+        return await handler(event, data)
+    finally:
+        reset_request_loader(token)
 
 
 @dp.callback_query.middleware()
@@ -108,8 +221,18 @@ async def inject_services_callback(handler, event, data):
     data['task_service'] = task_service
     data['ai_service'] = ai_service
     data['crypto_service'] = crypto_service
+    data['invoice_poller'] = invoice_poller
     data['freekassa_service'] = freekassa_service
-    return await handler(event, data)
+    data['subscription_service'] = subscription_service
+    data['auto_earn_engine'] = auto_earn_engine
+    # Загрузчик данных живет ровно один update
+    loader = RequestLoader(db_client)
+    data['loader'] = loader
+    token = bind_request_loader(loader)
+    try:
+        return await handler(event, data)
+    finally:
+        reset_request_loader(token)
 
 # ============================================================================
 # РЕГИСТРАЦИЯ HANDLERS
@@ -123,6 +246,8 @@ balance_handler.register_handlers(dp)
 callback_handler.register_handlers(dp)
 payments_handler.register_handlers(dp)
 info_handler.register_handlers(dp)
+subscriptions_handler.register_handlers(dp)
+admin_handler.register_handlers(dp)
 
 # Настройка глобального обработчика ошибок
 setup_error_handler(dp)
@@ -138,6 +263,9 @@ async def set_bot_commands():
     commands = [
         BotCommand(command="start", description="🏠 Главное меню"),
         BotCommand(command="tasks", description="📋 Список заданий"),
+        BotCommand(command="search", description="🔎 Поиск заданий"),
+        BotCommand(command="subscribe", description="🔔 Подписка на новые задания"),
+        BotCommand(command="unsubscribe", description="🔕 Мои подписки"),
         BotCommand(command="profile", description="🧾 Мой профиль"),
         BotCommand(command="balance", description="💰 Проверить баланс"),
         BotCommand(command="my_responses", description="✍️ Мои отклики"),
@@ -156,17 +284,42 @@ async def on_startup():
     logger.info("🤖 AI-Фриланс Ассистент v0.0.2 запускается...")
     logger.info("=" * 50)
     
-    # Проверка подключения к Supabase
+    # Проверка подключения к хранилищу
     try:
         health = await db_client.health_check()
         if health:
-            logger.info("✅ Подключение к Supabase успешно")
+            logger.info(f"✅ Подключение к хранилищу ({config.STORAGE_BACKEND}) успешно")
         else:
-            logger.error("❌ Ошибка подключения к Supabase")
+            logger.error(f"❌ Ошибка подключения к хранилищу ({config.STORAGE_BACKEND})")
     except Exception as e:
-        logger.error(f"❌ Критическая ошибка подключения к Supabase: {e}")
+        logger.error(f"❌ Критическая ошибка подключения к хранилищу: {e}")
         raise
     
+    # Загрузка каталога заданий и фоновое отслеживание изменений
+    if catalog_watcher:
+        await catalog_watcher.start()
+    logger.info(f"Каталог заданий: {task_service.catalog}")
+    
+    # Подписки подключаются после первой загрузки каталога,
+    # чтобы уведомлять только о действительно новых заданиях
+    await subscription_service.start()
+    
+    # Доставка продолжает очередь уведомлений и рассылки, прерванные остановкой
+    await delivery_engine.start()
+    
+    # Первый цикл автозаработка - после загрузки каталога
+    await auto_earn_engine.start()
+    
+    # Соединение с CryptoBot API открываем заранее; сверка счетов
+    # зачисляет оплаты, пропущенные webhook и пользователем
+    if crypto_service:
+        await crypto_service.start()
+        await invoice_poller.start()
+    
+    # Запуск конвейера заданий с бирж
+    if ingestion_pipeline:
+        await ingestion_pipeline.start()
+    
     # Установка команд бота
     await set_bot_commands()
     
@@ -185,47 +338,33 @@ async def on_startup():
         app = web.Application()
 
         async def cryptobot_webhook(request):
-            try:
-                data = await request.json()
-            except Exception:
-                data = await request.post()
-
-            # Валидация webhook
-            if not crypto_service:
+            if not invoice_poller:
                 return web.Response(text='Crypto service not configured', status=400)
 
-            valid = await crypto_service.verify_webhook(data)
-            if not valid:
+            # Валидация подписи по сырому телу запроса
+            body = await request.read()
+            signature = request.headers.get('crypto-pay-api-signature')
+            if not crypto_service.verify_webhook(body, signature):
+                logger.warning("Cryptobot webhook с неверной подписью отклонен")
+                return web.Response(text='Invalid signature', status=401)
+
+            try:
+                data = json.loads(body)
+            except ValueError:
                 return web.Response(text='Invalid webhook', status=400)
 
-            # Попытаемся извлечь invoice id и статус
-            inv = None
-            status = None
+            # Зачисляются только оплаченные счета; остальные обновления пропускаем
+            if not isinstance(data, dict) or data.get('update_type') != 'invoice_paid':
+                return web.Response(text='ok')
+            invoice = data.get('payload')
+            if not isinstance(invoice, dict):
+                return web.Response(text='ok')
+
+            # Зачисление - тем же путем, что и фоновая сверка (ровно один раз)
             try:
-                inv = data.get('payload') or data.get('invoice_id') or (data.get('result') or {}).get('invoice_id')
-                status = (data.get('update_type') or data.get('status') or (data.get('result') or {}).get('status'))
-            except Exception:
-                pass
-
-            if inv:
-                try:
-                    # Обновляем запись в Supabase
-                    await db_client.update_payment_status(tx_id=str(inv), updates={"status": status or 'paid'})
-
-                    # Если статус paid — начисляем пользователю баланс
-                    if status == 'paid':
-                        rec = await db_client.get_payment_by_tx(str(inv))
-                        if rec:
-                            uid = rec.get('user_id')
-                            amt = float(rec.get('amount', 0))
-                            # Для TON — переводим в рубли по курсу 50₽
-                            if rec.get('currency') == 'TON':
-                                await user_service.update_balance(uid, amt * 50)
-                            elif rec.get('currency') in ('USDT', 'BTC'):
-                                # тут можно добавить конвертацию по курсу или начислять в валюте — пока начисляем в рублях по умолчанию 0
-                                await user_service.update_balance(uid, 0)
-                except Exception as e:
-                    logger.error(f"Ошибка обработки cryptobot webhook: {e}")
+                await invoice_poller.settle(invoice)
+            except Exception as e:
+                logger.error(f"Ошибка обработки cryptobot webhook: {e}")
 
             return web.Response(text='ok')
 
@@ -274,7 +413,24 @@ async def on_shutdown():
     logger.info("🛑 Остановка бота...")
     logger.info("=" * 50)
     
+    logger.info(f"Кеш профилей: {user_service.cache_stats()}")
+    
+    # Остановка фоновых задач
+    if ingestion_pipeline:
+        await ingestion_pipeline.stop()
+    if catalog_watcher:
+        await catalog_watcher.stop()
+    await auto_earn_engine.stop()
+    if invoice_poller:
+        await invoice_poller.stop()
+    await subscription_service.stop()
+    await delivery_engine.stop()
+    await ai_service.close()
+    
     # Закрытие соединений
+    if crypto_service:
+        await crypto_service.close()
+    await db_client.close()
     await bot.session.close()
     
     logger.info("✅ Бот остановлен")
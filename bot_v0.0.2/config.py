@@ -17,6 +17,19 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN не найден в переменных окружения. Проверьте .env файл.")
 
+# ============================================================================
+# STORAGE CONFIGURATION
+# ============================================================================
+
+# Хранилище данных: supabase (по умолчанию) или sqlite (локальный файл)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+
+if STORAGE_BACKEND not in ("supabase", "sqlite"):
+    raise ValueError(f"Неизвестный STORAGE_BACKEND: {STORAGE_BACKEND}. Допустимые значения: supabase, sqlite.")
+
+# Путь к файлу базы SQLite (используется при STORAGE_BACKEND=sqlite)
+SQLITE_PATH = os.getenv("SQLITE_PATH", "bot.db")
+
 # ============================================================================
 # SUPABASE CONFIGURATION
 # ============================================================================
@@ -24,18 +37,39 @@ if not BOT_TOKEN:
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL:
+if STORAGE_BACKEND == "supabase" and not SUPABASE_URL:
     raise ValueError("SUPABASE_URL не найден в переменных окружения. Проверьте .env файл.")
 
-if not SUPABASE_KEY:
+if STORAGE_BACKEND == "supabase" and not SUPABASE_KEY:
     raise ValueError("SUPABASE_KEY не найден в переменных окружения. Проверьте .env файл.")
 
+# Пул HTTP соединений к Supabase REST API
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+
+# Максимум одновременных запросов к БД (остальные ждут в очереди)
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "10"))
+
+# Таймаут одного запроса к БД (в секундах; для SQLite - ожидание блокировки)
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+
 # ============================================================================
 # CRYPTOBOT CONFIGURATION
 # ============================================================================
 
 CRYPTOBOT_TOKEN = os.getenv("CRYPTOBOT_TOKEN")
 
+# Пул HTTP соединений с pay.crypt.bot, таймаут запроса (в секундах)
+# и число повторов после ошибки 5xx или сети
+CRYPTOBOT_POOL_SIZE = int(os.getenv("CRYPTOBOT_POOL_SIZE", "10"))
+CRYPTOBOT_TIMEOUT = float(os.getenv("CRYPTOBOT_TIMEOUT", "10"))
+CRYPTOBOT_RETRIES = int(os.getenv("CRYPTOBOT_RETRIES", "2"))
+
+# Фоновая сверка неоплаченных счетов: интервал (в секундах) растет от
+# минимального до максимального, пока статусы счетов не меняются
+INVOICE_POLL_MIN_INTERVAL = float(os.getenv("INVOICE_POLL_MIN_INTERVAL", "5"))
+INVOICE_POLL_MAX_INTERVAL = float(os.getenv("INVOICE_POLL_MAX_INTERVAL", "60"))
+INVOICE_POLL_BATCH_SIZE = int(os.getenv("INVOICE_POLL_BATCH_SIZE", "100"))
+
 # ============================================================================
 # APPLICATION SETTINGS
 # ============================================================================
@@ -46,6 +80,108 @@ TASK_REWARD = 50
 # Роль пользователя по умолчанию
 DEFAULT_ROLE = "free"
 
+# Источник каталога заданий: builtin (список в коде), json (файл TASKS_FILE)
+# или storage (таблица tasks в хранилище). Каталог перечитывается на лету.
+TASKS_SOURCE = os.getenv("TASKS_SOURCE", "builtin").lower()
+
+if TASKS_SOURCE not in ("builtin", "json", "storage"):
+    raise ValueError(f"Неизвестный TASKS_SOURCE: {TASKS_SOURCE}. Допустимые значения: builtin, json, storage.")
+
+TASKS_FILE = os.getenv("TASKS_FILE", "tasks.json")
+
+# Период проверки источника заданий на изменения (в секундах)
+TASKS_RELOAD_INTERVAL = float(os.getenv("TASKS_RELOAD_INTERVAL", "30"))
+
+# ============================================================================
+# INGESTION CONFIGURATION
+# ============================================================================
+
+# JSON ленты заданий бирж (пусто - биржа не опрашивается)
+INGEST_FLRU_URL = os.getenv("INGEST_FLRU_URL", "")
+INGEST_KWORK_URL = os.getenv("INGEST_KWORK_URL", "")
+
+# Пауза между опросами биржи (в секундах)
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "60"))
+
+# Емкость очереди, размер пачки и максимальная задержка публикации (в секундах)
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "1000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "2"))
+
+# Максимум заданий с бирж в каталоге
+INGEST_MAX_TASKS = int(os.getenv("INGEST_MAX_TASKS", "5000"))
+
+# ============================================================================
+# SUBSCRIPTIONS CONFIGURATION
+# ============================================================================
+
+# Максимум подписок на новые задания у одного пользователя
+SUBSCRIPTIONS_PER_USER = int(os.getenv("SUBSCRIPTIONS_PER_USER", "10"))
+
+# Емкость очереди уведомлений в памяти (до записи в хранилище)
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "10000"))
+
+# Максимум уведомлений пользователю за NOTIFY_INTERVAL секунд (остальные - в сводку)
+NOTIFY_LIMIT = int(os.getenv("NOTIFY_LIMIT", "10"))
+NOTIFY_INTERVAL = float(os.getenv("NOTIFY_INTERVAL", "3600"))
+
+# ============================================================================
+# DELIVERY CONFIGURATION
+# ============================================================================
+
+# Общий лимит сообщений в секунду (Telegram допускает около 30)
+DELIVERY_RATE = float(os.getenv("DELIVERY_RATE", "25"))
+
+# Лимит сообщений в секунду в один чат
+DELIVERY_CHAT_RATE = float(os.getenv("DELIVERY_CHAT_RATE", "1"))
+
+# Количество одновременных отправок
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "8"))
+
+# Telegram ID администраторов через запятую (/broadcast, /delivery)
+ADMIN_IDS = frozenset(int(i) for i in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if i)
+
+# ============================================================================
+# AI CONFIGURATION
+# ============================================================================
+
+# Бэкенд генерации откликов: template (только шаблоны) или local (заглушка модели)
+AI_BACKEND = os.getenv("AI_BACKEND", "template")
+
+# Максимум одновременных вызовов модели и размер пачки промптов
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "2"))
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "8"))
+
+# Сколько ждать модель, прежде чем ответить шаблоном (в секундах)
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "10"))
+
+# Кеш сгенерированных откликов (количество и время жизни в секундах)
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1000"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "3600"))
+
+# Минимальный интервал между правками сообщения при потоковой генерации (в секундах)
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+
+# ============================================================================
+# AUTO EARN CONFIGURATION
+# ============================================================================
+
+# Период цикла автоматических откликов в секундах
+AUTO_EARN_INTERVAL = float(os.getenv("AUTO_EARN_INTERVAL", "300"))
+
+# Лимит автоматических откликов в сутки по умолчанию
+AUTO_EARN_DAILY_LIMIT = int(os.getenv("AUTO_EARN_DAILY_LIMIT", "5"))
+
+# Количество одновременных генераций откликов
+AUTO_EARN_WORKERS = int(os.getenv("AUTO_EARN_WORKERS", "4"))
+
+# Размер пачки пользователей за одно чтение и откликов за одну запись
+AUTO_EARN_BATCH_SIZE = int(os.getenv("AUTO_EARN_BATCH_SIZE", "200"))
+
+# Кеш профилей пользователей (количество записей и время жизни в секундах)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
 # Логирование
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -76,11 +212,10 @@ def validate_config():
     Валидация конфигурации при запуске приложения
     Проверяет наличие всех необходимых переменных
     """
-    required_vars = {
-        "BOT_TOKEN": BOT_TOKEN,
-        "SUPABASE_URL": SUPABASE_URL,
-        "SUPABASE_KEY": SUPABASE_KEY
-    }
+    required_vars = {"BOT_TOKEN": BOT_TOKEN}
+    if STORAGE_BACKEND == "supabase":
+        required_vars["SUPABASE_URL"] = SUPABASE_URL
+        required_vars["SUPABASE_KEY"] = SUPABASE_KEY
     
     missing_vars = [var for var, value in required_vars.items() if not value]
     
@@ -1,9 +1,27 @@
 """
 Database Layer
-Модуль для работы с базой данных Supabase
+Модуль для работы с базой данных (Supabase или SQLite)
 """
 
+from .storage import Storage
 from .supabase_client import SupabaseClient
+from .sqlite_client import SQLiteClient
 from .models import User, TaskResponse
+from .exceptions import (
+    DatabaseError,
+    RecordNotFoundError,
+    InsufficientFundsError,
+    DuplicateResponseError
+)
 
-__all__ = ['SupabaseClient', 'User', 'TaskResponse']
+__all__ = [
+    'Storage',
+    'SupabaseClient',
+    'SQLiteClient',
+    'User',
+    'TaskResponse',
+    'DatabaseError',
+    'RecordNotFoundError',
+    'InsufficientFundsError',
+    'DuplicateResponseError'
+]
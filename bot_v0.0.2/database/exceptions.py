@@ -0,0 +1,28 @@
+"""
+Database Exceptions
+Исключения слоя доступа к данным
+"""
+
+
+class DatabaseError(Exception):
+    """Базовая ошибка слоя доступа к данным"""
+
+    def __init__(self, message: str, status: int = None, details: str = None):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class RecordNotFoundError(DatabaseError):
+    """Запись не найдена"""
+    pass
+
+
+class InsufficientFundsError(DatabaseError):
+    """Недостаточно средств для списания"""
+    pass
+
+
+class DuplicateResponseError(DatabaseError):
+    """Пользователь уже откликался на задание"""
+    pass
@@ -0,0 +1,33 @@
+-- Migration: Atomic user counters
+-- Version: 002
+-- Date: 2026-10-17
+
+-- Атомарное изменение баланса и счетчика заданий за один запрос.
+-- Заменяет связку get_user + update_user, при которой параллельные
+-- начисления (webhook и "Я оплатил") могли перезаписать друг друга.
+CREATE OR REPLACE FUNCTION increment_user_counters(
+    p_user_id BIGINT,
+    p_balance_delta NUMERIC DEFAULT 0,
+    p_tasks_delta INTEGER DEFAULT 0
+)
+RETURNS users AS $$
+DECLARE
+    updated users;
+BEGIN
+    UPDATE users
+    SET balance = balance + p_balance_delta,
+        completed_tasks = completed_tasks + p_tasks_delta
+    WHERE user_id = p_user_id
+      AND balance + p_balance_delta >= 0
+    RETURNING * INTO updated;
+
+    IF NOT FOUND THEN
+        IF EXISTS (SELECT 1 FROM users WHERE user_id = p_user_id) THEN
+            RAISE EXCEPTION 'insufficient_funds';
+        END IF;
+        RAISE EXCEPTION 'user_not_found';
+    END IF;
+
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
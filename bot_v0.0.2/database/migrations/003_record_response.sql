@@ -0,0 +1,45 @@
+-- Migration: Single-round-trip response recording
+-- Version: 003
+-- Date: 2026-10-17
+
+-- Записывает отклик, начисляет награду и увеличивает счетчик заданий
+-- в одной транзакции. Дубликат определяется уникальным индексом
+-- idx_responses_user_task (см. schema.sql) через ON CONFLICT.
+-- Возвращает JSON: {"response": <строка responses>, "user": <строка users>}
+CREATE OR REPLACE FUNCTION record_response(
+    p_user_id BIGINT,
+    p_task_id INTEGER,
+    p_task_title TEXT,
+    p_response_text TEXT,
+    p_earned NUMERIC
+)
+RETURNS JSON AS $$
+DECLARE
+    new_response responses;
+    updated_user users;
+BEGIN
+    INSERT INTO responses (user_id, task_id, task_title, response_text, earned)
+    VALUES (p_user_id, p_task_id, p_task_title, p_response_text, p_earned)
+    ON CONFLICT (user_id, task_id) DO NOTHING
+    RETURNING * INTO new_response;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'duplicate_response';
+    END IF;
+
+    UPDATE users
+    SET balance = balance + p_earned,
+        completed_tasks = completed_tasks + 1
+    WHERE user_id = p_user_id
+    RETURNING * INTO updated_user;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'user_not_found';
+    END IF;
+
+    RETURN json_build_object(
+        'response', row_to_json(new_response),
+        'user', row_to_json(updated_user)
+    );
+END;
+$$ LANGUAGE plpgsql;
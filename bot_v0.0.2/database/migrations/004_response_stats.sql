@@ -0,0 +1,37 @@
+-- Migration: Server-side response statistics
+-- Version: 004
+-- Date: 2026-10-17
+
+-- Агрегаты по откликам пользователя считаются в БД: клиент получает
+-- только числа, а не всю историю откликов с текстами.
+-- Возвращает JSON:
+-- {
+--   "total_responses": 12,
+--   "total_earned": 600.00,
+--   "avg_earned": 50.00,
+--   "latest_response": "2026-10-17T10:00:00+00:00",
+--   "task_counts": [{"task_id": 1, "count": 1}, ...]
+-- }
+CREATE OR REPLACE FUNCTION get_response_stats(p_user_id BIGINT)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_responses', COUNT(*),
+        'total_earned', COALESCE(SUM(earned), 0),
+        'avg_earned', COALESCE(AVG(earned), 0),
+        'latest_response', MAX(created_at),
+        'task_counts', COALESCE(
+            (
+                SELECT json_agg(json_build_object('task_id', t.task_id, 'count', t.cnt))
+                FROM (
+                    SELECT task_id, COUNT(*) AS cnt
+                    FROM responses
+                    WHERE user_id = p_user_id
+                    GROUP BY task_id
+                ) t
+            ),
+            '[]'::json
+        )
+    )
+    FROM responses
+    WHERE user_id = p_user_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,33 @@
+-- Migration: Unique constraints and lookup indexes
+-- Version: 005
+-- Date: 2026-10-17
+
+-- Дубликаты откликов отклоняет сама БД: create_response и record_response
+-- вставляют с ON CONFLICT (user_id, task_id) DO NOTHING, без отдельного
+-- SELECT перед вставкой. Для этого индекс (user_id, task_id) обязан быть
+-- уникальным.
+
+-- Если дубликаты успели появиться до индекса, оставляем самый ранний отклик
+DELETE FROM responses r
+USING responses d
+WHERE r.user_id = d.user_id
+  AND r.task_id = d.task_id
+  AND r.id > d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_responses_user_task
+ON responses(user_id, task_id);
+
+-- Индекс по user_id покрывается уникальным индексом (user_id, task_id)
+DROP INDEX IF EXISTS idx_responses_user_id;
+
+-- Поиск платежа по tx_id (webhook, проверка статуса) идет по уникальному
+-- индексу ограничения tx_id UNIQUE из 001 (payments_tx_id_key).
+-- Обычный индекс idx_payments_tx_id его дублирует и только замедляет вставку.
+DROP INDEX IF EXISTS idx_payments_tx_id;
+
+-- Платежи пользователя по статусу (get_pending_payment, история платежей)
+CREATE INDEX IF NOT EXISTS idx_payments_user_status
+ON payments(user_id, status, created_at DESC, id DESC);
+
+-- Индекс по user_id покрывается индексом (user_id, status, ...)
+DROP INDEX IF EXISTS idx_payments_user_id;
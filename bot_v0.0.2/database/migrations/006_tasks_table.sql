@@ -0,0 +1,55 @@
+-- Migration: Task catalog table
+-- Version: 006
+-- Date: 2026-10-17
+
+-- Каталог заданий хранится в БД и перечитывается ботом на лету
+-- (TASKS_SOURCE=storage): добавление задания не требует передеплоя.
+CREATE TABLE IF NOT EXISTS tasks (
+    id BIGINT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    budget INTEGER NOT NULL DEFAULT 0 CHECK (budget >= 0),
+    category TEXT NOT NULL,
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE tasks IS 'Каталог заданий бота';
+COMMENT ON COLUMN tasks.active IS 'Неактивные задания не попадают в каталог';
+
+-- Версия каталога считается по updated_at
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at DESC);
+
+CREATE OR REPLACE FUNCTION update_tasks_timestamp()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_tasks_updated_at ON tasks;
+CREATE TRIGGER trigger_tasks_updated_at
+BEFORE UPDATE ON tasks
+FOR EACH ROW
+EXECUTE FUNCTION update_tasks_timestamp();
+
+-- Метка версии каталога: меняется при вставке, изменении и удалении строк.
+-- Бот опрашивает ее и перечитывает задания только когда она изменилась.
+CREATE OR REPLACE FUNCTION tasks_version()
+RETURNS TEXT AS $$
+    SELECT COUNT(*)::TEXT || ':' || COALESCE(MAX(updated_at)::TEXT, '')
+    FROM tasks;
+$$ LANGUAGE sql STABLE;
+
+-- Начальный каталог (задания, ранее зашитые в services/task_service.py)
+INSERT INTO tasks (id, title, description, budget, category) VALUES
+    (1, 'Написать рекламный текст для кофейни', 'Нужен короткий рекламный текст (200-300 символов) для Instagram', 500, 'Копирайтинг'),
+    (2, 'Придумать слоган для IT-стартапа', 'Стартап занимается разработкой мобильных приложений', 300, 'Креатив'),
+    (3, 'Перевод текста с английского на русский', 'Технический текст, около 100 слов', 400, 'Переводы'),
+    (4, 'Описание товара для маркетплейса', 'Написать SEO-оптимизированное описание для электроники', 350, 'Копирайтинг'),
+    (5, 'Создать пост для LinkedIn', 'Пост о важности soft skills в IT', 250, 'SMM')
+ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE tasks DISABLE ROW LEVEL SECURITY;
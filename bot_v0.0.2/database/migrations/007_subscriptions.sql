@@ -0,0 +1,25 @@
+-- Migration: Task subscriptions
+-- Version: 007
+-- Date: 2026-10-17
+
+-- Подписки пользователей на новые задания. Задание подходит подписке,
+-- если совпадает категория (пустой список - любая), бюджет не ниже
+-- min_budget и в тексте есть хотя бы одно ключевое слово (пустой
+-- список - любое задание). Бот держит подписки в памяти в виде
+-- индекса по категориям и словам, таблица читается целиком при запуске.
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    categories TEXT[] NOT NULL DEFAULT '{}',
+    keywords TEXT[] NOT NULL DEFAULT '{}',
+    min_budget NUMERIC(10, 2) NOT NULL DEFAULT 0 CHECK (min_budget >= 0),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE subscriptions IS 'Подписки пользователей на новые задания';
+COMMENT ON COLUMN subscriptions.keywords IS 'Ключевые слова в исходном виде (основы строит бот)';
+
+-- Подписки пользователя (/subscribe, /unsubscribe)
+CREATE INDEX IF NOT EXISTS idx_subscriptions_user_id ON subscriptions(user_id, id);
+
+ALTER TABLE subscriptions DISABLE ROW LEVEL SECURITY;
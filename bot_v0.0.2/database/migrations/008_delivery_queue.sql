@@ -0,0 +1,53 @@
+-- Migration: Persistent delivery queue
+-- Version: 008
+-- Date: 2026-10-17
+
+-- Уведомления о новых заданиях, ожидающие отправки. Строка удаляется
+-- после отправки (или окончательной ошибки), поэтому после перезапуска
+-- бот дочитывает очередь с того же места.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    task_id BIGINT,
+    text TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE notification_outbox IS 'Очередь уведомлений пользователям';
+
+-- Рассылки. Получатели не материализуются: рассылка идет по таблице
+-- users в порядке user_id, а last_user_id хранит позицию, до которой
+-- сообщения уже отправлены.
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id BIGSERIAL PRIMARY KEY,
+    text TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'done', 'cancelled')),
+    last_user_id BIGINT NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_by BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE broadcasts IS 'Рассылки с позицией продолжения';
+COMMENT ON COLUMN broadcasts.last_user_id IS 'Последний user_id, которому рассылка уже доставлена';
+
+CREATE INDEX IF NOT EXISTS idx_broadcasts_status ON broadcasts(status, id);
+
+CREATE OR REPLACE FUNCTION update_broadcasts_timestamp()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_broadcasts_updated_at ON broadcasts;
+CREATE TRIGGER trigger_broadcasts_updated_at
+BEFORE UPDATE ON broadcasts
+FOR EACH ROW
+EXECUTE FUNCTION update_broadcasts_timestamp();
+
+ALTER TABLE notification_outbox DISABLE ROW LEVEL SECURITY;
+ALTER TABLE broadcasts DISABLE ROW LEVEL SECURITY;
@@ -0,0 +1,59 @@
+-- Migration: Auto-earn settings and batch response recording
+-- Version: 009
+-- Date: 2026-10-17
+
+-- Настройки автозаработка: бот сам откликается на задания за
+-- пользователей с enabled = TRUE, не более daily_limit откликов в сутки
+-- (считаются все отклики пользователя с начала суток UTC).
+CREATE TABLE IF NOT EXISTS auto_earn_settings (
+    user_id BIGINT PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    enabled BOOLEAN NOT NULL DEFAULT FALSE,
+    daily_limit INTEGER NOT NULL DEFAULT 5 CHECK (daily_limit > 0),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE auto_earn_settings IS 'Настройки автоматических откликов пользователей';
+
+-- Цикл автозаработка обходит только включенных пользователей по user_id
+CREATE INDEX IF NOT EXISTS idx_auto_earn_enabled ON auto_earn_settings(user_id) WHERE enabled;
+
+ALTER TABLE auto_earn_settings DISABLE ROW LEVEL SECURITY;
+
+-- Откликнутые задания и число откликов за период для пачки пользователей.
+-- Одна строка на пользователя, у которого есть отклики.
+CREATE OR REPLACE FUNCTION get_response_summary(p_user_ids BIGINT[], p_since TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (user_id BIGINT, task_ids INTEGER[], recent INTEGER) AS $$
+    SELECT r.user_id,
+           array_agg(r.task_id),
+           (COUNT(*) FILTER (WHERE r.created_at >= p_since))::INTEGER
+    FROM responses r
+    WHERE r.user_id = ANY(p_user_ids)
+    GROUP BY r.user_id;
+$$ LANGUAGE sql STABLE;
+
+-- Пакетная версия record_response (см. 003): вставляет отклики,
+-- пропуская дубликаты, и одним UPDATE начисляет награды и счетчики
+-- заданий. Возвращает только вставленные отклики.
+-- p_responses: [{"user_id", "task_id", "task_title", "response_text", "earned"}, ...]
+CREATE OR REPLACE FUNCTION record_responses(p_responses JSONB)
+RETURNS SETOF responses AS $$
+    WITH inserted AS (
+        INSERT INTO responses (user_id, task_id, task_title, response_text, earned)
+        SELECT r.user_id, r.task_id, r.task_title, r.response_text, r.earned
+        FROM jsonb_to_recordset(p_responses)
+            AS r(user_id BIGINT, task_id INTEGER, task_title TEXT, response_text TEXT, earned NUMERIC)
+        ON CONFLICT (user_id, task_id) DO NOTHING
+        RETURNING *
+    ), credited AS (
+        UPDATE users u
+        SET balance = u.balance + t.earned,
+            completed_tasks = u.completed_tasks + t.responses
+        FROM (
+            SELECT i.user_id, SUM(i.earned) AS earned, COUNT(*) AS responses
+            FROM inserted i
+            GROUP BY i.user_id
+        ) t
+        WHERE u.user_id = t.user_id
+    )
+    SELECT * FROM inserted;
+$$ LANGUAGE sql;
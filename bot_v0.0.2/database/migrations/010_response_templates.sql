@@ -0,0 +1,103 @@
+-- Migration: Template-reference storage for responses
+-- Version: 010
+-- Date: 2026-10-17
+
+-- Отклик, собранный по шаблону (см. database/response_templates.py),
+-- хранится как template_id без текста: параметр шаблона (название
+-- задания) уже есть в task_title, текст собирается при отображении.
+-- response_text заполняется только для текстов не по шаблону.
+ALTER TABLE responses ALTER COLUMN response_text DROP NOT NULL;
+ALTER TABLE responses ADD COLUMN IF NOT EXISTS template_id SMALLINT;
+ALTER TABLE responses DROP CONSTRAINT IF EXISTS responses_text_or_template;
+ALTER TABLE responses ADD CONSTRAINT responses_text_or_template
+    CHECK (response_text IS NOT NULL OR template_id IS NOT NULL);
+
+COMMENT ON COLUMN responses.response_text IS 'Текст отклика (NULL для отклика по шаблону)';
+COMMENT ON COLUMN responses.template_id IS 'ID шаблона отклика (NULL для текста не по шаблону)';
+
+-- Уже сохраненные отклики по шаблонам заменяем ссылками.
+-- Тексты совпадают с TEMPLATES в database/response_templates.py на момент миграции.
+UPDATE responses r
+SET response_text = NULL,
+    template_id = t.id
+FROM (VALUES
+    (1, 'Здравствуйте! Готов выполнить задание ''{title}''. Имею опыт в копирайтинге, портфолио вышлю в личку. Срок выполнения: 1-2 дня. Жду вашего ответа!'),
+    (2, 'Добрый день! Заинтересовало ваше задание. Напишу качественный текст с учетом целевой аудитории. Готов приступить сразу после согласования деталей.'),
+    (3, 'Привет! Задание ''{title}'' выглядит интересно. Предложу несколько вариантов слоганов на выбор. Опыт работы с брендингом есть, примеры покажу.'),
+    (4, 'Здравствуйте! Креативные задачи — моя специализация. Разработаю несколько концепций под ваш бренд. Обсудим?'),
+    (5, 'Добрый день! Выполню перевод качественно и в срок. Опыт технических переводов 3+ года. Гарантирую точность и соблюдение терминологии.'),
+    (6, 'Здравствуйте! Готов взяться за перевод. Носитель русского языка, отличное знание английского. Срок: 1 день.'),
+    (7, 'Привет! Задание ''{title}'' мне подходит. Создам вовлекающий пост с учетом специфики LinkedIn. Есть опыт ведения бизнес-аккаунтов.'),
+    (8, 'Здравствуйте! Напишу пост, который зайдет вашей аудитории. Учту тренды и особенности платформы. Обсудим детали?'),
+    (9, 'Здравствуйте! Готов выполнить задание ''{title}''. Обсудим детали?')
+) AS t(id, text)
+WHERE r.template_id IS NULL
+  AND r.response_text = replace(t.text, '{title}', r.task_title);
+
+-- record_response (см. 003) с ссылкой на шаблон
+DROP FUNCTION IF EXISTS record_response(BIGINT, INTEGER, TEXT, TEXT, NUMERIC);
+
+CREATE OR REPLACE FUNCTION record_response(
+    p_user_id BIGINT,
+    p_task_id INTEGER,
+    p_task_title TEXT,
+    p_response_text TEXT,
+    p_earned NUMERIC,
+    p_template_id SMALLINT DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    new_response responses;
+    updated_user users;
+BEGIN
+    INSERT INTO responses (user_id, task_id, task_title, response_text, template_id, earned)
+    VALUES (p_user_id, p_task_id, p_task_title, p_response_text, p_template_id, p_earned)
+    ON CONFLICT (user_id, task_id) DO NOTHING
+    RETURNING * INTO new_response;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'duplicate_response';
+    END IF;
+
+    UPDATE users
+    SET balance = balance + p_earned,
+        completed_tasks = completed_tasks + 1
+    WHERE user_id = p_user_id
+    RETURNING * INTO updated_user;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'user_not_found';
+    END IF;
+
+    RETURN json_build_object(
+        'response', row_to_json(new_response),
+        'user', row_to_json(updated_user)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- record_responses (см. 009) с ссылкой на шаблон
+-- p_responses: [{"user_id", "task_id", "task_title", "response_text", "template_id", "earned"}, ...]
+CREATE OR REPLACE FUNCTION record_responses(p_responses JSONB)
+RETURNS SETOF responses AS $$
+    WITH inserted AS (
+        INSERT INTO responses (user_id, task_id, task_title, response_text, template_id, earned)
+        SELECT r.user_id, r.task_id, r.task_title, r.response_text, r.template_id, r.earned
+        FROM jsonb_to_recordset(p_responses)
+            AS r(user_id BIGINT, task_id INTEGER, task_title TEXT, response_text TEXT,
+                 template_id SMALLINT, earned NUMERIC)
+        ON CONFLICT (user_id, task_id) DO NOTHING
+        RETURNING *
+    ), credited AS (
+        UPDATE users u
+        SET balance = u.balance + t.earned,
+            completed_tasks = u.completed_tasks + t.responses
+        FROM (
+            SELECT i.user_id, SUM(i.earned) AS earned, COUNT(*) AS responses
+            FROM inserted i
+            GROUP BY i.user_id
+        ) t
+        WHERE u.user_id = t.user_id
+    )
+    SELECT * FROM inserted;
+$$ LANGUAGE sql;
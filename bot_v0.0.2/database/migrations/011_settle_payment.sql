@@ -0,0 +1,47 @@
+-- Migration: Exactly-once payment settlement
+-- Version: 011
+-- Date: 2026-10-17
+
+-- Неоплаченные счета для фоновой сверки (keyset по id)
+CREATE INDEX IF NOT EXISTS idx_payments_pending ON payments(id) WHERE status = 'pending';
+
+-- Завершает платеж и начисляет сумму на баланс в одной транзакции.
+-- Статус меняется только у платежа в 'pending', поэтому webhook,
+-- фоновая сверка и кнопка "Я оплатил" начисляют сумму ровно один раз.
+-- Возвращает JSON {"payment": <строка payments>, "user": <строка users>}
+-- или NULL, если платеж не найден или уже завершен.
+CREATE OR REPLACE FUNCTION settle_payment(
+    p_tx_id TEXT,
+    p_status TEXT,
+    p_credit NUMERIC DEFAULT 0
+)
+RETURNS JSON AS $$
+DECLARE
+    settled payments;
+    updated_user users;
+BEGIN
+    UPDATE payments
+    SET status = p_status
+    WHERE tx_id = p_tx_id
+      AND status = 'pending'
+    RETURNING * INTO settled;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE users
+    SET balance = balance + p_credit
+    WHERE user_id = settled.user_id
+    RETURNING * INTO updated_user;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'user_not_found';
+    END IF;
+
+    RETURN json_build_object(
+        'payment', row_to_json(settled),
+        'user', row_to_json(updated_user)
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,57 @@
+-- Migration: Persistent IDs of exchange tasks
+-- Version: 012
+-- Date: 2026-10-17
+
+-- ID заданий с бирж в каталоге. ID выводится из crc32 (биржа, ID на бирже),
+-- а при коллизии конвейер берет следующий свободный; закрепленный здесь ID
+-- не зависит от порядка поступления заданий и переживает перезапуск, поэтому
+-- отклики (responses.task_id) всегда ссылаются на то же задание.
+-- Строка создается при первом появлении задания и служит отметкой
+-- "задание уже было", по которой подписчики уведомляются один раз.
+CREATE TABLE IF NOT EXISTS external_tasks (
+    id INTEGER PRIMARY KEY,
+    source VARCHAR(50) NOT NULL,
+    source_id TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (source, source_id)
+);
+
+COMMENT ON TABLE external_tasks IS 'Закрепленные ID заданий с бирж';
+
+-- Закрепляет ID за заданиями бирж. Для задания, у которого ID уже есть,
+-- возвращает его (created = false); иначе занимает предложенный ID
+-- (created = true). Если предложенный ID занят другим заданием, строка
+-- для задания не возвращается: конвейер предложит следующий ID.
+CREATE OR REPLACE FUNCTION claim_external_task_ids(
+    p_sources TEXT[],
+    p_source_ids TEXT[],
+    p_ids INTEGER[]
+)
+RETURNS TABLE (source TEXT, source_id TEXT, id INTEGER, created BOOLEAN) AS $$
+#variable_conflict use_column
+DECLARE
+    i INTEGER;
+    existing_id INTEGER;
+BEGIN
+    FOR i IN 1 .. COALESCE(array_length(p_sources, 1), 0) LOOP
+        SELECT e.id INTO existing_id
+        FROM external_tasks e
+        WHERE e.source = p_sources[i] AND e.source_id = p_source_ids[i];
+
+        IF FOUND THEN
+            RETURN QUERY SELECT p_sources[i], p_source_ids[i], existing_id, FALSE;
+            CONTINUE;
+        END IF;
+
+        INSERT INTO external_tasks (id, source, source_id)
+        VALUES (p_ids[i], p_sources[i], p_source_ids[i])
+        ON CONFLICT DO NOTHING;
+
+        IF FOUND THEN
+            RETURN QUERY SELECT p_sources[i], p_source_ids[i], p_ids[i], TRUE;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE external_tasks DISABLE ROW LEVEL SECURITY;
@@ -3,16 +3,58 @@ Data Models
 Модели данных для пользователей и откликов
 """
 
-from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
+from .response_templates import TEMPLATES, match_template, render_template
 
 
-@dataclass
-class User:
+def _parse_timestamp(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Разобрать время из строки ISO 8601 (в т.ч. с суффиксом Z)"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+
+class _Model:
+    """
+    Базовый класс моделей на __slots__
+
+    Модели создаются двумя путями:
+    - конструктор и from_dict валидируют поля (данные от пользователя, JSON);
+    - from_row доверяет строке из БД и только раскладывает значения по слотам.
+    created_at хранится как пришел из БД и разбирается при первом обращении,
+    поэтому списки, где время не показывается, не платят за fromisoformat.
+    """
+
+    __slots__ = ('_created_at',)
+
+    @property
+    def created_at(self) -> Optional[datetime]:
+        """Время создания (строка из БД разбирается при первом обращении)"""
+        value = self._created_at
+        if isinstance(value, str):
+            value = self._created_at = _parse_timestamp(value)
+        return value
+
+    @created_at.setter
+    def created_at(self, value: Union[str, datetime, None]) -> None:
+        self._created_at = value
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+
+class User(_Model):
     """
     Модель пользователя
-    
+
     Attributes:
         user_id: Telegram user ID
         username: Telegram username
@@ -21,80 +63,107 @@ class User:
         role: Роль пользователя (free/pro)
         created_at: Дата регистрации
     """
-    user_id: int
-    username: str
-    balance: float = 0.0
-    completed_tasks: int = 0
-    role: str = "free"
-    created_at: Optional[datetime] = None
-    
-    def __post_init__(self):
-        """Валидация полей после инициализации"""
+
+    __slots__ = ('user_id', 'username', 'balance', 'completed_tasks', 'role')
+    FIELDS = ('user_id', 'username', 'balance', 'completed_tasks', 'role', 'created_at')
+
+    def __init__(
+        self,
+        user_id: int,
+        username: str,
+        balance: float = 0.0,
+        completed_tasks: int = 0,
+        role: str = "free",
+        created_at: Optional[datetime] = None
+    ):
+        """Создание пользователя с валидацией полей"""
         # Валидация user_id
-        if not isinstance(self.user_id, int) or self.user_id <= 0:
-            raise ValueError(f"user_id должен быть положительным числом, получено: {self.user_id}")
-        
+        if not isinstance(user_id, int) or user_id <= 0:
+            raise ValueError(f"user_id должен быть положительным числом, получено: {user_id}")
+
         # Валидация username
-        if not self.username or not isinstance(self.username, str):
-            raise ValueError(f"username должен быть непустой строкой, получено: {self.username}")
-        
+        if not username or not isinstance(username, str):
+            raise ValueError(f"username должен быть непустой строкой, получено: {username}")
+
         # Валидация balance
-        if not isinstance(self.balance, (int, float)) or self.balance < 0:
-            raise ValueError(f"balance должен быть неотрицательным числом, получено: {self.balance}")
-        
+        if not isinstance(balance, (int, float)) or balance < 0:
+            raise ValueError(f"balance должен быть неотрицательным числом, получено: {balance}")
+
         # Валидация completed_tasks
-        if not isinstance(self.completed_tasks, int) or self.completed_tasks < 0:
-            raise ValueError(f"completed_tasks должен быть неотрицательным целым числом, получено: {self.completed_tasks}")
-        
+        if not isinstance(completed_tasks, int) or completed_tasks < 0:
+            raise ValueError(f"completed_tasks должен быть неотрицательным целым числом, получено: {completed_tasks}")
+
         # Валидация role
         valid_roles = ["free", "pro"]
-        if self.role not in valid_roles:
-            raise ValueError(f"role должен быть одним из {valid_roles}, получено: {self.role}")
-        
+        if role not in valid_roles:
+            raise ValueError(f"role должен быть одним из {valid_roles}, получено: {role}")
+
+        self.user_id = user_id
+        self.username = username
+        self.balance = balance
+        self.completed_tasks = completed_tasks
+        self.role = role
+
         # Установка created_at если не задано
-        if self.created_at is None:
-            self.created_at = datetime.now()
-    
+        self._created_at = created_at if created_at is not None else datetime.now()
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Конвертация объекта в словарь для Supabase
-        
+
         Returns:
             Dict с полями для вставки в БД
         """
+        created_at = self.created_at
         return {
             "user_id": self.user_id,
             "username": self.username,
             "balance": float(self.balance),
             "completed_tasks": self.completed_tasks,
             "role": self.role,
-            "created_at": self.created_at.isoformat() if self.created_at else datetime.now().isoformat()
+            "created_at": created_at.isoformat() if created_at else datetime.now().isoformat()
         }
-    
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'User':
         """
-        Создание объекта User из словаря (из Supabase)
-        
+        Создание объекта User из словаря с валидацией
+
         Args:
-            data: Словарь с данными из БД
-            
+            data: Словарь с данными (JSON, ввод пользователя)
+
         Returns:
             Объект User
         """
-        created_at = data.get('created_at')
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        
         return cls(
             user_id=data['user_id'],
             username=data['username'],
             balance=float(data.get('balance', 0.0)),
             completed_tasks=int(data.get('completed_tasks', 0)),
             role=data.get('role', 'free'),
-            created_at=created_at
+            created_at=_parse_timestamp(data.get('created_at'))
         )
-    
+
+    @classmethod
+    def from_row(cls, row: Any) -> 'User':
+        """
+        Быстрое создание User из строки БД без валидации
+
+        Args:
+            row: Строка users со всеми колонками (dict или sqlite3.Row)
+
+        Returns:
+            Объект User
+        """
+        user = cls.__new__(cls)
+        user.user_id = row['user_id']
+        user.username = row['username']
+        user.balance = float(row['balance'])
+        user.completed_tasks = row['completed_tasks']
+        user.role = row['role']
+        user._created_at = row['created_at']
+        return user
+
     def __repr__(self) -> str:
         """Строковое представление объекта"""
         return (f"User(user_id={self.user_id}, username='{self.username}', "
@@ -102,100 +171,151 @@ class User:
                 f"role='{self.role}')")
 
 
-@dataclass
-class TaskResponse:
+class TaskResponse(_Model):
     """
     Модель отклика на задание
-    
+
     Attributes:
         user_id: Telegram user ID
         task_id: ID задания
         task_title: Название задания
-        response_text: Текст отклика
+        response_text: Текст отклика (для отклика по шаблону собирается
+            из шаблона и task_title при обращении)
+        template_id: ID шаблона (None - текст не по шаблону, хранится целиком)
         earned: Заработано рублей за отклик
         created_at: Дата создания отклика
+        id: ID отклика в БД (None до сохранения)
     """
-    user_id: int
-    task_id: int
-    task_title: str
-    response_text: str
-    earned: float
-    created_at: Optional[datetime] = None
-    
-    def __post_init__(self):
-        """Валидация полей после инициализации"""
+
+    __slots__ = ('user_id', 'task_id', 'task_title', '_response_text', 'template_id', 'earned', 'id')
+    FIELDS = ('user_id', 'task_id', 'task_title', 'response_text', 'earned', 'created_at', 'id')
+
+    def __init__(
+        self,
+        user_id: int,
+        task_id: int,
+        task_title: str,
+        response_text: Optional[str],
+        earned: float,
+        created_at: Optional[datetime] = None,
+        id: Optional[int] = None,
+        template_id: Optional[int] = None
+    ):
+        """Создание отклика с валидацией полей"""
         # Валидация user_id
-        if not isinstance(self.user_id, int) or self.user_id <= 0:
-            raise ValueError(f"user_id должен быть положительным числом, получено: {self.user_id}")
-        
+        if not isinstance(user_id, int) or user_id <= 0:
+            raise ValueError(f"user_id должен быть положительным числом, получено: {user_id}")
+
         # Валидация task_id
-        if not isinstance(self.task_id, int) or self.task_id <= 0:
-            raise ValueError(f"task_id должен быть положительным числом, получено: {self.task_id}")
-        
+        if not isinstance(task_id, int) or task_id <= 0:
+            raise ValueError(f"task_id должен быть положительным числом, получено: {task_id}")
+
         # Валидация task_title
-        if not self.task_title or not isinstance(self.task_title, str):
-            raise ValueError(f"task_title должен быть непустой строкой, получено: {self.task_title}")
-        
-        # Валидация response_text
-        if not self.response_text or not isinstance(self.response_text, str):
-            raise ValueError(f"response_text должен быть непустой строкой, получено: {self.response_text}")
-        
+        if not task_title or not isinstance(task_title, str):
+            raise ValueError(f"task_title должен быть непустой строкой, получено: {task_title}")
+
+        # Валидация response_text и template_id: текст по шаблону
+        # заменяется ссылкой на шаблон
+        if template_id is None:
+            if not response_text or not isinstance(response_text, str):
+                raise ValueError(f"response_text должен быть непустой строкой, получено: {response_text}")
+            template_id = match_template(response_text, task_title)
+        elif template_id not in TEMPLATES:
+            raise ValueError(f"Неизвестный template_id: {template_id}")
+
         # Валидация earned
-        if not isinstance(self.earned, (int, float)) or self.earned < 0:
-            raise ValueError(f"earned должен быть неотрицательным числом, получено: {self.earned}")
-        
+        if not isinstance(earned, (int, float)) or earned < 0:
+            raise ValueError(f"earned должен быть неотрицательным числом, получено: {earned}")
+
+        self.user_id = user_id
+        self.task_id = task_id
+        self.task_title = task_title
+        self._response_text = None if template_id is not None else response_text
+        self.template_id = template_id
+        self.earned = earned
+        self.id = id
+
         # Установка created_at если не задано
-        if self.created_at is None:
-            self.created_at = datetime.now()
-    
+        self._created_at = created_at if created_at is not None else datetime.now()
+
+    @property
+    def response_text(self) -> str:
+        """Текст отклика (отклик по шаблону собирается при каждом обращении)"""
+        if self._response_text is not None:
+            return self._response_text
+        return render_template(self.template_id, self.task_title)
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Конвертация объекта в словарь для Supabase
-        
+
         Returns:
-            Dict с полями для вставки в БД
+            Dict с полями для вставки в БД (для отклика по шаблону
+            response_text = None)
         """
+        created_at = self.created_at
         return {
             "user_id": self.user_id,
             "task_id": self.task_id,
             "task_title": self.task_title,
-            "response_text": self.response_text,
+            "response_text": self._response_text,
+            "template_id": self.template_id,
             "earned": float(self.earned),
-            "created_at": self.created_at.isoformat() if self.created_at else datetime.now().isoformat()
+            "created_at": created_at.isoformat() if created_at else datetime.now().isoformat()
         }
-    
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'TaskResponse':
         """
-        Создание объекта TaskResponse из словаря (из Supabase)
-        
+        Создание объекта TaskResponse из словаря с валидацией
+
         Args:
-            data: Словарь с данными из БД
-            
+            data: Словарь с данными (JSON, ввод пользователя)
+
         Returns:
             Объект TaskResponse
         """
-        created_at = data.get('created_at')
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        
         return cls(
             user_id=data['user_id'],
             task_id=data['task_id'],
             task_title=data['task_title'],
-            response_text=data['response_text'],
+            response_text=data.get('response_text'),
             earned=float(data['earned']),
-            created_at=created_at
+            created_at=_parse_timestamp(data.get('created_at')),
+            id=data.get('id'),
+            template_id=data.get('template_id')
         )
-    
+
+    @classmethod
+    def from_row(cls, row: Any) -> 'TaskResponse':
+        """
+        Быстрое создание TaskResponse из строки БД без валидации
+
+        Args:
+            row: Строка responses со всеми колонками RESPONSE_LIST_COLUMNS
+                (dict или sqlite3.Row)
+
+        Returns:
+            Объект TaskResponse
+        """
+        response = cls.__new__(cls)
+        response.id = row['id']
+        response.user_id = row['user_id']
+        response.task_id = row['task_id']
+        response.task_title = row['task_title']
+        response._response_text = row['response_text']
+        response.template_id = row['template_id']
+        response.earned = float(row['earned'])
+        response._created_at = row['created_at']
+        return response
+
     def __repr__(self) -> str:
         """Строковое представление объекта"""
         return (f"TaskResponse(user_id={self.user_id}, task_id={self.task_id}, "
                 f"task_title='{self.task_title}', earned={self.earned})")
 
 
-@dataclass
-class Payment:
+class Payment(_Model):
     """
     Модель платежа
 
@@ -208,19 +328,30 @@ class Payment:
         meta: Дополнительные данные (dict)
         created_at: Время создания
     """
-    user_id: int
-    currency: str
-    amount: float
-    tx_id: Optional[str] = None
-    status: str = "pending"
-    meta: Optional[Dict[str, Any]] = field(default_factory=dict)
-    created_at: Optional[datetime] = None
-
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now()
+
+    __slots__ = ('user_id', 'currency', 'amount', 'tx_id', 'status', 'meta')
+    FIELDS = ('user_id', 'currency', 'amount', 'tx_id', 'status', 'meta', 'created_at')
+
+    def __init__(
+        self,
+        user_id: int,
+        currency: str,
+        amount: float,
+        tx_id: Optional[str] = None,
+        status: str = "pending",
+        meta: Optional[Dict[str, Any]] = None,
+        created_at: Optional[datetime] = None
+    ):
+        self.user_id = user_id
+        self.currency = currency
+        self.amount = amount
+        self.tx_id = tx_id
+        self.status = status
+        self.meta = meta if meta is not None else {}
+        self._created_at = created_at if created_at is not None else datetime.now()
 
     def to_dict(self) -> Dict[str, Any]:
+        created_at = self.created_at
         return {
             "user_id": self.user_id,
             "currency": self.currency,
@@ -228,15 +359,11 @@ class Payment:
             "tx_id": self.tx_id,
             "status": self.status,
             "meta": self.meta,
-            "created_at": self.created_at.isoformat() if self.created_at else datetime.now().isoformat()
+            "created_at": created_at.isoformat() if created_at else datetime.now().isoformat()
         }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Payment':
-        created_at = data.get('created_at')
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-
         return cls(
             user_id=int(data['user_id']),
             currency=data.get('currency', ''),
@@ -244,5 +371,22 @@ class Payment:
             tx_id=data.get('tx_id'),
             status=data.get('status', 'pending'),
             meta=data.get('meta', {}),
-            created_at=created_at
+            created_at=_parse_timestamp(data.get('created_at'))
         )
+
+    @classmethod
+    def from_row(cls, row: Any) -> 'Payment':
+        """Быстрое создание Payment из строки БД без валидации"""
+        payment = cls.__new__(cls)
+        payment.user_id = row['user_id']
+        payment.currency = row['currency']
+        payment.amount = float(row['amount'])
+        payment.tx_id = row['tx_id']
+        payment.status = row['status']
+        payment.meta = row['meta'] or {}
+        payment._created_at = row['created_at']
+        return payment
+
+    def __repr__(self) -> str:
+        return (f"Payment(user_id={self.user_id}, currency='{self.currency}', "
+                f"amount={self.amount}, tx_id='{self.tx_id}', status='{self.status}')")
@@ -0,0 +1,55 @@
+"""
+Pagination
+Курсоры для keyset-пагинации истории
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+# Курсор: позиция строки в порядке (created_at, id)
+Cursor = Tuple[datetime, int]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Упаковать позицию строки в короткую строку для callback_data
+
+    Args:
+        created_at: Время создания строки
+        row_id: ID строки
+
+    Returns:
+        Строка вида "<микросекунды с эпохи>.<id>"
+    """
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return f"{(created_at - _EPOCH) // _MICROSECOND}.{row_id}"
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    """
+    Распаковать курсор из строки
+
+    Args:
+        token: Строка, полученная из encode_cursor
+
+    Returns:
+        Tuple (created_at, id) или None, если курсор пустой или поврежден
+    """
+    if not token:
+        return None
+    try:
+        micros, row_id = token.split(".", 1)
+        return _EPOCH + int(micros) * _MICROSECOND, int(row_id)
+    except ValueError:
+        return None
+
+
+def format_timestamp(value: datetime) -> str:
+    """Время в UTC в формате ISO 8601 с суффиксом Z (для фильтров запросов)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
@@ -0,0 +1,129 @@
+"""
+Response Templates
+Реестр шаблонов откликов с постоянными ID
+
+Отклик, совпадающий с шаблоном, хранится в БД как template_id без
+текста (параметр шаблона - название задания - уже есть в task_title),
+и текст собирается при отображении. ID записаны в БД, поэтому шаблоны
+нельзя удалять, а ID - переиспользовать: измененный текст получает
+новый ID, старый остается в реестре для уже сохраненных откликов.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# ID шаблона -> (категория, текст); категория None - шаблон не выбирается
+# по категории (запасной отклик)
+TEMPLATES: Dict[int, Tuple[Optional[str], str]] = {
+    1: (
+        "Копирайтинг",
+        "Здравствуйте! Готов выполнить задание '{title}'. "
+        "Имею опыт в копирайтинге, портфолио вышлю в личку. "
+        "Срок выполнения: 1-2 дня. Жду вашего ответа!"
+    ),
+    2: (
+        "Копирайтинг",
+        "Добрый день! Заинтересовало ваше задание. "
+        "Напишу качественный текст с учетом целевой аудитории. "
+        "Готов приступить сразу после согласования деталей."
+    ),
+    3: (
+        "Креатив",
+        "Привет! Задание '{title}' выглядит интересно. "
+        "Предложу несколько вариантов слоганов на выбор. "
+        "Опыт работы с брендингом есть, примеры покажу."
+    ),
+    4: (
+        "Креатив",
+        "Здравствуйте! Креативные задачи — моя специализация. "
+        "Разработаю несколько концепций под ваш бренд. Обсудим?"
+    ),
+    5: (
+        "Переводы",
+        "Добрый день! Выполню перевод качественно и в срок. "
+        "Опыт технических переводов 3+ года. "
+        "Гарантирую точность и соблюдение терминологии."
+    ),
+    6: (
+        "Переводы",
+        "Здравствуйте! Готов взяться за перевод. "
+        "Носитель русского языка, отличное знание английского. "
+        "Срок: 1 день."
+    ),
+    7: (
+        "SMM",
+        "Привет! Задание '{title}' мне подходит. "
+        "Создам вовлекающий пост с учетом специфики LinkedIn. "
+        "Есть опыт ведения бизнес-аккаунтов."
+    ),
+    8: (
+        "SMM",
+        "Здравствуйте! Напишу пост, который зайдет вашей аудитории. "
+        "Учту тренды и особенности платформы. Обсудим детали?"
+    ),
+    9: (
+        None,
+        "Здравствуйте! Готов выполнить задание '{title}'. Обсудим детали?"
+    ),
+}
+
+# Запасной отклик при ошибке генерации
+FALLBACK_TEMPLATE_ID = 9
+
+# Категория -> тексты шаблонов (в порядке ID)
+CATEGORY_TEMPLATES: Dict[str, List[str]] = {}
+for _category, _text in TEMPLATES.values():
+    if _category is not None:
+        CATEGORY_TEMPLATES.setdefault(_category, []).append(_text)
+
+# Индексы для match_template: шаблоны без параметра ищутся по тексту,
+# остальные - по частям до и после {title}
+_STATIC: Dict[str, int] = {}
+_PARAMETRIZED: List[Tuple[int, str, str]] = []
+for _template_id, (_, _text) in TEMPLATES.items():
+    if "{title}" in _text:
+        _prefix, _suffix = _text.split("{title}", 1)
+        _PARAMETRIZED.append((_template_id, _prefix, _suffix))
+    else:
+        _STATIC[_text] = _template_id
+
+
+def render_template(template_id: int, title: str) -> str:
+    """
+    Собрать текст отклика по шаблону
+
+    Args:
+        template_id: ID шаблона из TEMPLATES
+        title: Название задания
+
+    Returns:
+        Текст отклика
+
+    Raises:
+        KeyError: Если шаблона с таким ID нет
+    """
+    return TEMPLATES[template_id][1].format(title=title)
+
+
+def match_template(text: str, title: str) -> Optional[int]:
+    """
+    Найти шаблон, по которому собран текст отклика
+
+    Args:
+        text: Текст отклика
+        title: Название задания, подставленное в шаблон
+
+    Returns:
+        ID шаблона или None для текста не по шаблону
+    """
+    template_id = _STATIC.get(text)
+    if template_id is not None:
+        return template_id
+    for template_id, prefix, suffix in _PARAMETRIZED:
+        if (
+            len(text) == len(prefix) + len(title) + len(suffix)
+            and text.startswith(prefix)
+            and text.endswith(suffix)
+            and text[len(prefix):len(prefix) + len(title)] == title
+        ):
+            return template_id
+    return None
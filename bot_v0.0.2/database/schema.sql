@@ -62,7 +62,8 @@ CREATE TABLE IF NOT EXISTS responses (
     -- Task data
     task_id INTEGER NOT NULL CHECK (task_id > 0),
     task_title TEXT NOT NULL,
-    response_text TEXT NOT NULL,
+    response_text TEXT,
+    template_id SMALLINT,
     
     -- Earnings
     earned NUMERIC(10, 2) NOT NULL CHECK (earned >= 0),
@@ -71,7 +72,10 @@ CREATE TABLE IF NOT EXISTS responses (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     
     -- Foreign key constraint
-    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    
+    -- Отклик по шаблону хранится как template_id без текста
+    CONSTRAINT responses_text_or_template CHECK (response_text IS NOT NULL OR template_id IS NOT NULL)
 );
 
 -- Комментарии к таблице responses
@@ -80,7 +84,8 @@ COMMENT ON COLUMN responses.id IS 'Внутренний ID отклика (ав
 COMMENT ON COLUMN responses.user_id IS 'Telegram user ID (foreign key)';
 COMMENT ON COLUMN responses.task_id IS 'ID задания';
 COMMENT ON COLUMN responses.task_title IS 'Название задания';
-COMMENT ON COLUMN responses.response_text IS 'Текст отклика';
+COMMENT ON COLUMN responses.response_text IS 'Текст отклика (NULL для отклика по шаблону)';
+COMMENT ON COLUMN responses.template_id IS 'ID шаблона отклика (NULL для текста не по шаблону)';
 COMMENT ON COLUMN responses.earned IS 'Заработано рублей за отклик';
 COMMENT ON COLUMN responses.created_at IS 'Дата создания отклика';
 
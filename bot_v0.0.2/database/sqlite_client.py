@@ -0,0 +1,1683 @@
+"""
+SQLite Client
+Встроенное хранилище на SQLite для одиночного развертывания
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Sequence, Set, Tuple, Callable
+from .models import User, TaskResponse
+from .response_templates import match_template
+from .pagination import Cursor, format_timestamp
+from .storage import (
+    RESPONSE_LIST_COLUMNS,
+    TASK_COLUMNS,
+    SUBSCRIPTION_COLUMNS,
+    BROADCAST_COLUMNS,
+    AUTO_EARN_COLUMNS,
+    PAYMENT_LIST_COLUMNS
+)
+from .exceptions import (
+    DatabaseError,
+    RecordNotFoundError,
+    InsufficientFundsError,
+    DuplicateResponseError
+)
+
+logger = logging.getLogger(__name__)
+
+# Схема повторяет database/schema.sql и migrations/ (001 - платежи, 006 - задания,
+# 007 - подписки, 008 - очередь доставки, 009 - автозаработок, 012 - ID заданий
+# с бирж; списки подписки хранятся JSON-массивами).
+# Время хранится строкой ISO 8601 в UTC фиксированной ширины (format_timestamp),
+# поэтому сортировка и сравнение строк совпадают с хронологическим порядком.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL UNIQUE,
+    username TEXT NOT NULL,
+    balance REAL NOT NULL DEFAULT 0 CHECK (balance >= 0),
+    completed_tasks INTEGER NOT NULL DEFAULT 0 CHECK (completed_tasks >= 0),
+    role TEXT NOT NULL DEFAULT 'free' CHECK (role IN ('free', 'pro')),
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    task_id INTEGER NOT NULL CHECK (task_id > 0),
+    task_title TEXT NOT NULL,
+    response_text TEXT,
+    template_id INTEGER,
+    earned REAL NOT NULL CHECK (earned >= 0),
+    created_at TEXT NOT NULL,
+    CHECK (response_text IS NOT NULL OR template_id IS NOT NULL)
+);
+
+-- Один отклик пользователя на задание
+CREATE UNIQUE INDEX IF NOT EXISTS idx_responses_user_task ON responses(user_id, task_id);
+
+-- История откликов пользователя в порядке keyset-пагинации
+CREATE INDEX IF NOT EXISTS idx_responses_user_created ON responses(user_id, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    currency TEXT NOT NULL,
+    amount REAL NOT NULL,
+    tx_id TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'paid', 'failed', 'expired')),
+    meta TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+-- Платежи пользователя по статусу (новые первыми)
+CREATE INDEX IF NOT EXISTS idx_payments_user_status ON payments(user_id, status, created_at DESC, id DESC);
+
+-- Неоплаченные счета для сверки (keyset по id)
+CREATE INDEX IF NOT EXISTS idx_payments_pending ON payments(id) WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    budget INTEGER NOT NULL DEFAULT 0 CHECK (budget >= 0),
+    category TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT NOT NULL
+);
+
+-- Закрепленные ID заданий с бирж (см. migrations/012_external_task_ids.sql)
+CREATE TABLE IF NOT EXISTS external_tasks (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (source, source_id)
+);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    categories TEXT NOT NULL DEFAULT '[]',
+    keywords TEXT NOT NULL DEFAULT '[]',
+    min_budget REAL NOT NULL DEFAULT 0 CHECK (min_budget >= 0),
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_subscriptions_user_id ON subscriptions(user_id, id);
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    task_id INTEGER,
+    text TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'done', 'cancelled')),
+    last_user_id INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_by INTEGER,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_broadcasts_status ON broadcasts(status, id);
+
+CREATE TABLE IF NOT EXISTS auto_earn_settings (
+    user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    enabled INTEGER NOT NULL DEFAULT 0,
+    daily_limit INTEGER NOT NULL DEFAULT 5 CHECK (daily_limit > 0),
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_auto_earn_enabled ON auto_earn_settings(user_id) WHERE enabled;
+"""
+
+USER_COLUMNS = frozenset({'id', 'user_id', 'username', 'balance', 'completed_tasks', 'role', 'created_at'})
+RESPONSE_COLUMNS = frozenset({
+    'id', 'user_id', 'task_id', 'task_title', 'response_text', 'template_id', 'earned', 'created_at'
+})
+BROADCAST_UPDATE_COLUMNS = frozenset({'status', 'last_user_id', 'sent', 'failed'})
+AUTO_EARN_UPDATE_COLUMNS = frozenset({'enabled', 'daily_limit'})
+PAYMENT_COLUMNS = frozenset({'id', 'user_id', 'currency', 'amount', 'tx_id', 'status', 'meta', 'created_at', 'updated_at'})
+
+# Максимум параметров в одном IN (...)
+IN_CHUNK_SIZE = 500
+
+# Запросы держим константами: sqlite3 кеширует подготовленные выражения
+# по тексту SQL, поэтому каждый из них компилируется один раз на соединение.
+SQL_GET_USER = "SELECT * FROM users WHERE user_id = ?"
+SQL_INSERT_USER = (
+    "INSERT INTO users (user_id, username, balance, completed_tasks, role, created_at) "
+    "VALUES (:user_id, :username, :balance, :completed_tasks, :role, :created_at)"
+)
+SQL_UPSERT_USER = SQL_INSERT_USER + " ON CONFLICT (user_id) DO NOTHING"
+SQL_INCREMENT_USER = (
+    "UPDATE users SET balance = ROUND(balance + ?, 2), completed_tasks = completed_tasks + ? "
+    "WHERE user_id = ? AND balance + ? >= 0"
+)
+SQL_USER_EXISTS = "SELECT 1 FROM users WHERE user_id = ?"
+SQL_GET_USER_IDS = "SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?"
+
+SQL_GET_RESPONSES = "SELECT * FROM responses WHERE user_id = ? ORDER BY created_at DESC, id DESC"
+SQL_GET_RESPONSE = "SELECT * FROM responses WHERE id = ?"
+SQL_INSERT_RESPONSE = (
+    "INSERT INTO responses (user_id, task_id, task_title, response_text, template_id, earned, created_at) "
+    "VALUES (:user_id, :task_id, :task_title, :response_text, :template_id, :earned, :created_at)"
+)
+SQL_UPSERT_RESPONSE = SQL_INSERT_RESPONSE + " ON CONFLICT (user_id, task_id) DO NOTHING"
+SQL_RESPONSE_EXISTS = "SELECT 1 FROM responses WHERE user_id = ? AND task_id = ? LIMIT 1"
+SQL_RESPONDED_TASK_IDS = "SELECT task_id FROM responses WHERE user_id = ?"
+SQL_RESPONSE_TOTALS = (
+    "SELECT COUNT(*), COALESCE(SUM(earned), 0), COALESCE(AVG(earned), 0), MAX(created_at) "
+    "FROM responses WHERE user_id = ?"
+)
+SQL_RESPONSE_TASK_COUNTS = "SELECT task_id, COUNT(*) FROM responses WHERE user_id = ? GROUP BY task_id"
+SQL_INSERT_RESPONSE_RETURNING = SQL_UPSERT_RESPONSE + f" RETURNING {RESPONSE_LIST_COLUMNS}"
+
+SQL_GET_TASKS = f"SELECT {TASK_COLUMNS} FROM tasks WHERE active = 1 ORDER BY id"
+SQL_TASKS_VERSION = "SELECT COUNT(*) || ':' || COALESCE(MAX(updated_at), '') FROM tasks"
+SQL_UPSERT_TASK = (
+    "INSERT INTO tasks (id, title, description, budget, category, active, updated_at) "
+    "VALUES (:id, :title, :description, :budget, :category, :active, :updated_at) "
+    "ON CONFLICT (id) DO UPDATE SET "
+    "title = excluded.title, description = excluded.description, budget = excluded.budget, "
+    "category = excluded.category, active = excluded.active, updated_at = excluded.updated_at "
+    # Неизмененные задания не трогаем, чтобы не менять версию каталога
+    "WHERE (tasks.title, tasks.description, tasks.budget, tasks.category, tasks.active) "
+    "IS NOT (excluded.title, excluded.description, excluded.budget, excluded.category, excluded.active)"
+)
+
+SQL_GET_EXTERNAL_TASK_ID = "SELECT id FROM external_tasks WHERE source = ? AND source_id = ?"
+SQL_INSERT_EXTERNAL_TASK = (
+    "INSERT INTO external_tasks (id, source, source_id, created_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT DO NOTHING"
+)
+
+SQL_GET_SUBSCRIPTIONS = f"SELECT {SUBSCRIPTION_COLUMNS} FROM subscriptions WHERE id > ? ORDER BY id LIMIT ?"
+SQL_GET_USER_SUBSCRIPTIONS = f"SELECT {SUBSCRIPTION_COLUMNS} FROM subscriptions WHERE user_id = ? ORDER BY id"
+SQL_INSERT_SUBSCRIPTION = (
+    "INSERT INTO subscriptions (user_id, categories, keywords, min_budget, created_at) "
+    "VALUES (:user_id, :categories, :keywords, :min_budget, :created_at) "
+    f"RETURNING {SUBSCRIPTION_COLUMNS}"
+)
+SQL_DELETE_SUBSCRIPTION = "DELETE FROM subscriptions WHERE user_id = ? AND id = ? RETURNING id"
+SQL_DELETE_USER_SUBSCRIPTIONS = "DELETE FROM subscriptions WHERE user_id = ? RETURNING id"
+
+SQL_INSERT_NOTIFICATION = (
+    "INSERT INTO notification_outbox (user_id, task_id, text, created_at) "
+    "VALUES (:user_id, :task_id, :text, :created_at)"
+)
+SQL_GET_NOTIFICATIONS = "SELECT * FROM notification_outbox WHERE id > ? ORDER BY id LIMIT ?"
+SQL_INSERT_BROADCAST = (
+    "INSERT INTO broadcasts (text, status, created_by, created_at, updated_at) "
+    "VALUES (:text, 'running', :created_by, :created_at, :created_at) "
+    f"RETURNING {BROADCAST_COLUMNS}"
+)
+SQL_GET_RUNNING_BROADCASTS = f"SELECT {BROADCAST_COLUMNS} FROM broadcasts WHERE status = 'running' ORDER BY id"
+
+SQL_GET_AUTO_EARN = f"SELECT {AUTO_EARN_COLUMNS} FROM auto_earn_settings WHERE user_id = ?"
+SQL_GET_AUTO_EARN_USERS = (
+    f"SELECT {AUTO_EARN_COLUMNS} FROM auto_earn_settings "
+    "WHERE enabled AND user_id > ? ORDER BY user_id LIMIT ?"
+)
+
+# Базы, созданные до хранения откликов по шаблонам (см. 010_response_templates.sql):
+# SQLite не умеет снимать NOT NULL, поэтому таблица пересоздается
+SQL_UPGRADE_RESPONSES = """
+CREATE TABLE responses_new (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    task_id INTEGER NOT NULL CHECK (task_id > 0),
+    task_title TEXT NOT NULL,
+    response_text TEXT,
+    template_id INTEGER,
+    earned REAL NOT NULL CHECK (earned >= 0),
+    created_at TEXT NOT NULL,
+    CHECK (response_text IS NOT NULL OR template_id IS NOT NULL)
+);
+INSERT INTO responses_new (id, user_id, task_id, task_title, response_text, earned, created_at)
+    SELECT id, user_id, task_id, task_title, response_text, earned, created_at FROM responses;
+DROP TABLE responses;
+ALTER TABLE responses_new RENAME TO responses;
+CREATE UNIQUE INDEX idx_responses_user_task ON responses(user_id, task_id);
+CREATE INDEX idx_responses_user_created ON responses(user_id, created_at DESC, id DESC);
+"""
+SQL_COMPACT_RESPONSES = "UPDATE responses SET response_text = NULL, template_id = ? WHERE id = ?"
+
+SQL_GET_PAYMENT = "SELECT * FROM payments WHERE tx_id = ?"
+SQL_SETTLE_PAYMENT = (
+    "UPDATE payments SET status = ?, updated_at = ? WHERE tx_id = ? AND status = 'pending' RETURNING *"
+)
+SQL_INSERT_PAYMENT = (
+    "INSERT INTO payments (user_id, currency, amount, tx_id, status, meta, created_at, updated_at) "
+    "VALUES (:user_id, :currency, :amount, :tx_id, :status, :meta, :created_at, :updated_at)"
+)
+
+
+class SQLiteClient:
+    """
+    Клиент для работы со встроенной базой SQLite
+
+    Реализует тот же интерфейс, что и SupabaseClient (см. storage.Storage),
+    но хранит данные в локальном файле: чтения не ходят по сети.
+    Все обращения к соединению выполняются в одном выделенном потоке,
+    поэтому event loop не блокируется, а транзакции не пересекаются.
+    """
+
+    def __init__(self, path: str = "bot.db", timeout: float = 10.0):
+        """
+        Инициализация клиента SQLite
+
+        Args:
+            path: Путь к файлу базы данных (':memory:' - база в памяти)
+            timeout: Время ожидания блокировки базы в секундах
+        """
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        self._conn.row_factory = sqlite3.Row
+
+        # WAL: читатели не блокируют писателя, fsync только на checkpoint
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA temp_store = MEMORY")
+        self._conn.executescript(SCHEMA)
+        self._upgrade_responses()
+        logger.info(f"SQLite клиент успешно инициализирован ({path})")
+
+    def _upgrade_responses(self):
+        """Перевести таблицу responses старой схемы на хранение откликов по шаблонам"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if 'template_id' in columns:
+            return
+
+        conn = self._conn
+        try:
+            conn.executescript("BEGIN IMMEDIATE;" + SQL_UPGRADE_RESPONSES)
+            # Отклики, совпадающие с шаблоном, заменяем ссылкой на шаблон
+            compacted = []
+            for row in conn.execute("SELECT id, task_title, response_text FROM responses"):
+                template_id = match_template(row['response_text'], row['task_title'])
+                if template_id is not None:
+                    compacted.append((template_id, row['id']))
+            conn.executemany(SQL_COMPACT_RESPONSES, compacted)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        logger.info(f"Таблица responses обновлена: {len(compacted)} откликов сохранены как ссылки на шаблоны")
+
+    # ========================================================================
+    # ВЫПОЛНЕНИЕ ЗАПРОСОВ
+    # ========================================================================
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        """
+        Выполнить функцию с доступом к соединению в потоке SQLite
+
+        Args:
+            fn: Функция, принимающая соединение первым аргументом
+            *args: Остальные аргументы функции
+
+        Returns:
+            Результат функции
+
+        Raises:
+            DatabaseError: Если SQLite вернул ошибку
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(fn, self._conn, *args))
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        """Транзакция с блокировкой на запись с момента начала"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _columns(columns: str, allowed: frozenset) -> str:
+        """Проверить список колонок для SELECT"""
+        if columns == '*':
+            return columns
+        names = [name.strip() for name in columns.split(',')]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValueError(f"Неизвестные колонки: {', '.join(unknown)}")
+        return ', '.join(names)
+
+    @staticmethod
+    def _set_clause(updates: Dict[str, Any], allowed: frozenset) -> str:
+        """Собрать SET для UPDATE из проверенных имен колонок"""
+        unknown = [name for name in updates if name not in allowed]
+        if unknown:
+            raise ValueError(f"Неизвестные колонки: {', '.join(unknown)}")
+        return ', '.join(f"{name} = :{name}" for name in updates)
+
+    @staticmethod
+    def _timestamp(value: Any = None) -> str:
+        """Привести время к формату хранения (UTC, ISO 8601)"""
+        if value is None:
+            value = datetime.now(timezone.utc)
+        elif isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return format_timestamp(value)
+
+    @staticmethod
+    def _payment_row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        """Строка платежа в словарь (meta разбирается из JSON)"""
+        if row is None:
+            return None
+        data = dict(row)
+        if isinstance(data.get('meta'), str):
+            data['meta'] = json.loads(data['meta'])
+        return data
+
+    @staticmethod
+    def _subscription_row(row: sqlite3.Row) -> Dict[str, Any]:
+        """Строка подписки в словарь (списки разбираются из JSON)"""
+        data = dict(row)
+        data['categories'] = json.loads(data['categories'])
+        data['keywords'] = json.loads(data['keywords'])
+        return data
+
+    @staticmethod
+    def _auto_earn_row(row: sqlite3.Row) -> Dict[str, Any]:
+        """Строка настроек автозаработка в словарь (enabled приводится к bool)"""
+        data = dict(row)
+        data['enabled'] = bool(data['enabled'])
+        return data
+
+    async def close(self):
+        """Закрыть соединение и остановить поток SQLite"""
+        if self._conn is None:
+            return
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._conn.close)
+        self._executor.shutdown(wait=True)
+        self._conn = None
+        logger.info("SQLite клиент закрыт")
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ПОЛЬЗОВАТЕЛЯМИ
+    # ========================================================================
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        """
+        Получить пользователя по Telegram ID
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Объект User или None если не найден
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_USER, (user_id,)).fetchone()
+
+        try:
+            row = await self._run(query)
+            return User.from_row(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Ошибка получения пользователя {user_id}: {e}")
+            raise
+
+    async def get_users_by_ids(self, user_ids: List[int]) -> Dict[int, User]:
+        """
+        Получить нескольких пользователей одним запросом
+
+        Args:
+            user_ids: Список Telegram user ID
+
+        Returns:
+            Словарь user_id -> User (отсутствующие пользователи не попадают)
+        """
+        def query(conn):
+            ids = [int(uid) for uid in user_ids]
+            rows = []
+            for start in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[start:start + IN_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(conn.execute(f"SELECT * FROM users WHERE user_id IN ({placeholders})", chunk))
+            return rows
+
+        try:
+            rows = await self._run(query)
+            return {row['user_id']: User.from_row(row) for row in rows}
+
+        except Exception as e:
+            logger.error(f"Ошибка получения пользователей {user_ids}: {e}")
+            raise
+
+    async def create_user(self, user: User) -> User:
+        """
+        Создать нового пользователя
+
+        Args:
+            user: Объект User для создания
+
+        Returns:
+            Созданный объект User
+        """
+        def query(conn):
+            data = user.to_dict()
+            data['created_at'] = self._timestamp(data['created_at'])
+            conn.execute(SQL_INSERT_USER, data)
+            return conn.execute(SQL_GET_USER, (user.user_id,)).fetchone()
+
+        try:
+            row = await self._run(query)
+            logger.info(f"Пользователь {user.user_id} успешно создан")
+            return User.from_row(row)
+
+        except Exception as e:
+            logger.error(f"Ошибка создания пользователя {user.user_id}: {e}")
+            raise
+
+    async def update_user(self, user_id: int, updates: Dict[str, Any]) -> User:
+        """
+        Обновить данные пользователя
+
+        Args:
+            user_id: Telegram user ID
+            updates: Словарь с полями для обновления
+
+        Returns:
+            Обновленный объект User
+        """
+        def query(conn):
+            params = dict(updates)
+            if 'created_at' in params:
+                params['created_at'] = self._timestamp(params['created_at'])
+            set_clause = self._set_clause(params, USER_COLUMNS - {'id', 'user_id'})
+            params['_user_id'] = user_id
+            conn.execute(f"UPDATE users SET {set_clause} WHERE user_id = :_user_id", params)
+            return conn.execute(SQL_GET_USER, (user_id,)).fetchone()
+
+        try:
+            row = await self._run(query)
+
+            if row:
+                logger.info(f"Пользователь {user_id} успешно обновлен")
+                return User.from_row(row)
+
+            raise Exception(f"Пользователь {user_id} не найден")
+
+        except Exception as e:
+            logger.error(f"Ошибка обновления пользователя {user_id}: {e}")
+            raise
+
+    @staticmethod
+    def _increment_user(conn: sqlite3.Connection, user_id: int, balance_delta: float, tasks_delta: int) -> sqlite3.Row:
+        """Условный UPDATE счетчиков (вызывается внутри транзакции)"""
+        cursor = conn.execute(SQL_INCREMENT_USER, (balance_delta, tasks_delta, user_id, balance_delta))
+        if cursor.rowcount == 0:
+            if conn.execute(SQL_USER_EXISTS, (user_id,)).fetchone() is None:
+                raise RecordNotFoundError(f"Пользователь {user_id} не найден")
+            raise InsufficientFundsError(
+                f"Недостаточно средств для списания {abs(balance_delta)} у пользователя {user_id}"
+            )
+        return conn.execute(SQL_GET_USER, (user_id,)).fetchone()
+
+    async def increment_user(self, user_id: int, balance_delta: float = 0.0, tasks_delta: int = 0) -> User:
+        """
+        Атомарно изменить баланс и счетчик заданий пользователя
+
+        Выполняется одним условным UPDATE в транзакции, поэтому
+        параллельные начисления не перезаписывают друг друга.
+
+        Args:
+            user_id: Telegram user ID
+            balance_delta: Изменение баланса (может быть отрицательным)
+            tasks_delta: Изменение счетчика выполненных заданий
+
+        Returns:
+            Обновленный объект User
+
+        Raises:
+            RecordNotFoundError: Если пользователь не найден
+            InsufficientFundsError: Если баланс станет отрицательным
+        """
+        def query(conn):
+            with self._transaction(conn):
+                return self._increment_user(conn, user_id, balance_delta, tasks_delta)
+
+        try:
+            row = await self._run(query)
+            return User.from_row(row)
+
+        except (RecordNotFoundError, InsufficientFundsError):
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка изменения счетчиков пользователя {user_id}: {e}")
+            raise
+
+    async def update_balance(self, user_id: int, amount: float) -> User:
+        """
+        Обновить баланс пользователя (добавить сумму)
+
+        Args:
+            user_id: Telegram user ID
+            amount: Сумма для добавления к балансу
+
+        Returns:
+            Обновленный объект User
+        """
+        return await self.increment_user(user_id, balance_delta=amount)
+
+    async def increment_completed_tasks(self, user_id: int) -> User:
+        """
+        Увеличить счетчик выполненных заданий на 1
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Обновленный объект User
+        """
+        return await self.increment_user(user_id, tasks_delta=1)
+
+    async def upsert_users(self, users: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно вставить пользователей в одной транзакции
+
+        Уже существующие пользователи (по user_id) пропускаются.
+
+        Args:
+            users: Список словарей в формате User.to_dict()
+        """
+        def query(conn):
+            rows = [dict(user, created_at=self._timestamp(user.get('created_at'))) for user in users]
+            with self._transaction(conn):
+                conn.executemany(SQL_UPSERT_USER, rows)
+
+        if not users:
+            return
+        try:
+            await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка пакетной вставки {len(users)} пользователей: {e}")
+            raise
+
+    async def get_user_ids(self, after_user_id: int = 0, limit: int = 1000) -> List[int]:
+        """
+        Получить страницу Telegram ID пользователей по возрастанию
+
+        Args:
+            after_user_id: Последний ID прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список Telegram ID
+        """
+        def query(conn):
+            return [row[0] for row in conn.execute(SQL_GET_USER_IDS, (after_user_id, limit))]
+
+        try:
+            return await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка получения ID пользователей после {after_user_id}: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ОТКЛИКАМИ
+    # ========================================================================
+
+    async def get_user_responses(self, user_id: int) -> List[TaskResponse]:
+        """
+        Получить все отклики пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Список объектов TaskResponse
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_RESPONSES, (user_id,)).fetchall()
+
+        try:
+            rows = await self._run(query)
+            return [TaskResponse.from_row(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка получения откликов пользователя {user_id}: {e}")
+            raise
+
+    async def get_user_responses_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        direction: str = 'older',
+        columns: str = RESPONSE_LIST_COLUMNS
+    ) -> List[TaskResponse]:
+        """
+        Получить страницу откликов пользователя (keyset-пагинация)
+
+        Страница читается по индексу idx_responses_user_created от курсора
+        (created_at, id), поэтому стоимость не зависит от номера страницы.
+
+        Args:
+            user_id: Telegram user ID
+            limit: Размер страницы
+            cursor: Позиция, от которой строится страница (None - с начала)
+            direction: 'older' - отклики старше курсора, 'newer' - новее курсора
+            columns: Список колонок для выборки
+
+        Returns:
+            Список TaskResponse (новые первыми)
+        """
+        newer = direction == 'newer'
+        select = self._columns(columns, RESPONSE_COLUMNS)
+        order = 'ASC' if newer else 'DESC'
+        sql = f"SELECT {select} FROM responses WHERE user_id = ?"
+        params: List[Any] = [user_id]
+
+        if cursor:
+            created_at, row_id = cursor
+            sql += f" AND (created_at, id) {'>' if newer else '<'} (?, ?)"
+            params.extend([format_timestamp(created_at), row_id])
+
+        sql += f" ORDER BY created_at {order}, id {order} LIMIT ?"
+        params.append(limit)
+
+        def query(conn):
+            return conn.execute(sql, params).fetchall()
+
+        try:
+            rows = await self._run(query)
+            if newer:
+                rows.reverse()
+
+            return [TaskResponse.from_row(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка получения страницы откликов пользователя {user_id}: {e}")
+            raise
+
+    async def get_responses_by_user_ids(self, user_ids: List[int]) -> Dict[int, List[TaskResponse]]:
+        """
+        Получить отклики нескольких пользователей одним запросом
+
+        Args:
+            user_ids: Список Telegram user ID
+
+        Returns:
+            Словарь user_id -> список TaskResponse (новые первыми)
+        """
+        def query(conn):
+            ids = [int(uid) for uid in user_ids]
+            rows = []
+            for start in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[start:start + IN_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT * FROM responses WHERE user_id IN ({placeholders}) "
+                    f"ORDER BY created_at DESC, id DESC",
+                    chunk
+                ))
+            return rows
+
+        try:
+            rows = await self._run(query)
+
+            result: Dict[int, List[TaskResponse]] = {uid: [] for uid in user_ids}
+            for row in rows:
+                result.setdefault(row['user_id'], []).append(TaskResponse.from_row(row))
+            return result
+
+        except Exception as e:
+            logger.error(f"Ошибка получения откликов пользователей {user_ids}: {e}")
+            raise
+
+    async def get_response_stats(self, user_id: int) -> Dict[str, Any]:
+        """
+        Получить агрегированную статистику откликов пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Словарь с total_responses, total_earned, avg_earned,
+            latest_response и task_counts (task_id -> количество)
+        """
+        def query(conn):
+            totals = conn.execute(SQL_RESPONSE_TOTALS, (user_id,)).fetchone()
+            counts = conn.execute(SQL_RESPONSE_TASK_COUNTS, (user_id,)).fetchall()
+            return totals, counts
+
+        try:
+            totals, counts = await self._run(query)
+            total, total_earned, avg_earned, latest = totals
+
+            return {
+                "total_responses": int(total),
+                "total_earned": float(total_earned),
+                "avg_earned": float(avg_earned),
+                "latest_response": datetime.fromisoformat(latest.replace('Z', '+00:00')) if latest else None,
+                "task_counts": {int(task_id): int(count) for task_id, count in counts}
+            }
+
+        except Exception as e:
+            logger.error(f"Ошибка получения статистики откликов пользователя {user_id}: {e}")
+            raise
+
+    async def create_response(self, response: TaskResponse) -> TaskResponse:
+        """
+        Создать новый отклик
+
+        Повторный отклик отклоняет уникальный индекс (user_id, task_id),
+        отдельная проверка перед вставкой не нужна.
+
+        Args:
+            response: Объект TaskResponse для создания
+
+        Returns:
+            Созданный объект TaskResponse
+
+        Raises:
+            DuplicateResponseError: Если пользователь уже откликался на задание
+        """
+        def query(conn):
+            data = response.to_dict()
+            data['created_at'] = self._timestamp(data['created_at'])
+            cursor = conn.execute(SQL_UPSERT_RESPONSE, data)
+            if cursor.rowcount == 0:
+                raise DuplicateResponseError(
+                    f"Пользователь {response.user_id} уже откликался на задание {response.task_id}"
+                )
+            return conn.execute(SQL_GET_RESPONSE, (cursor.lastrowid,)).fetchone()
+
+        try:
+            row = await self._run(query)
+            logger.info(f"Отклик пользователя {response.user_id} на задание {response.task_id} создан")
+            return TaskResponse.from_row(row)
+
+        except DuplicateResponseError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка создания отклика: {e}")
+            raise
+
+    async def record_response(self, response: TaskResponse) -> Tuple[TaskResponse, User]:
+        """
+        Записать отклик и начислить награду в одной транзакции
+
+        Вставка отклика, начисление earned на баланс и увеличение
+        счетчика заданий выполняются атомарно, как RPC record_response
+        в Supabase.
+
+        Args:
+            response: Объект TaskResponse для создания
+
+        Returns:
+            Tuple (созданный TaskResponse, обновленный User)
+
+        Raises:
+            DuplicateResponseError: Если пользователь уже откликался на задание
+            RecordNotFoundError: Если пользователь не найден
+        """
+        def query(conn):
+            data = response.to_dict()
+            data['created_at'] = self._timestamp(data['created_at'])
+            with self._transaction(conn):
+                if conn.execute(SQL_USER_EXISTS, (response.user_id,)).fetchone() is None:
+                    raise RecordNotFoundError(f"Пользователь {response.user_id} не найден")
+                cursor = conn.execute(SQL_UPSERT_RESPONSE, data)
+                if cursor.rowcount == 0:
+                    raise DuplicateResponseError(
+                        f"Пользователь {response.user_id} уже откликался на задание {response.task_id}"
+                    )
+                row = conn.execute(SQL_GET_RESPONSE, (cursor.lastrowid,)).fetchone()
+                user_row = self._increment_user(conn, response.user_id, float(response.earned), 1)
+            return row, user_row
+
+        try:
+            row, user_row = await self._run(query)
+            logger.info(f"Отклик пользователя {response.user_id} на задание {response.task_id} записан")
+            return TaskResponse.from_row(row), User.from_row(user_row)
+
+        except (DuplicateResponseError, RecordNotFoundError):
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка записи отклика: {e}")
+            raise
+
+    async def upsert_responses(self, responses: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно вставить отклики в одной транзакции
+
+        Уже существующие отклики (по user_id, task_id) пропускаются.
+
+        Args:
+            responses: Список словарей в формате TaskResponse.to_dict()
+        """
+        def query(conn):
+            rows = [dict(item, created_at=self._timestamp(item.get('created_at'))) for item in responses]
+            with self._transaction(conn):
+                conn.executemany(SQL_UPSERT_RESPONSE, rows)
+
+        if not responses:
+            return
+        try:
+            await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка пакетной вставки {len(responses)} откликов: {e}")
+            raise
+
+    async def record_responses(self, responses: List[TaskResponse]) -> List[TaskResponse]:
+        """
+        Пакетно записать отклики и начислить награды в одной транзакции
+
+        Пакетная версия record_response: дубликаты пропускаются, награды
+        и счетчики заданий начисляются одним UPDATE на пользователя.
+
+        Args:
+            responses: Отклики для записи
+
+        Returns:
+            Вставленные отклики (без пропущенных дубликатов)
+        """
+        def query(conn):
+            now = self._timestamp()
+            rows = []
+            totals: Dict[int, List[float]] = {}
+            with self._transaction(conn):
+                for response in responses:
+                    data = response.to_dict()
+                    data['created_at'] = now
+                    inserted = conn.execute(SQL_INSERT_RESPONSE_RETURNING, data).fetchall()
+                    if not inserted:
+                        continue
+                    rows.append(inserted[0])
+                    total = totals.setdefault(response.user_id, [0.0, 0])
+                    total[0] += float(response.earned)
+                    total[1] += 1
+                conn.executemany(SQL_INCREMENT_USER, [
+                    (earned, count, user_id, earned) for user_id, (earned, count) in totals.items()
+                ])
+            return rows
+
+        if not responses:
+            return []
+        try:
+            rows = await self._run(query)
+            logger.info(f"Пакетно записано откликов: {len(rows)} из {len(responses)}")
+            return [TaskResponse.from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи {len(responses)} откликов: {e}")
+            raise
+
+    async def get_response_summary(
+        self,
+        user_ids: List[int],
+        since: datetime
+    ) -> Dict[int, Tuple[Set[int], int]]:
+        """
+        Получить откликнутые задания и число недавних откликов пачки пользователей
+
+        Args:
+            user_ids: Список Telegram user ID
+            since: Начало периода для подсчета откликов
+
+        Returns:
+            Словарь user_id -> (ID заданий с откликом, число откликов с since)
+        """
+        def query(conn):
+            ids = [int(uid) for uid in user_ids]
+            rows = []
+            for start in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[start:start + IN_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT user_id, task_id, created_at >= ? FROM responses WHERE user_id IN ({placeholders})",
+                    [self._timestamp(since), *chunk]
+                ))
+            return rows
+
+        try:
+            rows = await self._run(query)
+
+            task_ids: Dict[int, Set[int]] = {uid: set() for uid in user_ids}
+            recent: Dict[int, int] = dict.fromkeys(user_ids, 0)
+            for user_id, task_id, is_recent in rows:
+                task_ids[user_id].add(task_id)
+                recent[user_id] += is_recent
+            return {uid: (task_ids[uid], recent[uid]) for uid in user_ids}
+
+        except Exception as e:
+            logger.error(f"Ошибка получения сводки откликов {len(user_ids)} пользователей: {e}")
+            raise
+
+    async def check_response_exists(self, user_id: int, task_id: int) -> bool:
+        """
+        Проверить существование отклика пользователя на задание
+
+        Args:
+            user_id: Telegram user ID
+            task_id: ID задания
+
+        Returns:
+            True если отклик существует, False иначе
+        """
+        def query(conn):
+            return conn.execute(SQL_RESPONSE_EXISTS, (user_id, task_id)).fetchone()
+
+        try:
+            return await self._run(query) is not None
+
+        except Exception as e:
+            logger.error(f"Ошибка проверки существования отклика: {e}")
+            raise
+
+    async def get_responded_task_ids(self, user_id: int) -> Set[int]:
+        """
+        Получить ID всех заданий, на которые откликался пользователь
+
+        Запрос читается только из индекса idx_responses_user_task.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Множество ID заданий
+        """
+        def query(conn):
+            return {row[0] for row in conn.execute(SQL_RESPONDED_TASK_IDS, (user_id,))}
+
+        try:
+            return await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка получения заданий с откликом пользователя {user_id}: {e}")
+            raise
+
+    async def get_response_by_id(self, response_id: int) -> Optional[TaskResponse]:
+        """
+        Получить отклик по ID
+
+        Args:
+            response_id: ID отклика
+
+        Returns:
+            Объект TaskResponse или None если не найден
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_RESPONSE, (response_id,)).fetchone()
+
+        try:
+            row = await self._run(query)
+            return TaskResponse.from_row(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Ошибка получения отклика {response_id}: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ЗАДАНИЯМИ
+    # ========================================================================
+
+    async def get_tasks(self) -> List[Dict[str, Any]]:
+        """
+        Получить активные задания каталога
+
+        Returns:
+            Список словарей заданий (id, title, description, budget, category)
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_TASKS).fetchall()
+
+        try:
+            return [dict(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения заданий: {e}")
+            raise
+
+    async def get_tasks_version(self) -> Optional[str]:
+        """
+        Получить метку версии таблицы заданий
+
+        Метка (количество строк и время последнего изменения) меняется
+        при любой вставке, изменении или удалении задания.
+
+        Returns:
+            Строка версии
+        """
+        def query(conn):
+            return conn.execute(SQL_TASKS_VERSION).fetchone()[0]
+
+        try:
+            return await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка получения версии заданий: {e}")
+            raise
+
+    async def upsert_tasks(self, tasks: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно вставить или обновить задания по id в одной транзакции
+
+        Args:
+            tasks: Список словарей заданий
+        """
+        def query(conn):
+            now = self._timestamp()
+            rows = [
+                {
+                    'id': task['id'],
+                    'title': task['title'],
+                    'description': task.get('description', ''),
+                    'budget': task.get('budget', 0),
+                    'category': task['category'],
+                    'active': 1 if task.get('active', True) else 0,
+                    'updated_at': now
+                }
+                for task in tasks
+            ]
+            with self._transaction(conn):
+                conn.executemany(SQL_UPSERT_TASK, rows)
+
+        if not tasks:
+            return
+        try:
+            await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи {len(tasks)} заданий: {e}")
+            raise
+
+    async def claim_external_task_ids(
+        self,
+        claims: Sequence[Tuple[str, str, int]]
+    ) -> Dict[Tuple[str, str], Tuple[int, bool]]:
+        """
+        Закрепить ID за заданиями бирж в одной транзакции
+
+        Задание, у которого ID уже закреплен, получает его; остальные
+        занимают предложенный ID, если он свободен.
+
+        Args:
+            claims: Список (биржа, ID на бирже, предложенный ID)
+
+        Returns:
+            (биржа, ID на бирже) -> (ID, True если закреплен этим вызовом);
+            задания, чей предложенный ID занят другим, отсутствуют
+        """
+        def query(conn):
+            now = self._timestamp()
+            claimed = {}
+            with self._transaction(conn):
+                for source, source_id, task_id in claims:
+                    row = conn.execute(SQL_GET_EXTERNAL_TASK_ID, (source, source_id)).fetchone()
+                    if row is not None:
+                        claimed[(source, source_id)] = (row[0], False)
+                    elif conn.execute(SQL_INSERT_EXTERNAL_TASK, (task_id, source, source_id, now)).rowcount:
+                        claimed[(source, source_id)] = (task_id, True)
+            return claimed
+
+        if not claims:
+            return {}
+        try:
+            return await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка закрепления ID {len(claims)} заданий с бирж: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ПОДПИСКАМИ
+    # ========================================================================
+
+    async def get_subscriptions(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Получить страницу всех подписок по возрастанию id
+
+        Args:
+            after_id: ID последней подписки прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список словарей подписок
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_SUBSCRIPTIONS, (after_id, limit)).fetchall()
+
+        try:
+            return [self._subscription_row(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения подписок после {after_id}: {e}")
+            raise
+
+    async def get_user_subscriptions(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Получить подписки пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Список словарей подписок (старые первыми)
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_USER_SUBSCRIPTIONS, (user_id,)).fetchall()
+
+        try:
+            return [self._subscription_row(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения подписок пользователя {user_id}: {e}")
+            raise
+
+    async def create_subscription(self, subscription: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать подписку
+
+        Args:
+            subscription: Словарь с user_id, categories, keywords, min_budget
+
+        Returns:
+            Созданная подписка
+        """
+        def query(conn):
+            return conn.execute(SQL_INSERT_SUBSCRIPTION, {
+                'user_id': subscription['user_id'],
+                'categories': json.dumps(subscription.get('categories') or [], ensure_ascii=False),
+                'keywords': json.dumps(subscription.get('keywords') or [], ensure_ascii=False),
+                'min_budget': subscription.get('min_budget') or 0,
+                'created_at': self._timestamp()
+            }).fetchall()[0]
+
+        try:
+            return self._subscription_row(await self._run(query))
+        except Exception as e:
+            logger.error(f"Ошибка создания подписки пользователя {subscription.get('user_id')}: {e}")
+            raise
+
+    async def delete_subscriptions(self, user_id: int, subscription_id: Optional[int] = None) -> List[int]:
+        """
+        Удалить подписку пользователя или все его подписки
+
+        Args:
+            user_id: Telegram user ID
+            subscription_id: ID подписки (None - все подписки пользователя)
+
+        Returns:
+            ID удаленных подписок
+        """
+        def query(conn):
+            if subscription_id is None:
+                rows = conn.execute(SQL_DELETE_USER_SUBSCRIPTIONS, (user_id,)).fetchall()
+            else:
+                rows = conn.execute(SQL_DELETE_SUBSCRIPTION, (user_id, subscription_id)).fetchall()
+            return [row[0] for row in rows]
+
+        try:
+            return await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка удаления подписок пользователя {user_id}: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ОЧЕРЕДЬЮ ДОСТАВКИ
+    # ========================================================================
+
+    async def enqueue_notifications(self, notifications: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно добавить уведомления в очередь в одной транзакции
+
+        Args:
+            notifications: Список словарей с user_id, task_id, text
+        """
+        def query(conn):
+            now = self._timestamp()
+            rows = [
+                {'user_id': n['user_id'], 'task_id': n.get('task_id'), 'text': n['text'], 'created_at': now}
+                for n in notifications
+            ]
+            with self._transaction(conn):
+                conn.executemany(SQL_INSERT_NOTIFICATION, rows)
+
+        if not notifications:
+            return
+        try:
+            await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка записи {len(notifications)} уведомлений в очередь: {e}")
+            raise
+
+    async def get_notifications(self, after_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Получить страницу уведомлений очереди по возрастанию id
+
+        Args:
+            after_id: ID последнего уведомления прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список словарей уведомлений
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_NOTIFICATIONS, (after_id, limit)).fetchall()
+
+        try:
+            return [dict(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка чтения очереди уведомлений: {e}")
+            raise
+
+    async def delete_notifications(self, notification_ids: List[int]) -> None:
+        """
+        Удалить отправленные уведомления
+
+        Args:
+            notification_ids: ID уведомлений
+        """
+        def query(conn):
+            with self._transaction(conn):
+                for start in range(0, len(notification_ids), IN_CHUNK_SIZE):
+                    chunk = notification_ids[start:start + IN_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    conn.execute(f"DELETE FROM notification_outbox WHERE id IN ({placeholders})", chunk)
+
+        if not notification_ids:
+            return
+        try:
+            await self._run(query)
+        except Exception as e:
+            logger.error(f"Ошибка удаления {len(notification_ids)} уведомлений: {e}")
+            raise
+
+    async def create_broadcast(self, broadcast: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать рассылку
+
+        Args:
+            broadcast: Словарь с text и created_by
+
+        Returns:
+            Созданная рассылка
+        """
+        def query(conn):
+            return conn.execute(SQL_INSERT_BROADCAST, {
+                'text': broadcast['text'],
+                'created_by': broadcast.get('created_by'),
+                'created_at': self._timestamp()
+            }).fetchall()[0]
+
+        try:
+            return dict(await self._run(query))
+        except Exception as e:
+            logger.error(f"Ошибка создания рассылки: {e}")
+            raise
+
+    async def get_running_broadcasts(self) -> List[Dict[str, Any]]:
+        """
+        Получить незавершенные рассылки
+
+        Returns:
+            Список рассылок со статусом running (старые первыми)
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_RUNNING_BROADCASTS).fetchall()
+
+        try:
+            return [dict(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения рассылок: {e}")
+            raise
+
+    async def update_broadcast(self, broadcast_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Обновить рассылку
+
+        Args:
+            broadcast_id: ID рассылки
+            updates: Поля для обновления (status, last_user_id, sent, failed)
+
+        Returns:
+            Обновленная рассылка или None, если не найдена
+        """
+        set_clause = self._set_clause(updates, BROADCAST_UPDATE_COLUMNS)
+        sql = f"UPDATE broadcasts SET {set_clause}, updated_at = :updated_at WHERE id = :id RETURNING {BROADCAST_COLUMNS}"
+
+        def query(conn):
+            rows = conn.execute(sql, dict(updates, id=broadcast_id, updated_at=self._timestamp())).fetchall()
+            return rows[0] if rows else None
+
+        try:
+            row = await self._run(query)
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Ошибка обновления рассылки {broadcast_id}: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С АВТОЗАРАБОТКОМ
+    # ========================================================================
+
+    async def get_auto_earn_settings(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получить настройки автозаработка пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Словарь настроек или None, если пользователь их не менял
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_AUTO_EARN, (user_id,)).fetchone()
+
+        try:
+            row = await self._run(query)
+            return self._auto_earn_row(row) if row else None
+        except Exception as e:
+            logger.error(f"Ошибка получения настроек автозаработка {user_id}: {e}")
+            raise
+
+    async def save_auto_earn_settings(self, user_id: int, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать или обновить настройки автозаработка
+
+        Args:
+            user_id: Telegram user ID
+            updates: Поля для обновления (enabled, daily_limit)
+
+        Returns:
+            Сохраненные настройки
+        """
+        self._set_clause(updates, AUTO_EARN_UPDATE_COLUMNS)
+        columns = ', '.join(updates)
+        values = ', '.join(f":{name}" for name in updates)
+        assignments = ', '.join(f"{name} = excluded.{name}" for name in updates)
+        sql = (
+            f"INSERT INTO auto_earn_settings (user_id, {columns}, updated_at) "
+            f"VALUES (:user_id, {values}, :updated_at) "
+            f"ON CONFLICT (user_id) DO UPDATE SET {assignments}, updated_at = excluded.updated_at "
+            f"RETURNING {AUTO_EARN_COLUMNS}"
+        )
+
+        def query(conn):
+            return conn.execute(sql, dict(updates, user_id=user_id, updated_at=self._timestamp())).fetchall()[0]
+
+        try:
+            row = await self._run(query)
+            logger.info(f"Настройки автозаработка пользователя {user_id} обновлены: {updates}")
+            return self._auto_earn_row(row)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения настроек автозаработка {user_id}: {e}")
+            raise
+
+    async def get_auto_earn_users(self, after_user_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Получить страницу включенных настроек автозаработка по возрастанию user_id
+
+        Args:
+            after_user_id: Последний user_id прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список словарей настроек
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_AUTO_EARN_USERS, (after_user_id, limit)).fetchall()
+
+        try:
+            return [self._auto_earn_row(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения пользователей автозаработка после {after_user_id}: {e}")
+            raise
+
+    # ========================================================================
+    # УТИЛИТЫ
+    # ========================================================================
+
+    async def health_check(self) -> bool:
+        """
+        Проверка доступности базы SQLite
+
+        Returns:
+            True если база доступна, False иначе
+        """
+        def query(conn):
+            return conn.execute("SELECT 1").fetchone()
+
+        try:
+            await self._run(query)
+            logger.info("SQLite health check: OK")
+            return True
+        except Exception as e:
+            logger.error(f"SQLite health check failed: {e}")
+            return False
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ПЛАТЕЖАМИ
+    # ========================================================================
+
+    async def create_payment(self, payment: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать запись о платеже в таблице `payments`
+
+        Args:
+            payment: Словарь с полями платежа
+
+        Returns:
+            Вставленная запись
+        """
+        def query(conn):
+            now = self._timestamp()
+            data = {
+                'user_id': payment['user_id'],
+                'currency': payment['currency'],
+                'amount': float(payment['amount']),
+                'tx_id': payment.get('tx_id'),
+                'status': payment.get('status') or 'pending',
+                'meta': json.dumps(payment['meta']) if payment.get('meta') is not None else None,
+                'created_at': self._timestamp(payment['created_at']) if payment.get('created_at') else now,
+                'updated_at': now
+            }
+            cursor = conn.execute(SQL_INSERT_PAYMENT, data)
+            return conn.execute("SELECT * FROM payments WHERE id = ?", (cursor.lastrowid,)).fetchone()
+
+        try:
+            row = self._payment_row(await self._run(query))
+            logger.info(f"Платеж создан: {row}")
+            return row
+        except Exception as e:
+            logger.error(f"Ошибка создания платежа: {e}")
+            raise
+
+    async def update_payment_status(self, tx_id: str = None, invoice_id: str = None, updates: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """
+        Обновить запись платежа по tx_id или invoice_id
+        """
+        key = tx_id or invoice_id
+
+        def query(conn):
+            params = dict(updates or {})
+            if 'meta' in params and params['meta'] is not None:
+                params['meta'] = json.dumps(params['meta'])
+            params['updated_at'] = self._timestamp()
+            set_clause = self._set_clause(params, PAYMENT_COLUMNS - {'id'})
+            params['_tx_id'] = key
+            conn.execute(f"UPDATE payments SET {set_clause} WHERE tx_id = :_tx_id", params)
+            return conn.execute(SQL_GET_PAYMENT, (key,)).fetchone()
+
+        try:
+            if not key:
+                raise ValueError('tx_id или invoice_id должны быть переданы')
+
+            row = self._payment_row(await self._run(query))
+            if row:
+                logger.info(f"Платеж обновлён: {row}")
+            return row
+        except Exception as e:
+            logger.error(f"Ошибка обновления платежа: {e}")
+            raise
+
+    async def get_payment_by_tx(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Получить запись платежа по tx_id (или invoice id)
+        """
+        def query(conn):
+            return conn.execute(SQL_GET_PAYMENT, (tx_id,)).fetchone()
+
+        try:
+            return self._payment_row(await self._run(query))
+        except Exception as e:
+            logger.error(f"Ошибка получения платежа по tx {tx_id}: {e}")
+            raise
+
+    async def get_payments_by_user(
+        self,
+        user_id: int,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        columns: str = '*'
+    ) -> List[Dict[str, Any]]:
+        """
+        Получить платежи пользователя (новые первыми)
+
+        Args:
+            user_id: Telegram user ID
+            status: Фильтр по статусу (None - все)
+            limit: Максимум записей (None - все)
+            columns: Список колонок для выборки
+        """
+        sql = f"SELECT {self._columns(columns, PAYMENT_COLUMNS)} FROM payments WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        def query(conn):
+            return conn.execute(sql, params).fetchall()
+
+        try:
+            return [self._payment_row(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения платежей пользователя {user_id}: {e}")
+            raise
+
+    async def get_pending_payment(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получить последний неоплаченный платеж пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Запись платежа или None
+        """
+        payments = await self.get_payments_by_user(
+            user_id,
+            status='pending',
+            limit=1,
+            columns=PAYMENT_LIST_COLUMNS
+        )
+        return payments[0] if payments else None
+
+    async def get_pending_payments(
+        self,
+        currencies: Sequence[str],
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Получить страницу неоплаченных платежей (keyset-пагинация по id)
+
+        Args:
+            currencies: Валюты платежей (платежи других провайдеров пропускаются)
+            after_id: ID последнего платежа предыдущей страницы
+            limit: Размер страницы
+
+        Returns:
+            Платежи в порядке id
+        """
+        currencies = list(currencies)
+        if not currencies:
+            return []
+        placeholders = ", ".join("?" * len(currencies))
+        sql = (
+            f"SELECT {PAYMENT_LIST_COLUMNS} FROM payments "
+            f"WHERE status = 'pending' AND id > ? AND currency IN ({placeholders}) ORDER BY id LIMIT ?"
+        )
+
+        def query(conn):
+            return conn.execute(sql, [after_id, *currencies, limit]).fetchall()
+
+        try:
+            return [self._payment_row(row) for row in await self._run(query)]
+        except Exception as e:
+            logger.error(f"Ошибка получения неоплаченных платежей: {e}")
+            raise
+
+    async def settle_payment(
+        self,
+        tx_id: str,
+        status: str,
+        credit: float = 0.0
+    ) -> Optional[Tuple[Dict[str, Any], User]]:
+        """
+        Завершить платеж и начислить сумму на баланс в одной транзакции
+
+        Статус меняется только у платежа в pending, поэтому при
+        одновременной обработке (webhook, сверка, кнопка "Я оплатил")
+        сумма начисляется ровно один раз.
+
+        Args:
+            tx_id: ID счета
+            status: Итоговый статус (paid, expired, failed)
+            credit: Сумма к начислению в рублях
+
+        Returns:
+            Tuple (обновленный платеж, пользователь) или None, если
+            платеж не найден или уже завершен
+        """
+        def query(conn):
+            with self._transaction(conn):
+                payment = conn.execute(SQL_SETTLE_PAYMENT, (status, self._timestamp(), tx_id)).fetchone()
+                if payment is None:
+                    return None
+                return payment, self._increment_user(conn, payment['user_id'], credit, 0)
+
+        try:
+            result = await self._run(query)
+            if result is None:
+                return None
+            payment, user_row = result
+            logger.info(f"Платеж {tx_id} завершен со статусом {status}, начислено {credit}")
+            return self._payment_row(payment), User.from_row(user_row)
+        except Exception as e:
+            logger.error(f"Ошибка завершения платежа {tx_id}: {e}")
+            raise
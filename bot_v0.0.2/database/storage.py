@@ -0,0 +1,293 @@
+"""
+Storage Protocol
+Общий интерфейс хранилищ данных (Supabase, SQLite)
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Set, Tuple
+from .models import User, TaskResponse
+from .pagination import Cursor
+
+# Колонки, нужные для отображения истории откликов (текст отклика по
+# шаблону не хранится и собирается из template_id и task_title)
+RESPONSE_LIST_COLUMNS = 'id,user_id,task_id,task_title,response_text,template_id,earned,created_at'
+
+# Колонки задания, из которых строится каталог
+TASK_COLUMNS = 'id,title,description,budget,category'
+
+# Колонки рассылки
+BROADCAST_COLUMNS = 'id,text,status,last_user_id,sent,failed,created_by,created_at,updated_at'
+
+# Колонки подписки на задания
+SUBSCRIPTION_COLUMNS = 'id,user_id,categories,keywords,min_budget,created_at'
+
+# Колонки платежа, нужные для сверки счетов
+PAYMENT_LIST_COLUMNS = 'id,user_id,currency,amount,tx_id,status,created_at'
+
+# Колонки настроек автозаработка
+AUTO_EARN_COLUMNS = 'user_id,enabled,daily_limit,updated_at'
+
+
+class Storage(Protocol):
+    """
+    Интерфейс хранилища пользователей, откликов, платежей, заданий и подписок
+
+    Сервисы работают только с этим набором методов, поэтому
+    реализация выбирается в config.py (STORAGE_BACKEND) без
+    изменений в бизнес-логике.
+    """
+
+    # ========================================================================
+    # ПОЛЬЗОВАТЕЛИ
+    # ========================================================================
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        """Получить пользователя по Telegram ID"""
+        ...
+
+    async def get_users_by_ids(self, user_ids: List[int]) -> Dict[int, User]:
+        """Получить нескольких пользователей одним запросом"""
+        ...
+
+    async def create_user(self, user: User) -> User:
+        """Создать нового пользователя"""
+        ...
+
+    async def update_user(self, user_id: int, updates: Dict[str, Any]) -> User:
+        """Обновить поля пользователя"""
+        ...
+
+    async def increment_user(self, user_id: int, balance_delta: float = 0.0, tasks_delta: int = 0) -> User:
+        """Атомарно изменить баланс и счетчик заданий"""
+        ...
+
+    async def update_balance(self, user_id: int, amount: float) -> User:
+        """Атомарно добавить сумму к балансу"""
+        ...
+
+    async def increment_completed_tasks(self, user_id: int) -> User:
+        """Атомарно увеличить счетчик выполненных заданий"""
+        ...
+
+    async def upsert_users(self, users: List[Dict[str, Any]]) -> None:
+        """Пакетно вставить пользователей, пропуская существующих"""
+        ...
+
+    async def get_user_ids(self, after_user_id: int = 0, limit: int = 1000) -> List[int]:
+        """Получить страницу Telegram ID пользователей по возрастанию (keyset от after_user_id)"""
+        ...
+
+    # ========================================================================
+    # ОТКЛИКИ
+    # ========================================================================
+
+    async def get_user_responses(self, user_id: int) -> List[TaskResponse]:
+        """Получить все отклики пользователя (новые первыми)"""
+        ...
+
+    async def get_user_responses_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        direction: str = 'older',
+        columns: str = RESPONSE_LIST_COLUMNS
+    ) -> List[TaskResponse]:
+        """Получить страницу откликов (keyset-пагинация)"""
+        ...
+
+    async def get_responses_by_user_ids(self, user_ids: List[int]) -> Dict[int, List[TaskResponse]]:
+        """Получить отклики нескольких пользователей одним запросом"""
+        ...
+
+    async def get_response_stats(self, user_id: int) -> Dict[str, Any]:
+        """Получить агрегированную статистику откликов"""
+        ...
+
+    async def create_response(self, response: TaskResponse) -> TaskResponse:
+        """Создать отклик (DuplicateResponseError, если он уже есть)"""
+        ...
+
+    async def record_response(self, response: TaskResponse) -> Tuple[TaskResponse, User]:
+        """Записать отклик и начислить награду за одну операцию"""
+        ...
+
+    async def upsert_responses(self, responses: List[Dict[str, Any]]) -> None:
+        """Пакетно вставить отклики, пропуская существующие"""
+        ...
+
+    async def record_responses(self, responses: List[TaskResponse]) -> List[TaskResponse]:
+        """Пакетно записать отклики и начислить награды, вернуть вставленные"""
+        ...
+
+    async def get_response_summary(
+        self,
+        user_ids: List[int],
+        since: datetime
+    ) -> Dict[int, Tuple[Set[int], int]]:
+        """Откликнутые задания и число откликов с момента since для пачки пользователей"""
+        ...
+
+    async def check_response_exists(self, user_id: int, task_id: int) -> bool:
+        """Проверить, откликался ли пользователь на задание"""
+        ...
+
+    async def get_responded_task_ids(self, user_id: int) -> Set[int]:
+        """Получить ID всех заданий, на которые откликался пользователь"""
+        ...
+
+    async def get_response_by_id(self, response_id: int) -> Optional[TaskResponse]:
+        """Получить отклик по ID"""
+        ...
+
+    # ========================================================================
+    # ПЛАТЕЖИ
+    # ========================================================================
+
+    async def create_payment(self, payment: Dict[str, Any]) -> Dict[str, Any]:
+        """Создать запись о платеже"""
+        ...
+
+    async def update_payment_status(
+        self,
+        tx_id: str = None,
+        invoice_id: str = None,
+        updates: Dict[str, Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Обновить запись платежа"""
+        ...
+
+    async def get_payment_by_tx(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        """Получить платеж по tx_id"""
+        ...
+
+    async def get_payments_by_user(
+        self,
+        user_id: int,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        columns: str = '*'
+    ) -> List[Dict[str, Any]]:
+        """Получить платежи пользователя (новые первыми)"""
+        ...
+
+    async def get_pending_payment(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Получить последний неоплаченный платеж пользователя"""
+        ...
+
+    async def get_pending_payments(
+        self,
+        currencies: Sequence[str],
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Страница неоплаченных платежей в валютах currencies (keyset по id)"""
+        ...
+
+    async def settle_payment(
+        self,
+        tx_id: str,
+        status: str,
+        credit: float = 0.0
+    ) -> Optional[Tuple[Dict[str, Any], User]]:
+        """Перевести платеж из pending в status и начислить credit (None - платеж не в pending)"""
+        ...
+
+    # ========================================================================
+    # ЗАДАНИЯ
+    # ========================================================================
+
+    async def get_tasks(self) -> List[Dict[str, Any]]:
+        """Получить активные задания каталога"""
+        ...
+
+    async def get_tasks_version(self) -> Optional[str]:
+        """Получить метку версии таблицы заданий (меняется при любом изменении)"""
+        ...
+
+    async def upsert_tasks(self, tasks: List[Dict[str, Any]]) -> None:
+        """Пакетно вставить или обновить задания по id"""
+        ...
+
+    async def claim_external_task_ids(
+        self,
+        claims: Sequence[Tuple[str, str, int]]
+    ) -> Dict[Tuple[str, str], Tuple[int, bool]]:
+        """Закрепить ID за заданиями бирж: (биржа, ID на бирже) -> (ID, создан ли сейчас); занятые ID не возвращаются"""
+        ...
+
+    # ========================================================================
+    # ПОДПИСКИ
+    # ========================================================================
+
+    async def get_subscriptions(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Получить страницу всех подписок по возрастанию id (keyset от after_id)"""
+        ...
+
+    async def get_user_subscriptions(self, user_id: int) -> List[Dict[str, Any]]:
+        """Получить подписки пользователя"""
+        ...
+
+    async def create_subscription(self, subscription: Dict[str, Any]) -> Dict[str, Any]:
+        """Создать подписку"""
+        ...
+
+    async def delete_subscriptions(self, user_id: int, subscription_id: Optional[int] = None) -> List[int]:
+        """Удалить подписку пользователя (или все) и вернуть ID удаленных"""
+        ...
+
+    # ========================================================================
+    # ОЧЕРЕДЬ ДОСТАВКИ
+    # ========================================================================
+
+    async def enqueue_notifications(self, notifications: List[Dict[str, Any]]) -> None:
+        """Пакетно добавить уведомления (user_id, task_id, text) в очередь"""
+        ...
+
+    async def get_notifications(self, after_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Получить страницу уведомлений очереди по возрастанию id"""
+        ...
+
+    async def delete_notifications(self, notification_ids: List[int]) -> None:
+        """Удалить отправленные уведомления"""
+        ...
+
+    async def create_broadcast(self, broadcast: Dict[str, Any]) -> Dict[str, Any]:
+        """Создать рассылку"""
+        ...
+
+    async def get_running_broadcasts(self) -> List[Dict[str, Any]]:
+        """Получить незавершенные рассылки (старые первыми)"""
+        ...
+
+    async def update_broadcast(self, broadcast_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Обновить рассылку (позиция, счетчики, статус)"""
+        ...
+
+    # ========================================================================
+    # АВТОЗАРАБОТОК
+    # ========================================================================
+
+    async def get_auto_earn_settings(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Получить настройки автозаработка пользователя"""
+        ...
+
+    async def save_auto_earn_settings(self, user_id: int, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Создать или обновить настройки автозаработка (enabled, daily_limit)"""
+        ...
+
+    async def get_auto_earn_users(self, after_user_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Получить страницу включенных настроек автозаработка по возрастанию user_id"""
+        ...
+
+    # ========================================================================
+    # УТИЛИТЫ
+    # ========================================================================
+
+    async def health_check(self) -> bool:
+        """Проверить доступность хранилища"""
+        ...
+
+    async def close(self) -> None:
+        """Освободить соединения"""
+        ...
@@ -3,35 +3,200 @@ Supabase Client
 Клиент для работы с базой данных Supabase
 """
 
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
-from supabase import create_client, Client
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Sequence, Set, Tuple
+import aiohttp
 from .models import User, TaskResponse
+from .pagination import Cursor, format_timestamp
+from .storage import (
+    RESPONSE_LIST_COLUMNS,
+    TASK_COLUMNS,
+    SUBSCRIPTION_COLUMNS,
+    BROADCAST_COLUMNS,
+    AUTO_EARN_COLUMNS,
+    PAYMENT_LIST_COLUMNS
+)
+from .exceptions import (
+    DatabaseError,
+    RecordNotFoundError,
+    InsufficientFundsError,
+    DuplicateResponseError
+)
 
 logger = logging.getLogger(__name__)
 
+# Размер страницы каталога заданий: не больше лимита строк PostgREST
+# (max-rows, в Supabase по умолчанию 1000), иначе короткая страница
+# будет принята за последнюю
+TASKS_PAGE_SIZE = 1000
+
 
 class SupabaseClient:
     """
     Клиент для работы с Supabase PostgreSQL
     
-    Предоставляет методы для работы с пользователями и откликами
+    Предоставляет методы для работы с пользователями и откликами.
+    Запросы выполняются через REST API (PostgREST) по пулу keep-alive
+    соединений aiohttp, поэтому обращения к БД не блокируют event loop.
     """
     
-    def __init__(self, url: str, key: str):
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        pool_size: int = 20,
+        max_concurrency: int = 10,
+        timeout: float = 10.0
+    ):
         """
         Инициализация клиента Supabase
         
         Args:
             url: URL проекта Supabase
             key: API ключ Supabase
+            pool_size: Максимальное количество открытых HTTP соединений
+            max_concurrency: Максимальное количество одновременных запросов к БД
+            timeout: Таймаут одного запроса в секундах
         """
-        try:
-            self.client: Client = create_client(url, key)
-            logger.info("Supabase клиент успешно инициализирован")
-        except Exception as e:
-            logger.error(f"Ошибка инициализации Supabase клиента: {e}")
-            raise
+        if not url or not key:
+            raise ValueError("Для подключения к Supabase нужны URL и API ключ")
+
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json"
+        }
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        logger.info("Supabase клиент успешно инициализирован")
+
+    # ========================================================================
+    # HTTP ТРАНСПОРТ
+    # ========================================================================
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Получить общую HTTP сессию (создается при первом запросе)
+
+        Returns:
+            Открытая aiohttp.ClientSession с пулом соединений
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=self.timeout
+            )
+        return self._session
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        prefer: Optional[str] = None
+    ) -> Any:
+        """
+        Выполнить запрос к PostgREST
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно /rest/v1 (например 'users' или 'rpc/fn')
+            params: Параметры запроса (фильтры, select, order, limit)
+            json: Тело запроса
+            prefer: Значение заголовка Prefer
+
+        Returns:
+            Разобранный JSON ответа или None для пустого ответа
+
+        Raises:
+            DatabaseError: Если PostgREST вернул ошибку
+        """
+        headers = {"Prefer": prefer} if prefer else None
+
+        async with self._semaphore:
+            session = self._get_session()
+            async with session.request(
+                method,
+                f"{self.rest_url}/{path}",
+                params=params,
+                json=json,
+                headers=headers
+            ) as response:
+                if response.status >= 400:
+                    try:
+                        error = await response.json(content_type=None)
+                    except Exception:
+                        error = {"message": await response.text()}
+                    error = error if isinstance(error, dict) else {"message": str(error)}
+                    raise DatabaseError(
+                        error.get("message") or f"HTTP {response.status}",
+                        status=response.status,
+                        details=error.get("details")
+                    )
+
+                if response.status == 204:
+                    return None
+
+                body = await response.read()
+                if not body:
+                    return None
+                return await response.json(content_type=None)
+
+    async def _select(self, table: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Выполнить SELECT и вернуть список строк"""
+        return await self._request("GET", table, params=params) or []
+
+    async def _insert(self, table: str, data: Any) -> List[Dict[str, Any]]:
+        """Выполнить INSERT и вернуть вставленные строки"""
+        return await self._request("POST", table, json=data, prefer="return=representation") or []
+
+    async def _update(self, table: str, filters: Dict[str, Any], data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Выполнить UPDATE по фильтрам и вернуть измененные строки"""
+        return await self._request("PATCH", table, params=filters, json=data, prefer="return=representation") or []
+
+    async def _rpc(self, function: str, args: Dict[str, Any]) -> Any:
+        """Вызвать хранимую функцию Postgres через /rpc"""
+        return await self._request("POST", f"rpc/{function}", json=args)
+
+    async def _upsert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: str,
+        resolution: str = "ignore-duplicates"
+    ) -> None:
+        """
+        Пакетная вставка строк; конфликтующие по on_conflict строки
+        пропускаются (ignore-duplicates) или обновляются (merge-duplicates)
+        """
+        if not rows:
+            return
+        await self._request(
+            "POST",
+            table,
+            params={'on_conflict': on_conflict},
+            json=rows,
+            prefer=f"resolution={resolution},return=minimal"
+        )
+
+    async def close(self):
+        """Закрыть HTTP сессию и освободить соединения"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("Supabase клиент закрыт")
+        self._session = None
     
     # ========================================================================
     # МЕТОДЫ ДЛЯ РАБОТЫ С ПОЛЬЗОВАТЕЛЯМИ
@@ -48,16 +213,35 @@ class SupabaseClient:
             Объект User или None если не найден
         """
         try:
-            response = self.client.table('users').select('*').eq('user_id', user_id).execute()
+            rows = await self._select('users', {'select': '*', 'user_id': f'eq.{user_id}'})
             
-            if response.data and len(response.data) > 0:
-                return User.from_dict(response.data[0])
+            if rows:
+                return User.from_row(rows[0])
             
             return None
             
         except Exception as e:
             logger.error(f"Ошибка получения пользователя {user_id}: {e}")
             raise
+
+    async def get_users_by_ids(self, user_ids: List[int]) -> Dict[int, User]:
+        """
+        Получить нескольких пользователей одним запросом
+
+        Args:
+            user_ids: Список Telegram user ID
+
+        Returns:
+            Словарь user_id -> User (отсутствующие пользователи не попадают)
+        """
+        try:
+            ids = ','.join(str(int(uid)) for uid in user_ids)
+            rows = await self._select('users', {'select': '*', 'user_id': f'in.({ids})'})
+            return {row['user_id']: User.from_row(row) for row in rows}
+
+        except Exception as e:
+            logger.error(f"Ошибка получения пользователей {user_ids}: {e}")
+            raise
     
     async def create_user(self, user: User) -> User:
         """
@@ -70,12 +254,11 @@ class SupabaseClient:
             Созданный объект User
         """
         try:
-            data = user.to_dict()
-            response = self.client.table('users').insert(data).execute()
+            rows = await self._insert('users', user.to_dict())
             
-            if response.data and len(response.data) > 0:
+            if rows:
                 logger.info(f"Пользователь {user.user_id} успешно создан")
-                return User.from_dict(response.data[0])
+                return User.from_row(rows[0])
             
             raise Exception("Не удалось создать пользователя")
             
@@ -95,17 +278,55 @@ class SupabaseClient:
             Обновленный объект User
         """
         try:
-            response = self.client.table('users').update(updates).eq('user_id', user_id).execute()
+            rows = await self._update('users', {'user_id': f'eq.{user_id}'}, updates)
             
-            if response.data and len(response.data) > 0:
+            if rows:
                 logger.info(f"Пользователь {user_id} успешно обновлен")
-                return User.from_dict(response.data[0])
+                return User.from_row(rows[0])
             
             raise Exception(f"Пользователь {user_id} не найден")
             
         except Exception as e:
             logger.error(f"Ошибка обновления пользователя {user_id}: {e}")
             raise
+
+    async def increment_user(self, user_id: int, balance_delta: float = 0.0, tasks_delta: int = 0) -> User:
+        """
+        Атомарно изменить баланс и счетчик заданий пользователя
+
+        Выполняется одним запросом к RPC increment_user_counters
+        (см. migrations/002_atomic_user_counters.sql), поэтому
+        параллельные начисления не перезаписывают друг друга.
+
+        Args:
+            user_id: Telegram user ID
+            balance_delta: Изменение баланса (может быть отрицательным)
+            tasks_delta: Изменение счетчика выполненных заданий
+
+        Returns:
+            Обновленный объект User
+
+        Raises:
+            RecordNotFoundError: Если пользователь не найден
+            InsufficientFundsError: Если баланс станет отрицательным
+        """
+        try:
+            row = await self._rpc('increment_user_counters', {
+                'p_user_id': user_id,
+                'p_balance_delta': balance_delta,
+                'p_tasks_delta': tasks_delta
+            })
+            return User.from_row(row)
+
+        except DatabaseError as e:
+            if 'insufficient_funds' in str(e):
+                raise InsufficientFundsError(
+                    f"Недостаточно средств для списания {abs(balance_delta)} у пользователя {user_id}"
+                ) from e
+            if 'user_not_found' in str(e):
+                raise RecordNotFoundError(f"Пользователь {user_id} не найден") from e
+            logger.error(f"Ошибка изменения счетчиков пользователя {user_id}: {e}")
+            raise
     
     async def update_balance(self, user_id: int, amount: float) -> User:
         """
@@ -118,19 +339,7 @@ class SupabaseClient:
         Returns:
             Обновленный объект User
         """
-        try:
-            # Получаем текущий баланс
-            user = await self.get_user(user_id)
-            if not user:
-                raise Exception(f"Пользователь {user_id} не найден")
-            
-            # Обновляем баланс
-            new_balance = user.balance + amount
-            return await self.update_user(user_id, {"balance": new_balance})
-            
-        except Exception as e:
-            logger.error(f"Ошибка обновления баланса пользователя {user_id}: {e}")
-            raise
+        return await self.increment_user(user_id, balance_delta=amount)
     
     async def increment_completed_tasks(self, user_id: int) -> User:
         """
@@ -142,18 +351,44 @@ class SupabaseClient:
         Returns:
             Обновленный объект User
         """
+        return await self.increment_user(user_id, tasks_delta=1)
+
+    async def upsert_users(self, users: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно вставить пользователей одним запросом
+
+        Уже существующие пользователи (по user_id) пропускаются.
+
+        Args:
+            users: Список словарей в формате User.to_dict()
+        """
         try:
-            # Получаем текущее значение
-            user = await self.get_user(user_id)
-            if not user:
-                raise Exception(f"Пользователь {user_id} не найден")
+            await self._upsert('users', users, on_conflict='user_id')
+        except Exception as e:
+            logger.error(f"Ошибка пакетной вставки {len(users)} пользователей: {e}")
+            raise
             
-            # Увеличиваем счетчик
-            new_count = user.completed_tasks + 1
-            return await self.update_user(user_id, {"completed_tasks": new_count})
+    async def get_user_ids(self, after_user_id: int = 0, limit: int = 1000) -> List[int]:
+        """
+        Получить страницу Telegram ID пользователей по возрастанию
             
+        Args:
+            after_user_id: Последний ID прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список Telegram ID
+        """
+        try:
+            rows = await self._select('users', {
+                'select': 'user_id',
+                'user_id': f'gt.{after_user_id}',
+                'order': 'user_id.asc',
+                'limit': limit
+            })
+            return [row['user_id'] for row in rows]
         except Exception as e:
-            logger.error(f"Ошибка увеличения счетчика заданий пользователя {user_id}: {e}")
+            logger.error(f"Ошибка получения ID пользователей после {after_user_id}: {e}")
             raise
     
     # ========================================================================
@@ -171,40 +406,293 @@ class SupabaseClient:
             Список объектов TaskResponse
         """
         try:
-            response = self.client.table('responses').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
-            
-            if response.data:
-                return [TaskResponse.from_dict(item) for item in response.data]
+            rows = await self._select('responses', {
+                'select': '*',
+                'user_id': f'eq.{user_id}',
+                'order': 'created_at.desc'
+            })
             
-            return []
+            return [TaskResponse.from_row(item) for item in rows]
             
         except Exception as e:
             logger.error(f"Ошибка получения откликов пользователя {user_id}: {e}")
             raise
+
+    async def get_user_responses_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: Optional[Cursor] = None,
+        direction: str = 'older',
+        columns: str = RESPONSE_LIST_COLUMNS
+    ) -> List[TaskResponse]:
+        """
+        Получить страницу откликов пользователя (keyset-пагинация)
+
+        Страница строится от курсора (created_at, id), поэтому стоимость
+        запроса не зависит от номера страницы.
+
+        Args:
+            user_id: Telegram user ID
+            limit: Размер страницы
+            cursor: Позиция, от которой строится страница (None - с начала)
+            direction: 'older' - отклики старше курсора, 'newer' - новее курсора
+            columns: Список колонок для выборки
+
+        Returns:
+            Список TaskResponse (новые первыми)
+        """
+        try:
+            newer = direction == 'newer'
+            params = {
+                'select': columns,
+                'user_id': f'eq.{user_id}',
+                'order': 'created_at.asc,id.asc' if newer else 'created_at.desc,id.desc',
+                'limit': limit
+            }
+
+            if cursor:
+                created_at, row_id = cursor
+                op = 'gt' if newer else 'lt'
+                ts = format_timestamp(created_at)
+                params['or'] = f'(created_at.{op}."{ts}",and(created_at.eq."{ts}",id.{op}.{row_id}))'
+
+            rows = await self._select('responses', params)
+            if newer:
+                rows.reverse()
+
+            return [TaskResponse.from_row(item) for item in rows]
+
+        except Exception as e:
+            logger.error(f"Ошибка получения страницы откликов пользователя {user_id}: {e}")
+            raise
+
+    async def get_responses_by_user_ids(self, user_ids: List[int]) -> Dict[int, List[TaskResponse]]:
+        """
+        Получить отклики нескольких пользователей одним запросом
+
+        Args:
+            user_ids: Список Telegram user ID
+
+        Returns:
+            Словарь user_id -> список TaskResponse (новые первыми)
+        """
+        try:
+            ids = ','.join(str(int(uid)) for uid in user_ids)
+            rows = await self._select('responses', {
+                'select': '*',
+                'user_id': f'in.({ids})',
+                'order': 'created_at.desc'
+            })
+
+            result: Dict[int, List[TaskResponse]] = {uid: [] for uid in user_ids}
+            for row in rows:
+                result.setdefault(row['user_id'], []).append(TaskResponse.from_row(row))
+            return result
+
+        except Exception as e:
+            logger.error(f"Ошибка получения откликов пользователей {user_ids}: {e}")
+            raise
+
+    async def get_response_stats(self, user_id: int) -> Dict[str, Any]:
+        """
+        Получить агрегированную статистику откликов пользователя
+
+        Считается на стороне БД через RPC get_response_stats
+        (см. migrations/004_response_stats.sql), поэтому размер ответа
+        не зависит от длины истории откликов.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Словарь с total_responses, total_earned, avg_earned,
+            latest_response и task_counts (task_id -> количество)
+        """
+        try:
+            data = await self._rpc('get_response_stats', {'p_user_id': user_id}) or {}
+
+            latest = data.get('latest_response')
+            if isinstance(latest, str):
+                latest = datetime.fromisoformat(latest.replace('Z', '+00:00'))
+
+            return {
+                "total_responses": int(data.get('total_responses') or 0),
+                "total_earned": float(data.get('total_earned') or 0),
+                "avg_earned": float(data.get('avg_earned') or 0),
+                "latest_response": latest,
+                "task_counts": {
+                    int(item['task_id']): int(item['count'])
+                    for item in data.get('task_counts') or []
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Ошибка получения статистики откликов пользователя {user_id}: {e}")
+            raise
     
     async def create_response(self, response: TaskResponse) -> TaskResponse:
         """
         Создать новый отклик
         
+        Вставка идет с on_conflict по уникальному индексу (user_id, task_id)
+        (см. migrations/005_unique_constraints.sql): повторный отклик
+        отклоняет БД, отдельная проверка перед вставкой не нужна.
+
         Args:
             response: Объект TaskResponse для создания
             
         Returns:
             Созданный объект TaskResponse
+
+        Raises:
+            DuplicateResponseError: Если пользователь уже откликался на задание
         """
         try:
-            data = response.to_dict()
-            result = self.client.table('responses').insert(data).execute()
-            
-            if result.data and len(result.data) > 0:
-                logger.info(f"Отклик пользователя {response.user_id} на задание {response.task_id} создан")
-                return TaskResponse.from_dict(result.data[0])
+            rows = await self._request(
+                "POST",
+                'responses',
+                params={'on_conflict': 'user_id,task_id'},
+                json=response.to_dict(),
+                prefer="resolution=ignore-duplicates,return=representation"
+            )
             
-            raise Exception("Не удалось создать отклик")
+            if not rows:
+                raise DuplicateResponseError(
+                    f"Пользователь {response.user_id} уже откликался на задание {response.task_id}"
+                )
             
+            logger.info(f"Отклик пользователя {response.user_id} на задание {response.task_id} создан")
+            return TaskResponse.from_row(rows[0])
+
+        except DuplicateResponseError:
+            raise
         except Exception as e:
             logger.error(f"Ошибка создания отклика: {e}")
             raise
+
+    async def record_response(self, response: TaskResponse) -> Tuple[TaskResponse, User]:
+        """
+        Записать отклик и начислить награду за один запрос
+
+        Вызывает RPC record_response (см. migrations/003_record_response.sql
+        и 010_response_templates.sql):
+        проверка дубликата, вставка отклика, начисление earned на баланс и
+        увеличение счетчика заданий выполняются в одной транзакции.
+
+        Args:
+            response: Объект TaskResponse для создания
+
+        Returns:
+            Tuple (созданный TaskResponse, обновленный User)
+
+        Raises:
+            DuplicateResponseError: Если пользователь уже откликался на задание
+            RecordNotFoundError: Если пользователь не найден
+        """
+        data = response.to_dict()
+        try:
+            result = await self._rpc('record_response', {
+                'p_user_id': data['user_id'],
+                'p_task_id': data['task_id'],
+                'p_task_title': data['task_title'],
+                'p_response_text': data['response_text'],
+                'p_template_id': data['template_id'],
+                'p_earned': data['earned']
+            })
+
+            logger.info(f"Отклик пользователя {response.user_id} на задание {response.task_id} записан")
+            return TaskResponse.from_row(result['response']), User.from_row(result['user'])
+
+        except DatabaseError as e:
+            if 'duplicate_response' in str(e):
+                raise DuplicateResponseError(
+                    f"Пользователь {response.user_id} уже откликался на задание {response.task_id}"
+                ) from e
+            if 'user_not_found' in str(e):
+                raise RecordNotFoundError(f"Пользователь {response.user_id} не найден") from e
+            logger.error(f"Ошибка записи отклика: {e}")
+            raise
+
+    async def upsert_responses(self, responses: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно вставить отклики одним запросом
+
+        Уже существующие отклики (по user_id, task_id) пропускаются.
+
+        Args:
+            responses: Список словарей в формате TaskResponse.to_dict()
+        """
+        try:
+            await self._upsert('responses', responses, on_conflict='user_id,task_id')
+        except Exception as e:
+            logger.error(f"Ошибка пакетной вставки {len(responses)} откликов: {e}")
+            raise
+
+    async def record_responses(self, responses: List[TaskResponse]) -> List[TaskResponse]:
+        """
+        Пакетно записать отклики и начислить награды за один запрос
+
+        Вызывает RPC record_responses (см. migrations/009_auto_earn.sql):
+        дубликаты пропускаются, награды и счетчики заданий начисляются
+        в той же транзакции.
+
+        Args:
+            responses: Отклики для записи
+
+        Returns:
+            Вставленные отклики (без пропущенных дубликатов)
+        """
+        if not responses:
+            return []
+        try:
+            rows = await self._rpc('record_responses', {
+                'p_responses': [
+                    {
+                        key: data[key]
+                        for key in ('user_id', 'task_id', 'task_title', 'response_text', 'template_id', 'earned')
+                    }
+                    for data in (response.to_dict() for response in responses)
+                ]
+            }) or []
+            logger.info(f"Пакетно записано откликов: {len(rows)} из {len(responses)}")
+            return [TaskResponse.from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи {len(responses)} откликов: {e}")
+            raise
+
+    async def get_response_summary(
+        self,
+        user_ids: List[int],
+        since: datetime
+    ) -> Dict[int, Tuple[Set[int], int]]:
+        """
+        Получить откликнутые задания и число недавних откликов пачки пользователей
+
+        Вызывает RPC get_response_summary: агрегация выполняется в БД,
+        клиент получает одну строку на пользователя.
+
+        Args:
+            user_ids: Список Telegram user ID
+            since: Начало периода для подсчета откликов
+
+        Returns:
+            Словарь user_id -> (ID заданий с откликом, число откликов с since)
+        """
+        try:
+            rows = await self._rpc('get_response_summary', {
+                'p_user_ids': [int(uid) for uid in user_ids],
+                'p_since': format_timestamp(since)
+            }) or []
+
+            summary: Dict[int, Tuple[Set[int], int]] = {uid: (set(), 0) for uid in user_ids}
+            for row in rows:
+                summary[row['user_id']] = (set(row['task_ids']), row['recent'])
+            return summary
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения сводки откликов {len(user_ids)} пользователей: {e}")
+            raise
     
     async def check_response_exists(self, user_id: int, task_id: int) -> bool:
         """
@@ -218,13 +706,42 @@ class SupabaseClient:
             True если отклик существует, False иначе
         """
         try:
-            response = self.client.table('responses').select('id').eq('user_id', user_id).eq('task_id', task_id).execute()
+            rows = await self._select('responses', {
+                'select': 'id',
+                'user_id': f'eq.{user_id}',
+                'task_id': f'eq.{task_id}',
+                'limit': 1
+            })
             
-            return response.data and len(response.data) > 0
+            return len(rows) > 0
             
         except Exception as e:
             logger.error(f"Ошибка проверки существования отклика: {e}")
             raise
+
+    async def get_responded_task_ids(self, user_id: int) -> Set[int]:
+        """
+        Получить ID всех заданий, на которые откликался пользователь
+
+        Использует RPC get_response_summary (см. migrations/009_auto_earn.sql):
+        ID приходят одним массивом, поэтому ответ не обрезается лимитом
+        строк PostgREST.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Множество ID заданий
+        """
+        try:
+            rows = await self._rpc('get_response_summary', {
+                'p_user_ids': [int(user_id)],
+                'p_since': format_timestamp(datetime.now(timezone.utc))
+            }) or []
+            return set(rows[0]['task_ids']) if rows else set()
+        except Exception as e:
+            logger.error(f"Ошибка получения заданий с откликом пользователя {user_id}: {e}")
+            raise
     
     async def get_response_by_id(self, response_id: int) -> Optional[TaskResponse]:
         """
@@ -237,16 +754,395 @@ class SupabaseClient:
             Объект TaskResponse или None если не найден
         """
         try:
-            response = self.client.table('responses').select('*').eq('id', response_id).execute()
+            rows = await self._select('responses', {'select': '*', 'id': f'eq.{response_id}'})
             
-            if response.data and len(response.data) > 0:
-                return TaskResponse.from_dict(response.data[0])
+            if rows:
+                return TaskResponse.from_row(rows[0])
             
             return None
             
         except Exception as e:
             logger.error(f"Ошибка получения отклика {response_id}: {e}")
             raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ЗАДАНИЯМИ
+    # ========================================================================
+
+    async def get_tasks(self) -> List[Dict[str, Any]]:
+        """
+        Получить активные задания каталога
+
+        Каталог читается страницами по TASKS_PAGE_SIZE (keyset по id), пока
+        не придет неполная страница, поэтому лимит строк PostgREST не
+        обрезает его.
+
+        Returns:
+            Список словарей заданий (id, title, description, budget, category)
+        """
+        try:
+            tasks: List[Dict[str, Any]] = []
+            after_id = 0
+            while True:
+                page = await self._select('tasks', {
+                    'select': TASK_COLUMNS,
+                    'active': 'eq.true',
+                    'id': f'gt.{after_id}',
+                    'order': 'id.asc',
+                    'limit': TASKS_PAGE_SIZE
+                })
+                tasks.extend(page)
+                if len(page) < TASKS_PAGE_SIZE:
+                    return tasks
+                after_id = page[-1]['id']
+        except Exception as e:
+            logger.error(f"Ошибка получения заданий: {e}")
+            raise
+
+    async def get_tasks_version(self) -> Optional[str]:
+        """
+        Получить метку версии таблицы заданий
+
+        Дешевый запрос RPC tasks_version (см. migrations/006_tasks_table.sql):
+        метка меняется при любой вставке, изменении или удалении задания,
+        поэтому каталог перечитывается только при реальных изменениях.
+
+        Returns:
+            Строка версии
+        """
+        try:
+            return await self._rpc('tasks_version', {})
+        except Exception as e:
+            logger.error(f"Ошибка получения версии заданий: {e}")
+            raise
+
+    async def upsert_tasks(self, tasks: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно вставить или обновить задания по id
+
+        Args:
+            tasks: Список словарей заданий
+        """
+        try:
+            await self._upsert('tasks', tasks, on_conflict='id', resolution='merge-duplicates')
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи {len(tasks)} заданий: {e}")
+            raise
+
+    async def claim_external_task_ids(
+        self,
+        claims: Sequence[Tuple[str, str, int]]
+    ) -> Dict[Tuple[str, str], Tuple[int, bool]]:
+        """
+        Закрепить ID за заданиями бирж
+
+        Вызывает RPC claim_external_task_ids (см. migrations/012_external_task_ids.sql):
+        задание, у которого ID уже закреплен, получает его; остальные
+        занимают предложенный ID, если он свободен.
+
+        Args:
+            claims: Список (биржа, ID на бирже, предложенный ID)
+
+        Returns:
+            (биржа, ID на бирже) -> (ID, True если закреплен этим вызовом);
+            задания, чей предложенный ID занят другим, отсутствуют
+        """
+        if not claims:
+            return {}
+        try:
+            rows = await self._rpc('claim_external_task_ids', {
+                'p_sources': [source for source, _, _ in claims],
+                'p_source_ids': [source_id for _, source_id, _ in claims],
+                'p_ids': [int(task_id) for _, _, task_id in claims]
+            }) or []
+            return {(row['source'], row['source_id']): (row['id'], row['created']) for row in rows}
+        except Exception as e:
+            logger.error(f"Ошибка закрепления ID {len(claims)} заданий с бирж: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ПОДПИСКАМИ
+    # ========================================================================
+
+    async def get_subscriptions(self, after_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Получить страницу всех подписок по возрастанию id
+
+        Args:
+            after_id: ID последней подписки прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список словарей подписок
+        """
+        try:
+            return await self._select('subscriptions', {
+                'select': SUBSCRIPTION_COLUMNS,
+                'id': f'gt.{after_id}',
+                'order': 'id.asc',
+                'limit': limit
+            })
+        except Exception as e:
+            logger.error(f"Ошибка получения подписок после {after_id}: {e}")
+            raise
+
+    async def get_user_subscriptions(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Получить подписки пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Список словарей подписок (старые первыми)
+        """
+        try:
+            return await self._select('subscriptions', {
+                'select': SUBSCRIPTION_COLUMNS,
+                'user_id': f'eq.{user_id}',
+                'order': 'id.asc'
+            })
+        except Exception as e:
+            logger.error(f"Ошибка получения подписок пользователя {user_id}: {e}")
+            raise
+
+    async def create_subscription(self, subscription: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать подписку
+
+        Args:
+            subscription: Словарь с user_id, categories, keywords, min_budget
+
+        Returns:
+            Созданная подписка
+        """
+        try:
+            rows = await self._insert('subscriptions', {
+                'user_id': subscription['user_id'],
+                'categories': subscription.get('categories') or [],
+                'keywords': subscription.get('keywords') or [],
+                'min_budget': subscription.get('min_budget') or 0
+            })
+            if not rows:
+                raise DatabaseError("Не удалось создать подписку")
+            return rows[0]
+        except Exception as e:
+            logger.error(f"Ошибка создания подписки пользователя {subscription.get('user_id')}: {e}")
+            raise
+
+    async def delete_subscriptions(self, user_id: int, subscription_id: Optional[int] = None) -> List[int]:
+        """
+        Удалить подписку пользователя или все его подписки
+
+        Args:
+            user_id: Telegram user ID
+            subscription_id: ID подписки (None - все подписки пользователя)
+
+        Returns:
+            ID удаленных подписок
+        """
+        params = {'user_id': f'eq.{user_id}', 'select': 'id'}
+        if subscription_id is not None:
+            params['id'] = f'eq.{subscription_id}'
+        try:
+            rows = await self._request('DELETE', 'subscriptions', params=params, prefer='return=representation') or []
+            return [row['id'] for row in rows]
+        except Exception as e:
+            logger.error(f"Ошибка удаления подписок пользователя {user_id}: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С ОЧЕРЕДЬЮ ДОСТАВКИ
+    # ========================================================================
+
+    async def enqueue_notifications(self, notifications: List[Dict[str, Any]]) -> None:
+        """
+        Пакетно добавить уведомления в очередь одним запросом
+
+        Args:
+            notifications: Список словарей с user_id, task_id, text
+        """
+        if not notifications:
+            return
+        rows = [{'user_id': n['user_id'], 'task_id': n.get('task_id'), 'text': n['text']} for n in notifications]
+        try:
+            await self._request('POST', 'notification_outbox', json=rows, prefer='return=minimal')
+        except Exception as e:
+            logger.error(f"Ошибка записи {len(notifications)} уведомлений в очередь: {e}")
+            raise
+
+    async def get_notifications(self, after_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Получить страницу уведомлений очереди по возрастанию id
+
+        Args:
+            after_id: ID последнего уведомления прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список словарей уведомлений
+        """
+        try:
+            return await self._select('notification_outbox', {
+                'select': 'id,user_id,task_id,text,created_at',
+                'id': f'gt.{after_id}',
+                'order': 'id.asc',
+                'limit': limit
+            })
+        except Exception as e:
+            logger.error(f"Ошибка чтения очереди уведомлений: {e}")
+            raise
+
+    async def delete_notifications(self, notification_ids: List[int]) -> None:
+        """
+        Удалить отправленные уведомления
+
+        Args:
+            notification_ids: ID уведомлений
+        """
+        if not notification_ids:
+            return
+        try:
+            await self._request(
+                'DELETE',
+                'notification_outbox',
+                params={'id': f"in.({','.join(str(i) for i in notification_ids)})"},
+                prefer='return=minimal'
+            )
+        except Exception as e:
+            logger.error(f"Ошибка удаления {len(notification_ids)} уведомлений: {e}")
+            raise
+
+    async def create_broadcast(self, broadcast: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать рассылку
+
+        Args:
+            broadcast: Словарь с text и created_by
+
+        Returns:
+            Созданная рассылка
+        """
+        try:
+            rows = await self._insert('broadcasts', {
+                'text': broadcast['text'],
+                'created_by': broadcast.get('created_by')
+            })
+            if not rows:
+                raise DatabaseError("Не удалось создать рассылку")
+            return rows[0]
+        except Exception as e:
+            logger.error(f"Ошибка создания рассылки: {e}")
+            raise
+
+    async def get_running_broadcasts(self) -> List[Dict[str, Any]]:
+        """
+        Получить незавершенные рассылки
+
+        Returns:
+            Список рассылок со статусом running (старые первыми)
+        """
+        try:
+            return await self._select('broadcasts', {
+                'select': BROADCAST_COLUMNS,
+                'status': 'eq.running',
+                'order': 'id.asc'
+            })
+        except Exception as e:
+            logger.error(f"Ошибка получения рассылок: {e}")
+            raise
+
+    async def update_broadcast(self, broadcast_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Обновить рассылку
+
+        Args:
+            broadcast_id: ID рассылки
+            updates: Поля для обновления (status, last_user_id, sent, failed)
+
+        Returns:
+            Обновленная рассылка или None, если не найдена
+        """
+        try:
+            rows = await self._update('broadcasts', {'id': f'eq.{broadcast_id}'}, updates)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Ошибка обновления рассылки {broadcast_id}: {e}")
+            raise
+
+    # ========================================================================
+    # МЕТОДЫ ДЛЯ РАБОТЫ С АВТОЗАРАБОТКОМ
+    # ========================================================================
+
+    async def get_auto_earn_settings(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получить настройки автозаработка пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Словарь настроек или None, если пользователь их не менял
+        """
+        try:
+            rows = await self._select('auto_earn_settings', {
+                'select': AUTO_EARN_COLUMNS,
+                'user_id': f'eq.{user_id}'
+            })
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Ошибка получения настроек автозаработка {user_id}: {e}")
+            raise
+
+    async def save_auto_earn_settings(self, user_id: int, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Создать или обновить настройки автозаработка
+
+        Args:
+            user_id: Telegram user ID
+            updates: Поля для обновления (enabled, daily_limit)
+
+        Returns:
+            Сохраненные настройки
+        """
+        try:
+            rows = await self._request(
+                "POST",
+                'auto_earn_settings',
+                params={'on_conflict': 'user_id', 'select': AUTO_EARN_COLUMNS},
+                json=dict(updates, user_id=user_id, updated_at=format_timestamp(datetime.now(timezone.utc))),
+                prefer="resolution=merge-duplicates,return=representation"
+            )
+            if not rows:
+                raise DatabaseError(f"Не удалось сохранить настройки автозаработка {user_id}")
+            logger.info(f"Настройки автозаработка пользователя {user_id} обновлены: {updates}")
+            return rows[0]
+        except Exception as e:
+            logger.error(f"Ошибка сохранения настроек автозаработка {user_id}: {e}")
+            raise
+
+    async def get_auto_earn_users(self, after_user_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Получить страницу включенных настроек автозаработка по возрастанию user_id
+
+        Args:
+            after_user_id: Последний user_id прошлой страницы (0 - с начала)
+            limit: Размер страницы
+
+        Returns:
+            Список словарей настроек
+        """
+        try:
+            return await self._select('auto_earn_settings', {
+                'select': AUTO_EARN_COLUMNS,
+                'enabled': 'is.true',
+                'user_id': f'gt.{after_user_id}',
+                'order': 'user_id.asc',
+                'limit': limit
+            })
+        except Exception as e:
+            logger.error(f"Ошибка получения пользователей автозаработка после {after_user_id}: {e}")
+            raise
     
     # ========================================================================
     # УТИЛИТЫ
@@ -261,7 +1157,7 @@ class SupabaseClient:
         """
         try:
             # Пробуем выполнить простой запрос
-            self.client.table('users').select('id').limit(1).execute()
+            await self._select('users', {'select': 'id', 'limit': 1})
             logger.info("Supabase health check: OK")
             return True
         except Exception as e:
@@ -283,10 +1179,10 @@ class SupabaseClient:
             Вставленная запись
         """
         try:
-            result = self.client.table('payments').insert(payment).execute()
-            if result.data and len(result.data) > 0:
-                logger.info(f"Платеж создан: {result.data[0]}")
-                return result.data[0]
+            rows = await self._insert('payments', payment)
+            if rows:
+                logger.info(f"Платеж создан: {rows[0]}")
+                return rows[0]
             raise Exception("Не удалось создать запись платежа")
         except Exception as e:
             logger.error(f"Ошибка создания платежа: {e}")
@@ -300,18 +1196,14 @@ class SupabaseClient:
             if not updates:
                 updates = {}
 
-            query = self.client.table('payments')
-            if tx_id:
-                query = query.update(updates).eq('tx_id', tx_id)
-            elif invoice_id:
-                query = query.update(updates).eq('tx_id', invoice_id)
-            else:
+            key = tx_id or invoice_id
+            if not key:
                 raise ValueError('tx_id или invoice_id должны быть переданы')
 
-            result = query.execute()
-            if result.data and len(result.data) > 0:
-                logger.info(f"Платеж обновлён: {result.data[0]}")
-                return result.data[0]
+            rows = await self._update('payments', {'tx_id': f'eq.{key}'}, updates)
+            if rows:
+                logger.info(f"Платеж обновлён: {rows[0]}")
+                return rows[0]
             return None
         except Exception as e:
             logger.error(f"Ошибка обновления платежа: {e}")
@@ -322,23 +1214,130 @@ class SupabaseClient:
         Получить запись платежа по tx_id (или invoice id)
         """
         try:
-            result = self.client.table('payments').select('*').eq('tx_id', tx_id).execute()
-            if result.data and len(result.data) > 0:
-                return result.data[0]
+            rows = await self._select('payments', {'select': '*', 'tx_id': f'eq.{tx_id}'})
+            if rows:
+                return rows[0]
             return None
         except Exception as e:
             logger.error(f"Ошибка получения платежа по tx {tx_id}: {e}")
             raise
 
-    async def get_payments_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_payments_by_user(
+        self,
+        user_id: int,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        columns: str = '*'
+    ) -> List[Dict[str, Any]]:
         """
-        Получить все платежи пользователя
+        Получить платежи пользователя (новые первыми)
+
+        Args:
+            user_id: Telegram user ID
+            status: Фильтр по статусу (None - все)
+            limit: Максимум записей (None - все)
+            columns: Список колонок для выборки
         """
         try:
-            result = self.client.table('payments').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
-            if result.data:
-                return result.data
-            return []
+            params = {
+                'select': columns,
+                'user_id': f'eq.{user_id}',
+                'order': 'created_at.desc,id.desc'
+            }
+            if status:
+                params['status'] = f'eq.{status}'
+            if limit:
+                params['limit'] = limit
+            return await self._select('payments', params)
         except Exception as e:
             logger.error(f"Ошибка получения платежей пользователя {user_id}: {e}")
             raise
+
+    async def get_pending_payment(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получить последний неоплаченный платеж пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Запись платежа или None
+        """
+        payments = await self.get_payments_by_user(
+            user_id,
+            status='pending',
+            limit=1,
+            columns=PAYMENT_LIST_COLUMNS
+        )
+        return payments[0] if payments else None
+
+    async def get_pending_payments(
+        self,
+        currencies: Sequence[str],
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Получить страницу неоплаченных платежей (keyset-пагинация по id)
+
+        Args:
+            currencies: Валюты платежей (платежи других провайдеров пропускаются)
+            after_id: ID последнего платежа предыдущей страницы
+            limit: Размер страницы
+
+        Returns:
+            Платежи в порядке id
+        """
+        if not currencies:
+            return []
+        try:
+            return await self._select('payments', {
+                'select': PAYMENT_LIST_COLUMNS,
+                'status': 'eq.pending',
+                'id': f'gt.{after_id}',
+                'currency': f'in.({",".join(currencies)})',
+                'order': 'id.asc',
+                'limit': limit
+            })
+        except Exception as e:
+            logger.error(f"Ошибка получения неоплаченных платежей: {e}")
+            raise
+
+    async def settle_payment(
+        self,
+        tx_id: str,
+        status: str,
+        credit: float = 0.0
+    ) -> Optional[Tuple[Dict[str, Any], User]]:
+        """
+        Завершить платеж и начислить сумму на баланс за один запрос
+
+        Вызывает RPC settle_payment (см. migrations/011_settle_payment.sql):
+        статус меняется только у платежа в pending, начисление выполняется
+        в той же транзакции, поэтому сумма зачисляется ровно один раз.
+
+        Args:
+            tx_id: ID счета
+            status: Итоговый статус (paid, expired, failed)
+            credit: Сумма к начислению в рублях
+
+        Returns:
+            Tuple (обновленный платеж, пользователь) или None, если
+            платеж не найден или уже завершен
+        """
+        try:
+            result = await self._rpc('settle_payment', {
+                'p_tx_id': tx_id,
+                'p_status': status,
+                'p_credit': credit
+            })
+            if not result:
+                return None
+            logger.info(f"Платеж {tx_id} завершен со статусом {status}, начислено {credit}")
+            return result['payment'], User.from_row(result['user'])
+
+        except DatabaseError as e:
+            if 'user_not_found' in str(e):
+                raise RecordNotFoundError(f"Пользователь платежа {tx_id} не найден") from e
+            logger.error(f"Ошибка завершения платежа {tx_id}: {e}")
+            raise
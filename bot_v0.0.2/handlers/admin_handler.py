@@ -0,0 +1,121 @@
+"""
+Admin Handler
+Команды администраторов: рассылки и метрики доставки
+"""
+
+import logging
+from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from services.delivery_engine import DeliveryEngine
+import config
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+
+def is_admin(user_id: int) -> bool:
+    """Пользователь указан в ADMIN_IDS"""
+    return user_id in config.ADMIN_IDS
+
+
+async def cmd_broadcast(message: Message, command: CommandObject, delivery_engine: DeliveryEngine):
+    """
+    Обработчик команды /broadcast <текст>
+    
+    Запускает рассылку всем пользователям (только для администраторов)
+    """
+    user_id = message.from_user.id
+    if not is_admin(user_id):
+        return
+    
+    text = (command.args or "").strip()
+    if not text:
+        await message.answer(
+            "📣 Укажите текст рассылки (HTML)!\n"
+            "Пример: /broadcast <b>Новые задания</b> уже в боте"
+        )
+        return
+    
+    try:
+        # Предпросмотр заодно проверяет HTML разметку до запуска рассылки
+        try:
+            await message.answer(text)
+        except TelegramBadRequest as e:
+            await message.answer(f"❌ Ошибка разметки, рассылка не запущена: {e}", parse_mode=None)
+            return
+        
+        broadcast = await delivery_engine.broadcast(text, created_by=user_id)
+        await message.answer(
+            f"📣 Рассылка #{broadcast['id']} запущена (текст выше).\n"
+            f"Прогресс: /delivery, отмена: /broadcast_cancel {broadcast['id']}"
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в cmd_broadcast для администратора {user_id}: {e}")
+        await message.answer("😔 Ошибка запуска рассылки.")
+
+
+async def cmd_broadcast_cancel(message: Message, command: CommandObject, delivery_engine: DeliveryEngine):
+    """
+    Обработчик команды /broadcast_cancel <id>
+    """
+    user_id = message.from_user.id
+    if not is_admin(user_id):
+        return
+    
+    try:
+        broadcast_id = int((command.args or "").strip())
+    except ValueError:
+        await message.answer("❌ Укажите номер рассылки! Пример: /broadcast_cancel 1")
+        return
+    
+    try:
+        broadcast = await delivery_engine.cancel_broadcast(broadcast_id)
+        if broadcast is None:
+            await message.answer(f"❌ Рассылка #{broadcast_id} не найдена")
+            return
+        await message.answer(
+            f"🛑 Рассылка #{broadcast_id} отменена: доставлено {broadcast['sent']}, ошибок {broadcast['failed']}"
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в cmd_broadcast_cancel для администратора {user_id}: {e}")
+        await message.answer("😔 Ошибка отмены рассылки.")
+
+
+async def cmd_delivery(message: Message, delivery_engine: DeliveryEngine):
+    """
+    Обработчик команды /delivery
+    
+    Показывает метрики доставки сообщений
+    """
+    if not is_admin(message.from_user.id):
+        return
+    
+    stats = delivery_engine.stats()
+    text = f"""
+📬 <b>Доставка сообщений</b>
+
+✅ Доставлено: {stats['sent']}
+❌ Ошибок: {stats['failed']}
+🔁 Повторов: {stats['retries']}, ответов 429: {stats['throttled']}
+⚡ Скорость: {stats['throughput']:.1f} сообщ./с (за минуту)
+⏱ Задержка уведомлений: {stats['lag']} с (последняя {stats['last_lag']} с)
+📥 В очереди: {stats['queue']} (чатов: {stats['chats']})
+"""
+    if stats['paused']:
+        text += f"⏸ Пауза по лимиту Telegram: {stats['paused']} с\n"
+    for broadcast_id, (sent, failed, last_user_id) in stats['broadcasts'].items():
+        text += f"📣 Рассылка #{broadcast_id}: доставлено {sent}, ошибок {failed}\n"
+    
+    await message.answer(text, parse_mode="HTML")
+
+
+def register_handlers(router: Router):
+    """Регистрация обработчиков admin handler"""
+    router.message.register(cmd_broadcast, Command("broadcast"))
+    router.message.register(cmd_broadcast_cancel, Command("broadcast_cancel"))
+    router.message.register(cmd_delivery, Command("delivery"))
@@ -3,20 +3,28 @@ Callback Handler
 Обработчик всех inline кнопок (callbacks)
 """
 
+import html
 import logging
 from aiogram import Router
 from aiogram.types import CallbackQuery
 from services.user_service import UserService
 from services.task_service import TaskService
+from services.task_catalog import category_key
+from services.auto_earn import AutoEarnEngine, DAILY_LIMIT_CHOICES
+from database.exceptions import DuplicateResponseError
 from keyboards.inline_keyboards import (
     get_main_menu_keyboard,
-    get_tasks_keyboard,
+    get_task_categories_keyboard,
+    get_task_budgets_keyboard,
     get_task_details_keyboard,
     get_balance_keyboard,
     get_profile_keyboard,
     get_responses_keyboard,
     get_settings_keyboard
 )
+from handlers.tasks_handler import build_tasks_page
+from utils.message_streamer import MessageStreamer
+import config
 
 logger = logging.getLogger(__name__)
 
@@ -46,28 +54,39 @@ async def handle_main_menu(callback: CallbackQuery):
         await callback.answer("😔 Ошибка", show_alert=True)
 
 
-async def handle_auto_earn(callback: CallbackQuery):
-    """
-    Обработчик кнопки "Автоматический заработок"
-    """
-    try:
-        text = """
+async def _show_auto_earn(callback: CallbackQuery, auto_earn_engine: AutoEarnEngine, settings: dict):
+    """Показать меню автозаработка с текущими настройками"""
+    from ui.menus import get_auto_earn_menu
+    today = await auto_earn_engine.get_today_count(callback.from_user.id)
+    status = "✅ Включен" if settings['enabled'] else "⏸ Выключен"
+    minutes = max(1, round(auto_earn_engine.interval / 60))
+    text = f"""
 ⚙️ <b>Автоматический заработок</b>
 
-Здесь вы можете настроить автоматическую работу бота:
+Статус: <b>{status}</b>
+Лимит: <b>{settings['daily_limit']}</b> откликов в сутки
+Сегодня: <b>{today}</b> из {settings['daily_limit']}
 
-📋 <b>Список заданий</b> - просмотр доступных заданий
-✍️ <b>Мои отклики</b> - история ваших откликов
-⚙️ <b>Настройки</b> - настройка автоматизации (скоро)
+Раз в {minutes} мин. бот сам откликается на самые дорогие задания,
+на которые вы еще не откликались, пока не исчерпан суточный лимит.
+Награда начисляется как за обычный отклик.
 
-<i>В будущих версиях бот сможет работать полностью автономно!</i>
+Выберите лимит откликов в сутки:
 """
-        from ui.menus import get_auto_earn_menu
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_auto_earn_menu(),
-            parse_mode="HTML"
-        )
+    await callback.message.edit_text(
+        text,
+        reply_markup=get_auto_earn_menu(settings['enabled'], settings['daily_limit'], DAILY_LIMIT_CHOICES),
+        parse_mode="HTML"
+    )
+
+
+async def handle_auto_earn(callback: CallbackQuery, auto_earn_engine: AutoEarnEngine):
+    """
+    Обработчик кнопки "Автоматический заработок"
+    """
+    try:
+        settings = await auto_earn_engine.get_settings(callback.from_user.id)
+        await _show_auto_earn(callback, auto_earn_engine, settings)
         await callback.answer()
         
     except Exception as e:
@@ -75,29 +94,75 @@ async def handle_auto_earn(callback: CallbackQuery):
         await callback.answer("😔 Ошибка", show_alert=True)
 
 
-async def handle_tasks_list(callback: CallbackQuery, task_service: TaskService):
+async def handle_auto_earn_toggle(
+    callback: CallbackQuery,
+    auto_earn_engine: AutoEarnEngine,
+    user_service: UserService
+):
     """
-    Обработчик кнопки "Список заданий"
+    Обработчик кнопки включения/выключения автозаработка
     """
+    user_id = callback.from_user.id
+    
     try:
-        tasks = task_service.get_all_tasks()
+        if not await user_service.is_user_registered(user_id):
+            await callback.answer("⚠️ Используйте /start для регистрации", show_alert=True)
+            return
         
-        if not tasks:
-            await callback.answer(
-                "📭 Пока нет доступных заданий",
-                show_alert=True
-            )
+        settings = await auto_earn_engine.get_settings(user_id)
+        settings = await auto_earn_engine.set_enabled(user_id, not settings['enabled'])
+        await _show_auto_earn(callback, auto_earn_engine, settings)
+        await callback.answer("✅ Автоотклики включены" if settings['enabled'] else "⏸ Автоотклики выключены")
+        logger.info(f"Пользователь {user_id} переключил автозаработок: {settings['enabled']}")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в handle_auto_earn_toggle: {e}")
+        await callback.answer("😔 Ошибка", show_alert=True)
+
+
+async def handle_auto_earn_limit(
+    callback: CallbackQuery,
+    auto_earn_engine: AutoEarnEngine,
+    user_service: UserService
+):
+    """
+    Обработчик выбора суточного лимита автозаработка
+    """
+    user_id = callback.from_user.id
+    
+    try:
+        if not await user_service.is_user_registered(user_id):
+            await callback.answer("⚠️ Используйте /start для регистрации", show_alert=True)
             return
         
-        tasks_text = f"""
-📋 <b>Доступные задания ({len(tasks)})</b>
+        limit = int(callback.data.split("_")[-1])
+        settings = await auto_earn_engine.get_settings(user_id)
+        if settings['daily_limit'] == limit:
+            await callback.answer()
+            return
+        
+        settings = await auto_earn_engine.set_daily_limit(user_id, limit)
+        await _show_auto_earn(callback, auto_earn_engine, settings)
+        await callback.answer(f"✅ Лимит: {limit} в сутки")
+        
+    except ValueError:
+        await callback.answer("❌ Неверный лимит", show_alert=True)
+    except Exception as e:
+        logger.error(f"Ошибка в handle_auto_earn_limit: {e}")
+        await callback.answer("😔 Ошибка", show_alert=True)
 
-Выберите задание, чтобы увидеть детали и откликнуться:
-"""
+
+async def handle_tasks_list(callback: CallbackQuery, task_service: TaskService):
+    """
+    Обработчик кнопки "Список заданий"
+    """
+    try:
+        responded = await task_service.get_responded_task_ids(callback.from_user.id)
+        tasks_text, keyboard = build_tasks_page(task_service, responded=responded)
         
         await callback.message.edit_text(
             tasks_text,
-            reply_markup=get_tasks_keyboard(tasks),
+            reply_markup=keyboard,
             parse_mode="HTML"
         )
         await callback.answer()
@@ -108,6 +173,82 @@ async def handle_tasks_list(callback: CallbackQuery, task_service: TaskService):
         await callback.answer("😔 Ошибка загрузки заданий", show_alert=True)
 
 
+async def handle_tasks_page(callback: CallbackQuery, task_service: TaskService):
+    """
+    Обработчик переключения страниц и фильтров списка заданий
+    
+    Формат callback_data: tasks_page_<категория>_<бюджет>_<p|n><cursor>
+    ("-" - фильтр не задан; p - страница перед курсором, n - после)
+    """
+    try:
+        _, _, category_token, budget_token, cursor = callback.data.split("_", 4)
+        direction = "prev" if cursor[:1] == "p" else "next"
+        responded = await task_service.get_responded_task_ids(callback.from_user.id)
+        
+        tasks_text, keyboard = build_tasks_page(
+            task_service,
+            None if category_token == "-" else category_token,
+            None if budget_token == "-" else budget_token,
+            cursor[1:] or None,
+            direction,
+            responded
+        )
+        
+        await callback.message.edit_text(
+            tasks_text,
+            reply_markup=keyboard,
+            parse_mode="HTML"
+        )
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в handle_tasks_page: {e}")
+        await callback.answer("😔 Ошибка загрузки заданий", show_alert=True)
+
+
+async def handle_tasks_categories(callback: CallbackQuery, task_service: TaskService):
+    """
+    Обработчик кнопки выбора категории в списке заданий
+    
+    Формат callback_data: tasks_categories_<бюджет>
+    """
+    try:
+        budget_token = callback.data.split("_", 2)[2]
+        categories = [(category_key(c), c) for c in task_service.get_available_categories()]
+        
+        await callback.message.edit_text(
+            "🏷 <b>Выберите категорию заданий:</b>",
+            reply_markup=get_task_categories_keyboard(categories, None if budget_token == "-" else budget_token),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в handle_tasks_categories: {e}")
+        await callback.answer("😔 Ошибка", show_alert=True)
+
+
+async def handle_tasks_budgets(callback: CallbackQuery):
+    """
+    Обработчик кнопки выбора бюджета в списке заданий
+    
+    Формат callback_data: tasks_budgets_<категория>
+    """
+    try:
+        category_token = callback.data.split("_", 2)[2]
+        
+        await callback.message.edit_text(
+            "💰 <b>Выберите бюджет заданий:</b>",
+            reply_markup=get_task_budgets_keyboard(None if category_token == "-" else category_token),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в handle_tasks_budgets: {e}")
+        await callback.answer("😔 Ошибка", show_alert=True)
+
+
 async def handle_task_details(callback: CallbackQuery, task_service: TaskService, user_service: UserService):
     """
     Обработчик кнопки "Подробнее о задании"
@@ -126,17 +267,22 @@ async def handle_task_details(callback: CallbackQuery, task_service: TaskService
             )
             return
         
-        # Проверяем, откликался ли уже
+        # Проверяем, откликался ли уже (по множеству откликов в памяти)
         has_responded = await task_service.has_user_responded(user_id, task_id)
         
+        # Задания с бирж приходят извне: экранируем текст для HTML
+        source_line = ""
+        if task.get('url'):
+            source_line = f"\n🔗 <b>Источник:</b> <a href=\"{html.escape(task['url'])}\">{html.escape(task.get('source', 'биржа'))}</a>"
+        
         task_text = f"""
-📌 <b>{task['title']}</b>
+📌 <b>{html.escape(task['title'])}</b>
 
 📝 <b>Описание:</b>
-{task['description']}
+{html.escape(task['description'])}
 
 💰 <b>Бюджет:</b> {task['budget']}₽
-🏷 <b>Категория:</b> {task['category']}
+🏷 <b>Категория:</b> {task['category']}{source_line}
 
 {'✅ <i>Вы уже откликнулись на это задание</i>' if has_responded else '💡 <i>Нажмите "Откликнуться" чтобы отправить отклик и получить +50₽</i>'}
 """
@@ -157,7 +303,11 @@ async def handle_task_details(callback: CallbackQuery, task_service: TaskService
 async def handle_task_respond(callback: CallbackQuery, task_service: TaskService, user_service: UserService):
     """
     Обработчик кнопки "Откликнуться"
+    
+    Callback подтверждается сразу, а текст отклика показывается по мере
+    генерации правками того же сообщения (не чаще STREAM_EDIT_INTERVAL).
     """
+    answered = False
     try:
         # Извлекаем task_id из callback_data
         task_id = int(callback.data.split("_")[-1])
@@ -172,26 +322,48 @@ async def handle_task_respond(callback: CallbackQuery, task_service: TaskService
             )
             return
         
-        # Проверяем дубликат
-        has_responded = await task_service.has_user_responded(user_id, task_id)
-        if has_responded:
+        if task_id in await task_service.get_responded_task_ids(user_id):
             await callback.answer(
                 "⚠️ Вы уже откликались на это задание!",
                 show_alert=True
             )
             return
         
-        # Создаем отклик
-        response = await task_service.create_response(user_id, task_id)
-        user = await user_service.get_user_profile(user_id)
+        await callback.answer("✍️ Генерирую отклик...")
+        answered = True
+        
+        streamer = MessageStreamer(callback.message, interval=config.STREAM_EDIT_INTERVAL)
+        # Шаблонный отклик готов сразу: без заглушки и промежуточных правок
+        streaming = task_service.ai.backend is not None
+        header = f"✍️ <b>Пишу отклик...</b>\n\n<b>Задание:</b> {html.escape(task['title'])}\n\n"
+        if streaming:
+            await streamer.update(header + "<i>▌</i>", force=True)
+        
+        # Часть показывается, когда пришла следующая: итоговый текст (или
+        # готовый отклик из кеша) сразу уходит в finish без ожидания интервала
+        text = ""
+        async for chunk in task_service.ai.stream(task):
+            if streaming and text:
+                await streamer.update(f"{header}<i>{html.escape(text)}▌</i>")
+            text = chunk
+        
+        # Создаем отклик с показанным текстом (дубликат отклоняется на стороне БД)
+        try:
+            response, user = await task_service.create_response(user_id, task_id, response_text=text)
+        except DuplicateResponseError:
+            await streamer.finish(
+                "⚠️ Вы уже откликались на это задание!",
+                reply_markup=get_main_menu_keyboard()
+            )
+            return
         
         success_text = f"""
 ✅ <b>Отклик отправлен!</b>
 
-<b>Задание:</b> {task['title']}
+<b>Задание:</b> {html.escape(task['title'])}
 
 <b>Ваш отклик:</b>
-<i>{response.response_text}</i>
+<i>{html.escape(response.response_text)}</i>
 
 💰 <b>Заработано:</b> +{response.earned}₽
 💳 <b>Текущий баланс:</b> {user.balance}₽
@@ -199,71 +371,135 @@ async def handle_task_respond(callback: CallbackQuery, task_service: TaskService
 Продолжайте в том же духе! 🚀
 """
         
-        await callback.message.edit_text(
-            success_text,
-            reply_markup=get_main_menu_keyboard(),
-            parse_mode="HTML"
+        await streamer.finish(success_text, reply_markup=get_main_menu_keyboard())
+        logger.info(
+            f"Пользователь {user_id} откликнулся на задание {task_id} "
+            f"(правок: {streamer.edits}, пропущено: {streamer.skipped})"
         )
-        await callback.answer("✅ Отклик отправлен!", show_alert=False)
-        logger.info(f"Пользователь {user_id} откликнулся на задание {task_id}")
         
     except Exception as e:
         logger.error(f"Ошибка в handle_task_respond: {e}")
-        await callback.answer(
-            f"😔 Ошибка: {str(e)}",
-            show_alert=True
+        if not answered:
+            await callback.answer(
+                f"😔 Ошибка: {str(e)}",
+                show_alert=True
+            )
+            return
+        await callback.message.edit_text(
+            "😔 Не удалось отправить отклик. Попробуйте еще раз.",
+            reply_markup=get_main_menu_keyboard()
         )
 
 
+# Количество откликов на одной странице истории
+RESPONSES_PAGE_SIZE = 5
+
+
+async def _show_responses_page(
+    callback: CallbackQuery,
+    task_service: TaskService,
+    user_service: UserService,
+    page: int = 1,
+    cursor: str = None,
+    direction: str = "older"
+):
+    """
+    Показать страницу истории откликов
+    
+    Загружается только отображаемая страница (keyset-пагинация),
+    общее количество берется из агрегированной статистики
+    """
+    user_id = callback.from_user.id
+    
+    stats = await task_service.get_response_stats(user_id)
+    total = stats["total_responses"]
+    
+    if not total:
+        await callback.message.edit_text(
+            "📭 У вас пока нет откликов.\n\n"
+            "Используйте кнопку ниже, чтобы посмотреть доступные задания!",
+            reply_markup=get_main_menu_keyboard()
+        )
+        await callback.answer()
+        return
+    
+    total_pages = (total + RESPONSES_PAGE_SIZE - 1) // RESPONSES_PAGE_SIZE
+    if not cursor:
+        page = 1
+    page = max(1, min(page, total_pages))
+    
+    responses, prev_cursor, next_cursor = await task_service.get_responses_page(
+        user_id,
+        limit=RESPONSES_PAGE_SIZE,
+        cursor=cursor,
+        direction=direction
+    )
+    
+    # Формируем текст с откликами
+    responses_text = f"📜 <b>История ваших откликов ({total}):</b>\n\n"
+    
+    first_idx = (page - 1) * RESPONSES_PAGE_SIZE + 1
+    for idx, resp in enumerate(responses, first_idx):
+        timestamp = resp.created_at.strftime("%d.%m.%Y %H:%M") if resp.created_at else "Неизвестно"
+        responses_text += f"<b>{idx}. {html.escape(resp.task_title)}</b>\n"
+        responses_text += f"📅 {timestamp}\n"
+        responses_text += f"💬 <i>{html.escape(resp.response_text[:80])}...</i>\n"
+        responses_text += f"💰 Заработано: {resp.earned}₽\n"
+        responses_text += "─" * 30 + "\n\n"
+    
+    user = await user_service.get_user_profile(user_id)
+    responses_text += f"\n💳 <b>Общий баланс:</b> {user.balance}₽"
+    
+    await callback.message.edit_text(
+        responses_text,
+        reply_markup=get_responses_keyboard(page, total_pages, prev_cursor, next_cursor),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
 async def handle_my_responses(callback: CallbackQuery, task_service: TaskService, user_service: UserService):
     """
     Обработчик кнопки "Мои отклики"
     """
     try:
-        user_id = callback.from_user.id
-        
-        # Получаем отклики
-        responses = await task_service.get_user_responses(user_id)
-        
-        if not responses:
-            await callback.message.edit_text(
-                "📭 У вас пока нет откликов.\n\n"
-                "Используйте кнопку ниже, чтобы посмотреть доступные задания!",
-                reply_markup=get_main_menu_keyboard()
-            )
-            await callback.answer()
-            return
-        
-        # Формируем текст с откликами (показываем последние 5)
-        responses_text = f"📜 <b>История ваших откликов ({len(responses)}):</b>\n\n"
-        
-        for idx, resp in enumerate(responses[:5], 1):
-            timestamp = resp.created_at.strftime("%d.%m.%Y %H:%M") if resp.created_at else "Неизвестно"
-            responses_text += f"<b>{idx}. {resp.task_title}</b>\n"
-            responses_text += f"📅 {timestamp}\n"
-            responses_text += f"💬 <i>{resp.response_text[:80]}...</i>\n"
-            responses_text += f"💰 Заработано: {resp.earned}₽\n"
-            responses_text += "─" * 30 + "\n\n"
+        await _show_responses_page(callback, task_service, user_service)
+        logger.info(f"Пользователь {callback.from_user.id} просмотрел историю откликов")
         
-        user = await user_service.get_user_profile(user_id)
-        responses_text += f"\n💳 <b>Общий баланс:</b> {user.balance}₽"
-        
-        if len(responses) > 5:
-            responses_text += f"\n\n<i>Показаны последние 5 из {len(responses)} откликов</i>"
+    except Exception as e:
+        logger.error(f"Ошибка в handle_my_responses: {e}")
+        await callback.answer("😔 Ошибка загрузки откликов", show_alert=True)
+
+
+async def handle_responses_page(callback: CallbackQuery, task_service: TaskService, user_service: UserService):
+    """
+    Обработчик переключения страниц истории откликов
+    
+    Формат callback_data: responses_page_<page>_<o|n><cursor>
+    (o - страница старше курсора, n - новее курсора)
+    """
+    try:
+        parts = callback.data.split("_", 3)
+        page = int(parts[2])
+        cursor, direction = None, "older"
+        if len(parts) > 3 and parts[3]:
+            direction = "newer" if parts[3][0] == "n" else "older"
+            cursor = parts[3][1:]
         
-        await callback.message.edit_text(
-            responses_text,
-            reply_markup=get_responses_keyboard(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-        logger.info(f"Пользователь {user_id} просмотрел историю откликов")
+        await _show_responses_page(callback, task_service, user_service, page, cursor, direction)
         
     except Exception as e:
-        logger.error(f"Ошибка в handle_my_responses: {e}")
+        logger.error(f"Ошибка в handle_responses_page: {e}")
         await callback.answer("😔 Ошибка загрузки откликов", show_alert=True)
 
 
+async def handle_current_page(callback: CallbackQuery):
+    """
+    Обработчик кнопки с номером текущей страницы
+    """
+    await callback.answer()
+
+
 async def handle_settings(callback: CallbackQuery):
     """
     Обработчик кнопки "Настройки" (заглушка)
@@ -344,32 +580,30 @@ async def handle_already_responded(callback: CallbackQuery):
     )
 
 
-async def handle_auto_settings_soon(callback: CallbackQuery):
-    """Обработчик для настроек автозаработка (скоро)"""
-    await callback.answer(
-        "🔜 Настройки автоматизации будут доступны в версии 0.0.5!",
-        show_alert=True
-    )
-
-
 def register_handlers(router: Router):
     """Регистрация всех callback обработчиков"""
     # Главное меню
     router.callback_query.register(handle_main_menu, lambda c: c.data == "main_menu")
     router.callback_query.register(handle_auto_earn, lambda c: c.data == "auto_earn")
+    router.callback_query.register(handle_auto_earn_toggle, lambda c: c.data == "auto_earn_toggle")
+    router.callback_query.register(handle_auto_earn_limit, lambda c: c.data.startswith("auto_earn_limit_"))
     
     # Задания
     router.callback_query.register(handle_tasks_list, lambda c: c.data == "tasks_list")
+    router.callback_query.register(handle_tasks_page, lambda c: c.data.startswith("tasks_page_"))
+    router.callback_query.register(handle_tasks_categories, lambda c: c.data.startswith("tasks_categories_"))
+    router.callback_query.register(handle_tasks_budgets, lambda c: c.data.startswith("tasks_budgets_"))
     router.callback_query.register(handle_task_details, lambda c: c.data.startswith("task_details_"))
     router.callback_query.register(handle_task_respond, lambda c: c.data.startswith("task_respond_"))
     
     # Отклики
     router.callback_query.register(handle_my_responses, lambda c: c.data == "my_responses")
+    router.callback_query.register(handle_responses_page, lambda c: c.data.startswith("responses_page_"))
+    router.callback_query.register(handle_current_page, lambda c: c.data == "current_page")
     
     # Настройки
     router.callback_query.register(handle_settings, lambda c: c.data == "settings")
     router.callback_query.register(handle_about, lambda c: c.data == "about")
-    router.callback_query.register(handle_auto_settings_soon, lambda c: c.data == "auto_settings_soon")
     
     # Прочее
     router.callback_query.register(handle_already_responded, lambda c: c.data == "already_responded")
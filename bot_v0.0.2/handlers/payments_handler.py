@@ -3,13 +3,15 @@ Payments Handler
 Обработчик платежей через CryptoBot
 """
 
+import asyncio
 import logging
 from aiogram import Router
 from aiogram.types import CallbackQuery
 from payments.crypto import CryptoPaymentService
 from payments.freekassa import FreeKassaService
+from payments.invoice_poller import CRYPTO_CURRENCIES, InvoicePoller
+from database.storage import PAYMENT_LIST_COLUMNS
 from services.user_service import UserService
-from services.exchange_service import convert_to_rub
 from ui.menus import (
     get_payment_menu,
     get_ton_amount_menu,
@@ -22,9 +24,9 @@ logger = logging.getLogger(__name__)
 
 router = Router()
 
-# Временное хранилище для счетов (в production использовать Redis или БД)
-pending_invoices = {}
-
+# Сколько ждать цикла сверки счетов, прежде чем ответить на нажатие
+# (Telegram ждет ответа на callback не дольше ~15 секунд)
+PAYMENT_CHECK_TIMEOUT = 3.0
 
 async def show_payment_menu(callback: CallbackQuery):
     """Показать меню выбора способа оплаты"""
@@ -136,13 +138,7 @@ async def create_crypto_invoice(
             )
             return
         
-        # Сохраняем счет
         invoice_id = invoice.get("invoice_id") or invoice.get('id')
-        pending_invoices[str(invoice_id)] = {
-            "user_id": user_id,
-            "amount": amount,
-            "currency": currency
-        }
 
         # Сохраняем в Supabase
         try:
@@ -203,82 +199,56 @@ async def create_crypto_invoice(
 async def check_payment_status(
     callback: CallbackQuery,
     crypto_service: CryptoPaymentService,
-    user_service: UserService
+    user_service: UserService,
+    invoice_poller: InvoicePoller
 ):
-    """Проверить статус платежа и зачислить баланс при успешной оплате"""
+    """
+    Проверить статус последнего платежа пользователя
+    
+    Статус счета проверяет фоновая сверка (один запрос getInvoices на
+    все неоплаченные счета); нажатие лишь запускает ближайший цикл и
+    ждет его не дольше PAYMENT_CHECK_TIMEOUT, зачисление выполняет
+    InvoicePoller.settle().
+    """
     try:
         user_id = callback.from_user.id
         
-        # Находим счет пользователя (сначала в памяти, иначе в БД)
-        user_invoice = None
-        invoice_id = None
-
-        for inv_id, inv_data in pending_invoices.items():
-            if inv_data["user_id"] == user_id:
-                user_invoice = inv_data
-                invoice_id = inv_id
-                break
-
-        # Если в памяти не найдено, попробуем найти последний pending платёж в БД
-        if not user_invoice:
-            try:
-                payments = await user_service.db.get_payments_by_user(user_id)
-                for p in payments:
-                    if p.get('status') == 'pending':
-                        user_invoice = p
-                        invoice_id = p.get('tx_id')
-                        break
-            except Exception:
-                pass
-        
-        if not user_invoice:
+        payments = await user_service.db.get_payments_by_user(user_id, limit=1, columns=PAYMENT_LIST_COLUMNS)
+        payment = payments[0] if payments else None
+        if not payment:
             await callback.answer(
                 "❌ Счет не найден",
                 show_alert=True
             )
             return
         
-        # Проверяем статус
-        status = await crypto_service.check_invoice_status(invoice_id)
+        invoice_id = payment['tx_id']
+        currency = payment['currency']
         
-        if status == "paid":
-            # Платеж прошел - начисляем баланс
-            amount_crypto = user_invoice["amount"] if isinstance(user_invoice, dict) else float(user_invoice.get('amount', 0))
-            currency = user_invoice["currency"] if isinstance(user_invoice, dict) else user_invoice.get('currency', 'TON')
-            
-            # Конвертируем в рубли с использованием текущего курса
+        if payment['status'] == 'pending' and currency in CRYPTO_CURRENCIES:
+            if not invoice_poller:
+                await callback.answer("😔 Проверка платежей недоступна", show_alert=True)
+                return
             try:
-                amount_rub = await convert_to_rub(amount_crypto, currency)
-            except Exception as e:
-                logger.warning(f"Error converting {currency} to RUB: {e}. Using fallback.")
-                # Fallback: для TON используем 50₽
-                if currency == 'TON':
-                    amount_rub = amount_crypto * 50
-                elif currency == 'USDT':
-                    amount_rub = amount_crypto * 100
-                elif currency == 'BTC':
-                    amount_rub = amount_crypto * 2500000
-                else:
-                    amount_rub = amount_crypto  # As is
-
-            # Обновляем баланс
-            await user_service.update_balance(user_id, amount_rub)
-
-            # Удаляем счет из pending
-            if invoice_id in pending_invoices:
-                del pending_invoices[invoice_id]
-
-            # Обновляем запись в БД
-            try:
-                await user_service.db.update_payment_status(tx_id=str(invoice_id), updates={"status": "paid"})
-            except Exception:
-                pass
-
+                # shield: цикл сверки доводится до конца и после таймаута
+                await asyncio.wait_for(asyncio.shield(invoice_poller.refresh()), PAYMENT_CHECK_TIMEOUT)
+            except asyncio.TimeoutError:
+                await callback.answer(
+                    "⏳ Проверяем платеж... Нажмите кнопку еще раз через несколько секунд.",
+                    show_alert=True
+                )
+                return
+            payment = await user_service.db.get_payment_by_tx(invoice_id) or payment
+        
+        status = payment['status']
+        
+        if status == "paid":
+            user = await user_service.get_user_profile(user_id)
             text = f"""
 ✅ <b>Платеж успешно получен!</b>
 
-💰 Зачислено: <b>{amount_rub:.2f}₽</b>
-💱 Обменный курс: 1 {currency} = ~{amount_rub/amount_crypto:.2f}₽
+💰 Оплачено: <b>{float(payment['amount']):g} {currency}</b>
+💳 Текущий баланс: <b>{user.balance:.2f}₽</b>
 
 Спасибо за пополнение! 🎉
 """
@@ -290,7 +260,7 @@ async def check_payment_status(
             await callback.answer("✅ Баланс пополнен!", show_alert=False)
             logger.info(f"Платеж {invoice_id} подтвержден для пользователя {user_id}")
             
-        elif status == "active":
+        elif status == "pending":
             await callback.answer(
                 "⏳ Платеж еще не получен. Пожалуйста, завершите оплату.",
                 show_alert=True
@@ -301,7 +271,6 @@ async def check_payment_status(
                 "⏱ Срок действия счета истек. Создайте новый счет.",
                 show_alert=True
             )
-            del pending_invoices[invoice_id]
             
         else:
             await callback.answer(
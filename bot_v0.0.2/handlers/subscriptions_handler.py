@@ -0,0 +1,156 @@
+"""
+Subscriptions Handler
+Обработчик подписок на новые задания
+"""
+
+import logging
+from typing import Tuple
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+from services.user_service import UserService
+from services.subscription_service import SubscriptionService, format_subscription
+from keyboards.inline_keyboards import get_subscriptions_keyboard
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+SUBSCRIBE_HELP = """
+🔔 <b>Подписки на новые задания</b>
+
+Бот пришлет уведомление, как только появится подходящее задание.
+
+<b>Примеры:</b>
+/subscribe статья кофейня — по ключевым словам
+/subscribe Переводы — по категории
+/subscribe Копирайтинг от 1000 — категория и минимальный бюджет
+/subscribe seo описание от 300
+
+Управление подписками: /unsubscribe
+"""
+
+
+async def _subscriptions_view(subscription_service: SubscriptionService, user_id: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Текст и клавиатура со списком подписок пользователя
+    """
+    subscriptions = await subscription_service.get_user_subscriptions(user_id)
+    
+    if not subscriptions:
+        text = "🔕 У вас нет подписок.\n" + SUBSCRIBE_HELP
+    else:
+        text = f"🔔 <b>Ваши подписки ({len(subscriptions)}):</b>\n\n"
+        for idx, subscription in enumerate(subscriptions, 1):
+            text += f"<b>{idx}.</b> {format_subscription(subscription)}\n"
+    
+    return text, get_subscriptions_keyboard(subscriptions)
+
+
+async def cmd_subscribe(
+    message: Message,
+    command: CommandObject,
+    user_service: UserService,
+    subscription_service: SubscriptionService
+):
+    """
+    Обработчик команды /subscribe <категории, слова, от N>
+    
+    Создает подписку на новые задания
+    """
+    user_id = message.from_user.id
+    
+    try:
+        # Проверяем регистрацию
+        is_registered = await user_service.is_user_registered(user_id)
+        
+        if not is_registered:
+            await message.answer(
+                "⚠️ Вы не зарегистрированы. Используйте /start для регистрации."
+            )
+            return
+        
+        query = (command.args or "").strip()
+        if not query:
+            await message.answer(SUBSCRIBE_HELP, parse_mode="HTML")
+            return
+        
+        try:
+            subscription = await subscription_service.subscribe(user_id, query)
+        except ValueError as e:
+            await message.answer(f"❌ {e}")
+            return
+        
+        await message.answer(
+            f"✅ <b>Подписка оформлена!</b>\n\n{format_subscription(subscription)}\n\n"
+            "Мы сообщим о новых подходящих заданиях. Управление: /unsubscribe",
+            parse_mode="HTML"
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в cmd_subscribe для пользователя {user_id}: {e}")
+        await message.answer(
+            "😔 Ошибка оформления подписки. Попробуйте позже."
+        )
+
+
+async def cmd_unsubscribe(message: Message, subscription_service: SubscriptionService):
+    """
+    Обработчик команды /unsubscribe
+    
+    Показывает подписки с кнопками удаления
+    """
+    user_id = message.from_user.id
+    
+    try:
+        text, keyboard = await _subscriptions_view(subscription_service, user_id)
+        await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в cmd_unsubscribe для пользователя {user_id}: {e}")
+        await message.answer(
+            "😔 Ошибка получения подписок. Попробуйте позже."
+        )
+
+
+async def handle_subscriptions(callback: CallbackQuery, subscription_service: SubscriptionService):
+    """
+    Обработчик кнопки "Мои подписки"
+    """
+    try:
+        text, keyboard = await _subscriptions_view(subscription_service, callback.from_user.id)
+        await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+        await callback.answer()
+        
+    except Exception as e:
+        logger.error(f"Ошибка в handle_subscriptions: {e}")
+        await callback.answer("😔 Ошибка загрузки подписок", show_alert=True)
+
+
+async def handle_unsubscribe(callback: CallbackQuery, subscription_service: SubscriptionService):
+    """
+    Обработчик кнопок удаления подписки
+    
+    Формат callback_data: unsubscribe_<id|all>
+    """
+    user_id = callback.from_user.id
+    
+    try:
+        target = callback.data.split("_", 1)[1]
+        removed = await subscription_service.unsubscribe(user_id, None if target == "all" else int(target))
+        
+        text, keyboard = await _subscriptions_view(subscription_service, user_id)
+        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+        await callback.answer(f"🗑 Удалено подписок: {removed}")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в handle_unsubscribe для пользователя {user_id}: {e}")
+        await callback.answer("😔 Ошибка удаления подписки", show_alert=True)
+
+
+def register_handlers(router: Router):
+    """Регистрация обработчиков subscriptions handler"""
+    router.message.register(cmd_subscribe, Command("subscribe"))
+    router.message.register(cmd_unsubscribe, Command("unsubscribe"))
+    router.callback_query.register(handle_subscriptions, lambda c: c.data == "subscriptions")
+    router.callback_query.register(handle_unsubscribe, lambda c: c.data.startswith("unsubscribe_"))
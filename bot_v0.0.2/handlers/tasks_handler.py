@@ -3,18 +3,103 @@ Tasks Handler
 Обработчик команд для работы с заданиями
 """
 
+import html
 import logging
+from typing import AbstractSet, Optional, Tuple
 from aiogram import Router
-from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.filters import Command, CommandObject
+from aiogram.types import InlineKeyboardMarkup, Message
 from services.task_service import TaskService
+from services.task_catalog import category_key
 from services.user_service import UserService
-from keyboards.inline_keyboards import get_tasks_keyboard, get_main_menu_keyboard
+from database.exceptions import DuplicateResponseError
+from keyboards.inline_keyboards import (
+    TASK_BUDGET_RANGES,
+    get_tasks_keyboard,
+    get_tasks_page_keyboard,
+    get_main_menu_keyboard
+)
 
 logger = logging.getLogger(__name__)
 
 router = Router()
 
+# Количество заданий на одной странице списка
+TASKS_PAGE_SIZE = 8
+
+
+def build_tasks_page(
+    task_service: TaskService,
+    category_token: Optional[str] = None,
+    budget_token: Optional[str] = None,
+    cursor: Optional[str] = None,
+    direction: str = "next",
+    responded: AbstractSet[int] = frozenset()
+) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Собрать страницу списка заданий
+    
+    Страница выбирается срезом индекса каталога, поэтому стоимость
+    не зависит от общего числа заданий.
+    
+    Args:
+        task_service: Сервис заданий
+        category_token: Ключ категории из callback_data (None - все)
+        budget_token: Индекс диапазона из TASK_BUDGET_RANGES (None - любой)
+        cursor: Курсор задания, от которого листать
+        direction: "next" - следующая страница, "prev" - предыдущая
+        responded: ID заданий с откликом пользователя (TaskService.get_responded_task_ids)
+        
+    Returns:
+        Tuple (текст сообщения, клавиатура)
+    """
+    category = None
+    if category_token:
+        category = next(
+            (c for c in task_service.get_available_categories() if category_key(c) == category_token),
+            None
+        )
+        if category is None:
+            category_token = None
+    
+    budget_label, min_budget, max_budget = "любой", None, None
+    if budget_token and budget_token.isdigit() and int(budget_token) < len(TASK_BUDGET_RANGES):
+        budget_label, min_budget, max_budget = TASK_BUDGET_RANGES[int(budget_token)]
+    else:
+        budget_token = None
+    
+    tasks, prev_cursor, next_cursor, offset, total = task_service.get_tasks_page(
+        category, min_budget, max_budget,
+        limit=TASKS_PAGE_SIZE,
+        cursor=cursor,
+        direction=direction
+    )
+    
+    page = offset // TASKS_PAGE_SIZE + 1
+    total_pages = max(1, (total + TASKS_PAGE_SIZE - 1) // TASKS_PAGE_SIZE)
+    
+    filters = f"🏷 {html.escape(category) if category else 'Все категории'} · 💰 {budget_label}"
+    if total:
+        tasks_text = f"""
+📋 <b>Доступные задания ({total})</b>
+{filters}
+
+Выберите задание, чтобы увидеть детали и откликнуться
+(✅ - вы уже откликнулись):
+"""
+    else:
+        tasks_text = f"""
+📭 <b>Заданий не найдено</b>
+{filters}
+
+Измените фильтры или загляните позже!
+"""
+    
+    keyboard = get_tasks_page_keyboard(
+        tasks, page, total_pages, category_token, budget_token, prev_cursor, next_cursor, responded
+    )
+    return tasks_text, keyboard
+
 
 async def cmd_tasks(message: Message, task_service: TaskService, user_service: UserService):
     """
@@ -34,33 +119,72 @@ async def cmd_tasks(message: Message, task_service: TaskService, user_service: U
             )
             return
         
-        # Получаем список заданий
-        tasks = task_service.get_all_tasks()
+        responded = await task_service.get_responded_task_ids(user_id)
+        tasks_text, keyboard = build_tasks_page(task_service, responded=responded)
         
-        if not tasks:
+        await message.answer(
+            tasks_text,
+            reply_markup=keyboard,
+            parse_mode="HTML"
+        )
+        logger.info(f"Пользователь {user_id} просмотрел список заданий")
+        
+    except Exception as e:
+        logger.error(f"Ошибка в cmd_tasks для пользователя {user_id}: {e}")
+        await message.answer(
+            "😔 Ошибка получения списка заданий. Попробуйте позже."
+        )
+
+
+async def cmd_search(message: Message, command: CommandObject, task_service: TaskService, user_service: UserService):
+    """
+    Обработчик команды /search <запрос>
+    
+    Ищет задания по ключевым словам в заголовке и описании
+    """
+    user_id = message.from_user.id
+    
+    try:
+        # Проверяем регистрацию
+        is_registered = await user_service.is_user_registered(user_id)
+        
+        if not is_registered:
             await message.answer(
-                "📭 Пока нет доступных заданий. Загляните позже!",
-                reply_markup=get_main_menu_keyboard()
+                "⚠️ Вы не зарегистрированы. Используйте /start для регистрации."
             )
             return
         
-        tasks_text = f"""
-📋 <b>Доступные задания ({len(tasks)})</b>
-
-Выберите задание, чтобы увидеть детали и откликнуться:
-"""
+        query = (command.args or "").strip()
+        if not query:
+            await message.answer(
+                "🔎 Укажите, что искать!\n"
+                "Пример: /search статья для кофейни"
+            )
+            return
+        
+        tasks = task_service.search_tasks(query)
+        
+        if not tasks:
+            await message.answer(
+                f"📭 По запросу «{html.escape(query)}» ничего не найдено.\n"
+                "Попробуйте другие слова или /tasks для просмотра всех заданий.",
+                reply_markup=get_main_menu_keyboard(),
+                parse_mode="HTML"
+            )
+            return
         
         await message.answer(
-            tasks_text,
-            reply_markup=get_tasks_keyboard(tasks),
+            f"🔎 <b>Найдено по запросу «{html.escape(query)}»: {len(tasks)}</b>\n\n"
+            "Выберите задание, чтобы увидеть детали и откликнуться:",
+            reply_markup=get_tasks_keyboard(tasks, await task_service.get_responded_task_ids(user_id)),
             parse_mode="HTML"
         )
-        logger.info(f"Пользователь {user_id} просмотрел список заданий")
+        logger.info(f"Пользователь {user_id} выполнил поиск заданий: {query}")
         
     except Exception as e:
-        logger.error(f"Ошибка в cmd_tasks для пользователя {user_id}: {e}")
+        logger.error(f"Ошибка в cmd_search для пользователя {user_id}: {e}")
         await message.answer(
-            "😔 Ошибка получения списка заданий. Попробуйте позже."
+            "😔 Ошибка поиска заданий. Попробуйте позже."
         )
 
 
@@ -104,23 +228,20 @@ async def cmd_respond(message: Message, task_service: TaskService, user_service:
             await message.answer(f"❌ Задание с ID {task_id} не найдено!")
             return
         
-        # Проверяем, не откликался ли уже
-        has_responded = await task_service.has_user_responded(user_id, task_id)
-        if has_responded:
+        # Создаем отклик (дубликат отклоняется на стороне БД)
+        try:
+            response, user = await task_service.create_response(user_id, task_id)
+        except DuplicateResponseError:
             await message.answer("⚠️ Вы уже откликались на это задание!")
             return
         
-        # Создаем отклик
-        response = await task_service.create_response(user_id, task_id)
-        user = await user_service.get_user_profile(user_id)
-        
         success_text = f"""
 ✅ <b>Отклик отправлен!</b>
 
-<b>Задание:</b> {task['title']}
+<b>Задание:</b> {html.escape(task['title'])}
 
 <b>Ваш отклик:</b>
-<i>{response.response_text}</i>
+<i>{html.escape(response.response_text)}</i>
 
 💰 <b>Заработано:</b> +{response.earned}₽
 💳 <b>Текущий баланс:</b> {user.balance}₽
@@ -160,8 +281,9 @@ async def cmd_my_responses(message: Message, task_service: TaskService, user_ser
             )
             return
         
-        # Получаем отклики
-        responses = await task_service.get_user_responses(user_id)
+        # Получаем только последние 10 откликов и общее количество
+        stats = await task_service.get_response_stats(user_id)
+        responses, _, _ = await task_service.get_responses_page(user_id, limit=10)
         
         if not responses:
             await message.answer(
@@ -172,13 +294,13 @@ async def cmd_my_responses(message: Message, task_service: TaskService, user_ser
             return
         
         # Формируем текст с откликами
-        responses_text = f"📜 <b>История ваших откликов ({len(responses)}):</b>\n\n"
+        responses_text = f"📜 <b>История ваших откликов ({stats['total_responses']}):</b>\n\n"
         
-        for idx, resp in enumerate(responses[:10], 1):  # Показываем последние 10
+        for idx, resp in enumerate(responses, 1):  # Показываем последние 10
             timestamp = resp.created_at.strftime("%d.%m.%Y %H:%M") if resp.created_at else "Неизвестно"
-            responses_text += f"<b>{idx}. {resp.task_title}</b>\n"
+            responses_text += f"<b>{idx}. {html.escape(resp.task_title)}</b>\n"
             responses_text += f"📅 {timestamp}\n"
-            responses_text += f"💬 <i>{resp.response_text[:100]}...</i>\n"
+            responses_text += f"💬 <i>{html.escape(resp.response_text[:100])}...</i>\n"
             responses_text += f"💰 Заработано: {resp.earned}₽\n"
             responses_text += "─" * 30 + "\n\n"
         
@@ -202,5 +324,6 @@ async def cmd_my_responses(message: Message, task_service: TaskService, user_ser
 def register_handlers(router: Router):
     """Регистрация обработчиков tasks handler"""
     router.message.register(cmd_tasks, Command("tasks"))
+    router.message.register(cmd_search, Command("search"))
     router.message.register(cmd_respond, Command("respond"))
     router.message.register(cmd_my_responses, Command("my_responses"))
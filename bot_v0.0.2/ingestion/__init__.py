@@ -0,0 +1,9 @@
+"""
+Ingestion Module
+Загрузка заданий с внешних бирж фриланса
+"""
+
+from .sources import ExchangeSource, HttpJsonSource, FlRuSource, KworkSource
+from .pipeline import IngestionPipeline
+
+__all__ = ['ExchangeSource', 'HttpJsonSource', 'FlRuSource', 'KworkSource', 'IngestionPipeline']
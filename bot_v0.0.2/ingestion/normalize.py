@@ -0,0 +1,119 @@
+"""
+Task Normalization
+Приведение заданий внешних бирж к схеме каталога
+"""
+
+import html
+import re
+import zlib
+from typing import Any, Dict, Optional
+
+# ID заданий с бирж начинаются отсюда, чтобы не пересекаться со встроенным
+# каталогом, и помещаются в INTEGER колонки responses.task_id
+EXTERNAL_ID_BASE = 1_000_000
+EXTERNAL_ID_SPAN = 2**31 - 1 - EXTERNAL_ID_BASE
+
+# Ограничения длины полей для отображения в Telegram
+MAX_TITLE_LENGTH = 200
+MAX_DESCRIPTION_LENGTH = 1000
+
+# Категория по ключевым словам (категории совпадают с шаблонами AIService)
+CATEGORY_KEYWORDS = (
+    ("Переводы", ("перевод", "translat", "локализ")),
+    ("SMM", ("smm", "пост", "соцсет", "instagram", "telegram", "vk", "linkedin", "таргет")),
+    ("Креатив", ("слоган", "нейминг", "креатив", "назван", "логотип", "дизайн")),
+    ("Копирайтинг", ("текст", "статья", "копирайт", "рерайт", "описание", "seo", "контент")),
+)
+DEFAULT_CATEGORY = "Копирайтинг"
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+# Число, в том числе с группами разрядов через пробел ("1 500 000"); соседние
+# числа ("1500 3000") не склеиваются
+_NUMBER_RE = re.compile(r"\d{1,3}(?:[ \u00a0\u202f]\d{3})+(?!\d)|\d+")
+
+
+def external_task_id(source: str, source_id: str) -> int:
+    """
+    ID задания с биржи из crc32 (биржа, ID на бирже)
+
+    При коллизии конвейер берет следующий свободный ID и закрепляет его
+    в хранилище (см. IngestionPipeline).
+
+    Args:
+        source: Название биржи
+        source_id: ID задания на бирже
+
+    Returns:
+        Целое число в диапазоне [EXTERNAL_ID_BASE, 2^31)
+    """
+    digest = zlib.crc32(f"{source}:{source_id}".encode("utf-8"))
+    return EXTERNAL_ID_BASE + digest % EXTERNAL_ID_SPAN
+
+
+def clean_text(value: Any, limit: int) -> str:
+    """Убрать HTML, схлопнуть пробелы и обрезать до limit символов"""
+    if value is None:
+        return ""
+    text = _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", str(value)))).strip()
+    if len(text) > limit:
+        text = text[:limit - 1].rstrip() + "…"
+    return text
+
+
+def parse_budget(value: Any) -> int:
+    """
+    Бюджет в рублях из числа или строки вида "5 000 руб."
+
+    Returns:
+        Бюджет (0, если не указан или договорной)
+    """
+    if isinstance(value, (int, float)):
+        return max(int(value), 0)
+    if not value:
+        return 0
+    match = _NUMBER_RE.search(str(value))
+    if not match:
+        return 0
+    return int(re.sub(r"\D", "", match.group()))
+
+
+def detect_category(title: str, description: str, raw_category: Optional[str] = None) -> str:
+    """Категория каталога по категории биржи, заголовку и описанию"""
+    haystack = f"{raw_category or ''} {title} {description}".lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in haystack for keyword in keywords):
+            return category
+    return DEFAULT_CATEGORY
+
+
+def normalize_exchange_task(source: str, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Привести задание биржи к схеме каталога
+
+    Args:
+        source: Название биржи
+        raw: Задание в общем формате адаптеров
+            (source_id, title, description, budget, category, url)
+
+    Returns:
+        Словарь задания каталога или None, если в задании нет ID или заголовка
+    """
+    source_id = raw.get("source_id")
+    title = clean_text(raw.get("title"), MAX_TITLE_LENGTH)
+    if source_id in (None, "") or not title:
+        return None
+
+    source_id = str(source_id)
+    description = clean_text(raw.get("description"), MAX_DESCRIPTION_LENGTH)
+
+    return {
+        "id": external_task_id(source, source_id),
+        "title": title,
+        "description": description,
+        "budget": parse_budget(raw.get("budget")),
+        "category": detect_category(title, description, raw.get("category")),
+        "source": source,
+        "source_id": source_id,
+        "url": raw.get("url") or ""
+    }
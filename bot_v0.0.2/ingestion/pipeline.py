@@ -0,0 +1,304 @@
+"""
+Ingestion Pipeline
+Конвейер загрузки заданий с бирж в каталог
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import aiohttp
+from database.storage import Storage
+from ingestion.normalize import normalize_exchange_task, EXTERNAL_ID_BASE, EXTERNAL_ID_SPAN
+from ingestion.sources import ExchangeSource
+from services.task_service import TaskService
+
+logger = logging.getLogger(__name__)
+
+# Сигнал остановки для потребителя очереди
+_STOP = object()
+
+# Сколько следующих ID пробовать при коллизиях crc32 за одну публикацию
+MAX_ID_PROBES = 8
+
+
+class IngestionPipeline:
+    """
+    Конвейер заданий с бирж
+
+    Для каждой биржи работает свой производитель, который опрашивает
+    адаптер и кладет сырые задания в общую ограниченную очередь: если
+    потребитель не успевает, put() ждет и опрос биржи притормаживает.
+    Один потребитель нормализует задания, отбрасывает повторы по
+    (биржа, ID на бирже) и публикует их в TaskService пачками
+    (по batch_size или раз в flush_interval секунд).
+
+    ID задания в каталоге закрепляется в хранилище (external_tasks) при
+    первом появлении задания: crc32 от (биржа, ID на бирже), а при
+    коллизии - следующий свободный. Поэтому ID не зависит от порядка
+    поступления заданий и не меняется после перезапуска.
+    """
+
+    def __init__(
+        self,
+        task_service: TaskService,
+        db_client: Storage,
+        sources: Sequence[ExchangeSource],
+        queue_size: int = 1000,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        dedupe_size: int = 100_000,
+        timeout: float = 15.0
+    ):
+        """
+        Args:
+            task_service: Сервис, в каталог которого публикуются задания
+            db_client: Хранилище закрепленных ID заданий
+            sources: Адаптеры бирж
+            queue_size: Емкость очереди сырых заданий
+            batch_size: Максимальный размер пачки публикации
+            flush_interval: Максимальная задержка публикации в секундах
+            dedupe_size: Сколько последних заданий помнить для дедупликации
+            timeout: Таймаут HTTP запроса к бирже в секундах
+        """
+        self.task_service = task_service
+        self.db = db_client
+        self.sources = list(sources)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dedupe_size = dedupe_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # (биржа, ID на бирже) -> (отпечаток содержимого, ID в каталоге)
+        self._seen: "OrderedDict[Tuple[str, str], Tuple[int, int]]" = OrderedDict()
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._producers: List[asyncio.Task] = []
+        self._consumer: Optional[asyncio.Task] = None
+        self._started_at = 0.0
+
+        self.received = 0
+        self.published = 0
+        self.registered = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    # ========================================================================
+    # ЗАПУСК И ОСТАНОВКА
+    # ========================================================================
+
+    async def start(self):
+        """Запустить опрос бирж и публикацию заданий"""
+        if self._consumer is not None:
+            return
+
+        self._session = aiohttp.ClientSession(
+            timeout=self.timeout,
+            connector=aiohttp.TCPConnector(limit=len(self.sources) * 2, ttl_dns_cache=300)
+        )
+        self._started_at = time.monotonic()
+        self._consumer = asyncio.create_task(self._consume())
+        self._producers = [asyncio.create_task(self._produce(source)) for source in self.sources]
+        logger.info(f"Конвейер заданий запущен: {', '.join(s.name for s in self.sources)}")
+
+    async def stop(self):
+        """Остановить опрос бирж, опубликовать накопленное и закрыть сессию"""
+        for producer in self._producers:
+            producer.cancel()
+        await asyncio.gather(*self._producers, return_exceptions=True)
+        self._producers = []
+
+        if self._consumer is not None:
+            await self._queue.put(_STOP)
+            await self._consumer
+            self._consumer = None
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        logger.info(f"Конвейер заданий остановлен: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Статистика конвейера
+
+        Returns:
+            Словарь со счетчиками, глубиной очереди и скоростью публикации
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "received": self.received,
+            "published": self.published,
+            "registered": self.registered,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "queue": self._queue.qsize(),
+            "published_per_minute": self.published / elapsed * 60 if elapsed else 0.0
+        }
+
+    # ========================================================================
+    # ПРОИЗВОДИТЕЛИ
+    # ========================================================================
+
+    async def _produce(self, source: ExchangeSource):
+        """Опрашивать биржу и класть задания в очередь"""
+        failures = 0
+        while True:
+            try:
+                count = 0
+                async for raw in source.fetch(self._session):
+                    # Ждет, если очередь заполнена (backpressure)
+                    await self._queue.put((source.name, raw))
+                    count += 1
+                logger.debug(f"{source.name}: получено {count} заданий")
+                failures = 0
+                delay = source.poll_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                delay = min(source.poll_interval * 2 ** failures, 600)
+                logger.warning(f"Ошибка опроса {source.name} (попытка {failures}), повтор через {delay:.0f} с: {e}")
+
+            await asyncio.sleep(delay)
+
+    # ========================================================================
+    # ПОТРЕБИТЕЛЬ
+    # ========================================================================
+
+    async def _consume(self):
+        """Нормализовать, дедуплицировать и публиковать задания пачками"""
+        loop = asyncio.get_running_loop()
+        batch: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        deadline = 0.0
+
+        while True:
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            elif batch:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    item = None
+            else:
+                item = await self._queue.get()
+
+            if item is _STOP:
+                await self._publish(batch)
+                return
+
+            if item is not None:
+                self.received += 1
+                task = self._accept(*item)
+                if task is not None:
+                    if not batch:
+                        deadline = loop.time() + self.flush_interval
+                    batch[(task["source"], task["source_id"])] = task
+
+            if batch and (len(batch) >= self.batch_size or loop.time() >= deadline):
+                await self._publish(batch)
+                batch = {}
+                # Отдаем управление обработчикам update между пачками
+                await asyncio.sleep(0)
+
+    def _accept(self, source: str, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Нормализовать задание и проверить, новое ли оно
+
+        Returns:
+            Задание для публикации или None (некорректное или повтор)
+        """
+        try:
+            task = normalize_exchange_task(source, raw)
+        except Exception as e:
+            logger.debug(f"Не удалось нормализовать задание {source}: {e}")
+            task = None
+        if task is None:
+            self.invalid += 1
+            return None
+
+        previous = self._seen.get((source, task["source_id"]))
+        if previous is not None:
+            self._seen.move_to_end((source, task["source_id"]))
+            if previous[0] == self._fingerprint(task):
+                self.duplicates += 1
+                return None
+            task["id"] = previous[1]
+        return task
+
+    @staticmethod
+    def _fingerprint(task: Dict[str, Any]) -> int:
+        """Отпечаток содержимого задания (изменение - повод опубликовать заново)"""
+        return hash((task["title"], task["description"], task["budget"], task["category"], task["url"]))
+
+    async def _claim_ids(self, claims: List[Tuple[str, str, int]]) -> Dict[Tuple[str, str], Tuple[int, bool]]:
+        """
+        Закрепить ID за новыми заданиями; при коллизии crc32 предложить следующий
+
+        Args:
+            claims: Список (биржа, ID на бирже, ID из crc32)
+
+        Returns:
+            (биржа, ID на бирже) -> (ID, True если задание появилось впервые)
+        """
+        claimed: Dict[Tuple[str, str], Tuple[int, bool]] = {}
+        for _ in range(MAX_ID_PROBES):
+            if not claims:
+                break
+            result = await self.db.claim_external_task_ids(claims)
+            claimed.update(result)
+            claims = [
+                (source, source_id, EXTERNAL_ID_BASE + (task_id - EXTERNAL_ID_BASE + 1) % EXTERNAL_ID_SPAN)
+                for source, source_id, task_id in claims
+                if (source, source_id) not in result
+            ]
+        if claims:
+            logger.warning(f"Не удалось закрепить ID {len(claims)} заданий за {MAX_ID_PROBES} попыток")
+        return claimed
+
+    async def _publish(self, batch: Dict[Tuple[str, str], Dict[str, Any]]):
+        """
+        Закрепить ID новых заданий и опубликовать пачку в каталог
+
+        Подписчикам сообщается только о заданиях, чей ID закреплен этой
+        пачкой: задания, которые уже были до перезапуска, публикуются в
+        каталог без уведомлений.
+        """
+        if not batch:
+            return
+        claims = [(key[0], key[1], task["id"]) for key, task in batch.items() if key not in self._seen]
+        try:
+            claimed = await self._claim_ids(claims)
+        except Exception as e:
+            # Задания без ID пропускаются и придут снова при следующем опросе биржи
+            logger.error(f"Ошибка закрепления ID {len(claims)} заданий: {e}")
+            claimed = {}
+
+        tasks = []
+        new_ids = set()
+        for key, task in batch.items():
+            previous = self._seen.get(key)
+            if previous is not None:
+                task["id"] = previous[1]
+            elif key in claimed:
+                task["id"], created = claimed[key]
+                if created:
+                    new_ids.add(task["id"])
+            else:
+                continue
+            self._seen[key] = (self._fingerprint(task), task["id"])
+            tasks.append(task)
+        while len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+
+        if not tasks:
+            return
+        try:
+            self.task_service.publish_tasks(tasks, new_ids)
+            self.published += len(tasks)
+            self.registered += len(new_ids)
+        except Exception as e:
+            logger.error(f"Ошибка публикации {len(tasks)} заданий: {e}")
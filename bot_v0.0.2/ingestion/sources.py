@@ -0,0 +1,132 @@
+"""
+Exchange Sources
+Адаптеры бирж фриланса для конвейера заданий
+"""
+
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeSource(Protocol):
+    """
+    Адаптер биржи
+
+    Адаптер выдает задания в общем формате:
+    {source_id, title, description, budget, category, url}.
+    Дальнейшая нормализация и дедупликация выполняются конвейером.
+    """
+
+    name: str
+    poll_interval: float
+
+    def fetch(self, session: aiohttp.ClientSession) -> AsyncIterator[Dict[str, Any]]:
+        """Получить свежие задания биржи через общую HTTP сессию конвейера"""
+        ...
+
+
+class HttpJsonSource:
+    """
+    Адаптер JSON ленты заданий с постраничной выдачей
+
+    Запрашивает base_url?page=1..max_pages и останавливается на пустой
+    странице. Поля записи переводятся в общий формат по field_map.
+    """
+
+    name = "exchange"
+
+    # Поле общего формата -> поле записи биржи
+    field_map: Dict[str, str] = {
+        "source_id": "id",
+        "title": "title",
+        "description": "description",
+        "budget": "budget",
+        "category": "category",
+        "url": "url"
+    }
+
+    # Ключ списка заданий в ответе (None - ответ сам является списком)
+    items_key: Optional[str] = "items"
+
+    def __init__(self, base_url: str, poll_interval: float = 60.0, max_pages: int = 5, name: Optional[str] = None):
+        """
+        Args:
+            base_url: URL JSON ленты заданий
+            poll_interval: Пауза между опросами в секундах
+            max_pages: Максимум страниц за один опрос
+            name: Название источника (по умолчанию из класса)
+        """
+        self.poll_interval = poll_interval
+        self.base_url = base_url
+        self.max_pages = max_pages
+        if name:
+            self.name = name
+
+    def extract_items(self, payload: Any) -> List[Dict[str, Any]]:
+        """Список записей из ответа ленты"""
+        if self.items_key is None:
+            return payload if isinstance(payload, list) else []
+        if isinstance(payload, dict):
+            items = payload.get(self.items_key)
+            return items if isinstance(items, list) else []
+        return []
+
+    def convert(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Запись биржи в общий формат"""
+        return {field: item.get(key) for field, key in self.field_map.items()}
+
+    async def fetch(self, session: aiohttp.ClientSession) -> AsyncIterator[Dict[str, Any]]:
+        """Обойти страницы ленты и выдать задания в общем формате"""
+        for page in range(1, self.max_pages + 1):
+            async with session.get(self.base_url, params={"page": page}) as response:
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+
+            items = self.extract_items(payload)
+            if not items:
+                return
+            for item in items:
+                if isinstance(item, dict):
+                    yield self.convert(item)
+
+
+class FlRuSource(HttpJsonSource):
+    """
+    Лента проектов FL.ru
+
+    Публичного JSON API у FL.ru нет, поэтому base_url указывает на
+    прокси/выгрузку ленты проектов в формате {"projects": [...]}.
+    """
+
+    name = "flru"
+    items_key = "projects"
+    field_map = {
+        "source_id": "id",
+        "title": "name",
+        "description": "descr",
+        "budget": "cost",
+        "category": "category",
+        "url": "link"
+    }
+
+
+class KworkSource(HttpJsonSource):
+    """
+    Биржа проектов Kwork
+
+    base_url указывает на выгрузку запросов покупателей
+    в формате {"wants": [...]}.
+    """
+
+    name = "kwork"
+    items_key = "wants"
+    field_map = {
+        "source_id": "id",
+        "title": "name",
+        "description": "description",
+        "budget": "priceLimit",
+        "category": "category_name",
+        "url": "url"
+    }
@@ -0,0 +1,108 @@
+"""
+Stub Exchange Server
+Локальная заглушка лент FL.ru и Kwork для проверки конвейера заданий
+
+Использование:
+    python -m ingestion.stub_exchange [--port 8081] [--rate 3000]
+
+Затем в .env:
+    INGEST_FLRU_URL=http://localhost:8081/flru
+    INGEST_KWORK_URL=http://localhost:8081/kwork
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+from aiohttp import web
+
+PAGE_SIZE = 50
+
+TITLES = [
+    "Написать статью про {topic}",
+    "Перевод инструкции для {topic}",
+    "Придумать слоган для {topic}",
+    "Контент-план для Instagram: {topic}",
+    "SEO-описание товаров: {topic}",
+]
+TOPICS = ["кофейни", "онлайн-школы", "IT-стартапа", "маркетплейса", "фитнес-клуба", "автосервиса"]
+
+
+class StubExchange:
+    """Генератор заданий с заданной скоростью появления"""
+
+    def __init__(self, rate_per_minute: int):
+        self.rate = rate_per_minute
+        self.started_at = time.monotonic()
+        self.tasks: List[Dict[str, Any]] = []
+
+    def _generate(self):
+        due = int((time.monotonic() - self.started_at) * self.rate / 60) + PAGE_SIZE
+        while len(self.tasks) < due:
+            task_id = len(self.tasks) + 1
+            topic = random.choice(TOPICS)
+            self.tasks.append({
+                "id": task_id,
+                "title": random.choice(TITLES).format(topic=topic),
+                "description": f"<p>Задание №{task_id} для {topic}. Подробности в переписке.</p>",
+                "budget": random.choice([0, 300, 500, 1000, 2500, 5000]),
+            })
+
+    def page(self, number: int) -> List[Dict[str, Any]]:
+        """Страница заданий (новые первыми)"""
+        self._generate()
+        newest = list(reversed(self.tasks[-PAGE_SIZE * 5:]))
+        return newest[(number - 1) * PAGE_SIZE:number * PAGE_SIZE]
+
+
+def build_app(rate: int) -> web.Application:
+    flru = StubExchange(rate)
+    kwork = StubExchange(rate)
+
+    async def flru_feed(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 1))
+        projects = [
+            {
+                "id": t["id"],
+                "name": t["title"],
+                "descr": t["description"],
+                "cost": f"{t['budget']} руб." if t["budget"] else "По договоренности",
+                "link": f"https://www.fl.ru/projects/{t['id']}/"
+            }
+            for t in flru.page(page)
+        ]
+        return web.json_response({"projects": projects})
+
+    async def kwork_feed(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 1))
+        wants = [
+            {
+                "id": t["id"],
+                "name": t["title"],
+                "description": t["description"],
+                "priceLimit": t["budget"],
+                "category_name": "Тексты и переводы",
+                "url": f"https://kwork.ru/projects/{t['id']}"
+            }
+            for t in kwork.page(page)
+        ]
+        return web.json_response({"wants": wants})
+
+    app = web.Application()
+    app.router.add_get("/flru", flru_feed)
+    app.router.add_get("/kwork", kwork_feed)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка лент заданий FL.ru и Kwork")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=int, default=3000, help="Новых заданий в минуту на каждой бирже")
+    args = parser.parse_args()
+
+    print(f"🧪 Заглушка бирж: http://localhost:{args.port}/flru и /kwork, {args.rate} заданий/мин")
+    web.run_app(build_app(args.rate), port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
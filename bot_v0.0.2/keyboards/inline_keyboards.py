@@ -4,7 +4,15 @@ Inline клавиатуры для Telegram бота
 """
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import List, Dict, Any
+from typing import AbstractSet, List, Dict, Any, Optional, Sequence, Tuple
+
+# Диапазоны бюджета для фильтра списка заданий: (название, от, до включительно)
+TASK_BUDGET_RANGES: List[Tuple[str, Optional[int], Optional[int]]] = [
+    ("💬 Договорная", 0, 0),
+    ("до 500₽", 1, 500),
+    ("500–2000₽", 501, 2000),
+    ("от 2000₽", 2001, None),
+]
 
 
 def get_main_menu_keyboard() -> InlineKeyboardMarkup:
@@ -37,12 +45,13 @@ def get_registration_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
-def get_tasks_keyboard(tasks: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
+def get_tasks_keyboard(tasks: List[Dict[str, Any]], responded: AbstractSet[int] = frozenset()) -> InlineKeyboardMarkup:
     """
     Клавиатура со списком заданий
     
     Args:
         tasks: Список заданий
+        responded: ID заданий, на которые пользователь уже откликнулся
         
     Returns:
         InlineKeyboardMarkup с кнопками для каждого задания
@@ -50,7 +59,8 @@ def get_tasks_keyboard(tasks: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
     buttons = []
     
     for task in tasks:
-        button_text = f"📌 {task['title'][:40]}..."  # Ограничиваем длину
+        mark = "✅" if task['id'] in responded else "📌"
+        button_text = f"{mark} {task['title'][:40]}..."  # Ограничиваем длину
         callback_data = f"task_details_{task['id']}"
         buttons.append([InlineKeyboardButton(text=button_text, callback_data=callback_data)])
     
@@ -61,6 +71,121 @@ def get_tasks_keyboard(tasks: List[Dict[str, Any]]) -> InlineKeyboardMarkup:
     return keyboard
 
 
+def _tasks_page_data(category_key: Optional[str], budget_key: Optional[str], cursor: str = "") -> str:
+    """callback_data страницы заданий: tasks_page_<категория>_<бюджет>_<курсор> ("-" - без фильтра)"""
+    return f"tasks_page_{category_key or '-'}_{budget_key or '-'}_{cursor}"
+
+
+def get_tasks_page_keyboard(
+    tasks: Sequence[Dict[str, Any]],
+    page: int = 1,
+    total_pages: int = 1,
+    category_key: Optional[str] = None,
+    budget_key: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    responded: AbstractSet[int] = frozenset()
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура страницы списка заданий с фильтрами
+    
+    Фильтры и курсоры передаются в callback_data, поэтому соседняя
+    страница выбирается из индексов каталога без пересчета всей выдачи.
+    
+    Args:
+        tasks: Задания текущей страницы
+        page: Текущая страница
+        total_pages: Общее количество страниц
+        category_key: Ключ выбранной категории (None - все)
+        budget_key: Индекс выбранного диапазона бюджета (None - любой)
+        prev_cursor: Курсор первого задания на странице
+        next_cursor: Курсор последнего задания на странице
+        responded: ID заданий, на которые пользователь уже откликнулся
+        
+    Returns:
+        InlineKeyboardMarkup с заданиями, фильтрами и навигацией
+    """
+    buttons = []
+    
+    for task in tasks:
+        mark = "✅" if task['id'] in responded else "📌"
+        button_text = f"{mark} {task['title'][:36]} · {task['budget']}₽"
+        buttons.append([InlineKeyboardButton(text=button_text, callback_data=f"task_details_{task['id']}")])
+    
+    # Кнопки пагинации если больше одной страницы
+    if total_pages > 1:
+        pagination_row = []
+        
+        if page > 1:
+            pagination_row.append(InlineKeyboardButton(
+                text="⬅️ Назад",
+                callback_data=_tasks_page_data(category_key, budget_key, f"p{prev_cursor}")
+            ))
+        
+        pagination_row.append(InlineKeyboardButton(
+            text=f"📄 {page}/{total_pages}",
+            callback_data="current_page"
+        ))
+        
+        if page < total_pages:
+            pagination_row.append(InlineKeyboardButton(
+                text="Вперед ➡️",
+                callback_data=_tasks_page_data(category_key, budget_key, f"n{next_cursor}")
+            ))
+        
+        buttons.append(pagination_row)
+    
+    # Фильтры
+    buttons.append([
+        InlineKeyboardButton(text="🏷 Категория", callback_data=f"tasks_categories_{budget_key or '-'}"),
+        InlineKeyboardButton(text="💰 Бюджет", callback_data=f"tasks_budgets_{category_key or '-'}")
+    ])
+    
+    buttons.append([InlineKeyboardButton(text="◀️ Назад в меню", callback_data="main_menu")])
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    return keyboard
+
+
+def get_task_categories_keyboard(categories: Sequence[Tuple[str, str]], budget_key: Optional[str] = None) -> InlineKeyboardMarkup:
+    """
+    Клавиатура выбора категории для списка заданий
+    
+    Args:
+        categories: Пары (ключ категории, название)
+        budget_key: Сохраняемый фильтр по бюджету
+        
+    Returns:
+        InlineKeyboardMarkup с категориями
+    """
+    buttons = [[InlineKeyboardButton(text="📋 Все категории", callback_data=_tasks_page_data(None, budget_key))]]
+    
+    for key, name in categories:
+        buttons.append([InlineKeyboardButton(text=f"🏷 {name[:40]}", callback_data=_tasks_page_data(key, budget_key))])
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    return keyboard
+
+
+def get_task_budgets_keyboard(category_key: Optional[str] = None) -> InlineKeyboardMarkup:
+    """
+    Клавиатура выбора диапазона бюджета для списка заданий
+    
+    Args:
+        category_key: Сохраняемый фильтр по категории
+        
+    Returns:
+        InlineKeyboardMarkup с диапазонами из TASK_BUDGET_RANGES
+    """
+    buttons = [[InlineKeyboardButton(text="💰 Любой бюджет", callback_data=_tasks_page_data(category_key, None))]]
+    
+    for idx, (label, _, _) in enumerate(TASK_BUDGET_RANGES):
+        buttons.append([InlineKeyboardButton(text=label, callback_data=_tasks_page_data(category_key, str(idx)))])
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    return keyboard
+
+
 def get_task_details_keyboard(task_id: int, has_responded: bool = False) -> InlineKeyboardMarkup:
     """
     Клавиатура для деталей задания
@@ -97,6 +222,47 @@ def get_task_details_keyboard(task_id: int, has_responded: bool = False) -> Inli
     return keyboard
 
 
+def get_task_notification_keyboard(task_id: int) -> InlineKeyboardMarkup:
+    """
+    Клавиатура уведомления о новом задании по подписке
+    
+    Args:
+        task_id: ID задания
+        
+    Returns:
+        InlineKeyboardMarkup с переходом к заданию
+    """
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="👀 Подробнее", callback_data=f"task_details_{task_id}")],
+        [InlineKeyboardButton(text="🔕 Мои подписки", callback_data="subscriptions")]
+    ])
+    return keyboard
+
+
+def get_subscriptions_keyboard(subscriptions: Sequence[Dict[str, Any]]) -> InlineKeyboardMarkup:
+    """
+    Клавиатура управления подписками
+    
+    Args:
+        subscriptions: Подписки пользователя
+        
+    Returns:
+        InlineKeyboardMarkup с кнопками удаления подписок
+    """
+    buttons = [
+        [InlineKeyboardButton(text=f"🗑 Удалить подписку №{idx}", callback_data=f"unsubscribe_{sub['id']}")]
+        for idx, sub in enumerate(subscriptions, 1)
+    ]
+    
+    if len(subscriptions) > 1:
+        buttons.append([InlineKeyboardButton(text="🔕 Отписаться от всего", callback_data="unsubscribe_all")])
+    
+    buttons.append([InlineKeyboardButton(text="◀️ Главное меню", callback_data="main_menu")])
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    return keyboard
+
+
 def get_back_button(callback_data: str = "main_menu") -> InlineKeyboardMarkup:
     """
     Кнопка "Назад"
@@ -143,13 +309,23 @@ def get_balance_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
-def get_responses_keyboard(page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
+def get_responses_keyboard(
+    page: int = 1,
+    total_pages: int = 1,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
     """
     Клавиатура для истории откликов с пагинацией
     
+    Курсоры передаются в callback_data, чтобы соседняя страница
+    загружалась keyset-запросом от первого/последнего отклика.
+    
     Args:
         page: Текущая страница
         total_pages: Общее количество страниц
+        prev_cursor: Курсор первого отклика на странице
+        next_cursor: Курсор последнего отклика на странице
         
     Returns:
         InlineKeyboardMarkup с навигацией по страницам
@@ -163,7 +339,7 @@ def get_responses_keyboard(page: int = 1, total_pages: int = 1) -> InlineKeyboar
         if page > 1:
             pagination_row.append(InlineKeyboardButton(
                 text="⬅️ Назад", 
-                callback_data=f"responses_page_{page-1}"
+                callback_data=f"responses_page_{page-1}_n{prev_cursor}" if prev_cursor else f"responses_page_{page-1}"
             ))
         
         pagination_row.append(InlineKeyboardButton(
@@ -174,7 +350,7 @@ def get_responses_keyboard(page: int = 1, total_pages: int = 1) -> InlineKeyboar
         if page < total_pages:
             pagination_row.append(InlineKeyboardButton(
                 text="Вперед ➡️", 
-                callback_data=f"responses_page_{page+1}"
+                callback_data=f"responses_page_{page+1}_o{next_cursor}" if next_cursor else f"responses_page_{page+1}"
             ))
         
         buttons.append(pagination_row)
@@ -194,7 +370,7 @@ def get_settings_keyboard() -> InlineKeyboardMarkup:
         InlineKeyboardMarkup с настройками
     """
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🔔 Уведомления (скоро)", callback_data="settings_notifications")],
+        [InlineKeyboardButton(text="🔔 Подписки на задания", callback_data="subscriptions")],
         [InlineKeyboardButton(text="🌐 Язык (скоро)", callback_data="settings_language")],
         [InlineKeyboardButton(text="ℹ️ О боте", callback_data="about")],
         [InlineKeyboardButton(text="◀️ Главное меню", callback_data="main_menu")]
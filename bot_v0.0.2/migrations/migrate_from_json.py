@@ -3,19 +3,23 @@ Migration Script
 Миграция данных из user_data.json (v0.0.1) в Supabase (v0.0.2)
 """
 
+import argparse
 import json
 import os
 import sys
+import time
 import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
 
 # Добавляем родительскую директорию в путь для импорта модулей
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.supabase_client import SupabaseClient
 from database.models import User, TaskResponse
+from database.exceptions import DuplicateResponseError
 import config
 
 # Настройка логирования
@@ -32,6 +36,11 @@ logger = logging.getLogger(__name__)
 # Путь к JSON файлу из версии 0.0.1
 JSON_FILE_PATH = "../user_data.json"  # Относительно bot_v0.0.2/
 
+# Параметры пакетного режима (--bulk)
+BULK_CHUNK_SIZE = 500          # Пользователей в одном пакете
+BULK_CONCURRENCY = 4           # Пакетов, обрабатываемых одновременно
+CHECKPOINT_FILE = "migration_checkpoint.json"
+
 
 async def load_json_data(file_path: str) -> dict:
     """
@@ -59,6 +68,48 @@ async def load_json_data(file_path: str) -> dict:
         return {}
 
 
+def build_user(user_id: int, user_data: dict) -> User:
+    """
+    Создать объект User из записи JSON v0.0.1
+    
+    Args:
+        user_id: Telegram user ID
+        user_data: Данные пользователя из JSON
+        
+    Returns:
+        Объект User
+    """
+    return User(
+        user_id=user_id,
+        username=user_data.get('username', f'user_{user_id}'),
+        balance=float(user_data.get('balance', 0)),
+        completed_tasks=len(user_data.get('responses', [])),
+        role='free',
+        created_at=datetime.fromisoformat(user_data.get('created_at', datetime.now().isoformat()))
+    )
+
+
+def build_response(user_id: int, response_data: dict) -> TaskResponse:
+    """
+    Создать объект TaskResponse из записи JSON v0.0.1
+    
+    Args:
+        user_id: Telegram user ID
+        response_data: Данные отклика из JSON
+        
+    Returns:
+        Объект TaskResponse
+    """
+    return TaskResponse(
+        user_id=user_id,
+        task_id=response_data.get('task_id'),
+        task_title=response_data.get('task_title', 'Неизвестное задание'),
+        response_text=response_data.get('response_text', ''),
+        earned=float(response_data.get('earned', 50)),
+        created_at=datetime.fromisoformat(response_data.get('timestamp', datetime.now().isoformat()))
+    )
+
+
 async def migrate_users(db_client: SupabaseClient, json_data: dict) -> tuple:
     """
     Миграция пользователей из JSON в Supabase
@@ -86,14 +137,7 @@ async def migrate_users(db_client: SupabaseClient, json_data: dict) -> tuple:
                 continue
             
             # Создаем объект User
-            user = User(
-                user_id=user_id,
-                username=user_data.get('username', f'user_{user_id}'),
-                balance=float(user_data.get('balance', 0)),
-                completed_tasks=len(user_data.get('responses', [])),
-                role='free',
-                created_at=datetime.fromisoformat(user_data.get('created_at', datetime.now().isoformat()))
-            )
+            user = build_user(user_id, user_data)
             
             # Сохраняем в Supabase
             await db_client.create_user(user)
@@ -130,29 +174,19 @@ async def migrate_responses(db_client: SupabaseClient, json_data: dict) -> tuple
             responses = user_data.get('responses', [])
             
             for response_data in responses:
+                task_id = response_data.get('task_id')
                 try:
-                    # Проверяем, не существует ли уже отклик
-                    task_id = response_data.get('task_id')
-                    exists = await db_client.check_response_exists(user_id, task_id)
-                    if exists:
-                        logger.warning(f"Отклик пользователя {user_id} на задание {task_id} уже существует, пропускаем")
-                        continue
-                    
                     # Создаем объект TaskResponse
-                    response = TaskResponse(
-                        user_id=user_id,
-                        task_id=task_id,
-                        task_title=response_data.get('task_title', 'Неизвестное задание'),
-                        response_text=response_data.get('response_text', ''),
-                        earned=float(response_data.get('earned', 50)),
-                        created_at=datetime.fromisoformat(response_data.get('timestamp', datetime.now().isoformat()))
-                    )
+                    response = build_response(user_id, response_data)
                     
-                    # Сохраняем в Supabase
+                    # Сохраняем в Supabase (дубликат отклонит уникальный индекс)
                     await db_client.create_response(response)
                     success_count += 1
                     logger.info(f"✅ Отклик пользователя {user_id} на задание {task_id} мигрирован")
                     
+                except DuplicateResponseError:
+                    logger.warning(f"Отклик пользователя {user_id} на задание {task_id} уже существует, пропускаем")
+                    
                 except Exception as e:
                     error_count += 1
                     logger.error(f"❌ Ошибка миграции отклика: {e}")
@@ -195,12 +229,334 @@ async def verify_migration(db_client: SupabaseClient, json_data: dict):
     logger.info(f"Проверено пользователей: {verified_users}/5")
 
 
-async def main():
+# ============================================================================
+# ПАКЕТНЫЙ РЕЖИМ
+# ============================================================================
+
+def iter_json_items(file_path: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Потоково читать пары ключ-значение из JSON-объекта верхнего уровня
+    
+    Файл читается блоками, в памяти одновременно находится только
+    текущий блок и одна запись пользователя.
+    
+    Args:
+        file_path: Путь к JSON файлу вида {"<user_id>": {...}, ...}
+        chunk_size: Размер читаемого блока в символах
+        
+    Yields:
+        Tuple (ключ, значение)
+    """
+    decoder = json.JSONDecoder()
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+        
+        def fill() -> None:
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+        
+        def next_char() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if eof:
+                    raise ValueError("Неожиданный конец JSON файла")
+                fill()
+        
+        def decode() -> Any:
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # Значение могло оборваться на границе блока
+                    if end == len(buf) and not eof:
+                        raise json.JSONDecodeError("Граница блока", buf, end)
+                    pos = end
+                    return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+        
+        if next_char() != '{':
+            raise ValueError("Ожидался JSON-объект верхнего уровня")
+        pos += 1
+        
+        if next_char() == '}':
+            return
+        
+        while True:
+            next_char()
+            key = decode()
+            if next_char() != ':':
+                raise ValueError(f"Ожидалось ':' после ключа {key!r}")
+            pos += 1
+            next_char()
+            yield key, decode()
+            
+            separator = next_char()
+            pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Ожидалась ',' или '}}' после значения ключа {key!r}")
+
+
+def load_checkpoint(checkpoint_path: str, file_path: str) -> int:
+    """
+    Прочитать количество уже перенесенных пользователей
+    
+    Args:
+        checkpoint_path: Путь к файлу контрольной точки
+        file_path: Путь к мигрируемому JSON (контрольная точка другого файла игнорируется)
+        
+    Returns:
+        Количество записей, которые можно пропустить
+    """
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('file') == os.path.abspath(file_path):
+            return int(data.get('items_done', 0))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать контрольную точку {checkpoint_path}: {e}")
+    return 0
+
+
+def save_checkpoint(checkpoint_path: str, file_path: str, items_done: int) -> None:
+    """Атомарно сохранить контрольную точку"""
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'file': os.path.abspath(file_path),
+            'items_done': items_done,
+            'updated_at': datetime.now().isoformat()
+        }, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+async def migrate_chunk(db_client: SupabaseClient, items: List[Tuple[str, dict]]) -> Tuple[int, int]:
+    """
+    Перенести пакет пользователей вместе с их откликами
+    
+    Пользователи и отклики вставляются пакетными upsert'ами:
+    существующие записи пропускаются самой БД, без предварительных проверок.
+    
+    Args:
+        db_client: Клиент Supabase
+        items: Список пар (user_id, данные пользователя)
+        
+    Returns:
+        Tuple (пользователей, откликов) в пакете
+    """
+    users: List[Dict[str, Any]] = []
+    responses: List[Dict[str, Any]] = []
+    
+    for user_id_str, user_data in items:
+        try:
+            user_id = int(user_id_str)
+            users.append(build_user(user_id, user_data).to_dict())
+            for response_data in user_data.get('responses', []):
+                responses.append(build_response(user_id, response_data).to_dict())
+        except Exception as e:
+            logger.error(f"❌ Пропущена некорректная запись пользователя {user_id_str}: {e}")
+    
+    # Пользователи вставляются раньше откликов (внешний ключ responses.user_id)
+    await db_client.upsert_users(users)
+    await db_client.upsert_responses(responses)
+    return len(users), len(responses)
+
+
+async def migrate_bulk(
+    db_client: SupabaseClient,
+    file_path: str,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    concurrency: int = BULK_CONCURRENCY,
+    checkpoint_path: str = CHECKPOINT_FILE
+) -> Tuple[int, int, int]:
+    """
+    Пакетная возобновляемая миграция
+    
+    JSON читается потоково, пакеты по chunk_size пользователей отправляются
+    параллельно (не более concurrency одновременно). После каждого пакета
+    сохраняется контрольная точка: последняя позиция, до которой все пакеты
+    завершены успешно. Повторный запуск продолжает с нее.
+    
+    Args:
+        db_client: Клиент Supabase
+        file_path: Путь к JSON файлу
+        chunk_size: Пользователей в пакете
+        concurrency: Одновременно обрабатываемых пакетов
+        checkpoint_path: Путь к файлу контрольной точки
+        
+    Returns:
+        Tuple (пользователей, откликов, неудачных пакетов)
+    """
+    skip = load_checkpoint(checkpoint_path, file_path)
+    if skip:
+        logger.info(f"Продолжение с контрольной точки: пропускаем {skip} пользователей")
+    
+    started = time.monotonic()
+    users_total = 0
+    responses_total = 0
+    failed_chunks = 0
+    
+    # Границы пакетов: индекс пакета -> позиция после него
+    chunk_ends: Dict[int, int] = {}
+    finished: Dict[int, bool] = {}
+    watermark_index = 0
+    watermark = skip
+    in_flight = set()
+    
+    def advance_watermark() -> None:
+        nonlocal watermark_index, watermark
+        moved = False
+        while finished.get(watermark_index):
+            watermark = chunk_ends.pop(watermark_index)
+            finished.pop(watermark_index)
+            watermark_index += 1
+            moved = True
+        if moved:
+            save_checkpoint(checkpoint_path, file_path, watermark)
+    
+    async def run_chunk(index: int, items: List[Tuple[str, dict]]) -> None:
+        nonlocal users_total, responses_total, failed_chunks
+        try:
+            users_count, responses_count = await migrate_chunk(db_client, items)
+        except Exception as e:
+            failed_chunks += 1
+            logger.error(f"❌ Пакет {index} не перенесен: {e}")
+            return
+        
+        users_total += users_count
+        responses_total += responses_count
+        finished[index] = True
+        advance_watermark()
+        
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logger.info(
+            f"✅ Пакет {index}: {users_count} пользователей, {responses_count} откликов "
+            f"({(users_total + responses_total) / elapsed:.0f} строк/с)"
+        )
+    
+    chunk: List[Tuple[str, dict]] = []
+    chunk_index = 0
+    position = 0
+    
+    async def submit(items: List[Tuple[str, dict]]) -> None:
+        nonlocal chunk_index
+        chunk_ends[chunk_index] = position
+        task = asyncio.create_task(run_chunk(chunk_index, items))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        chunk_index += 1
+        if len(in_flight) >= concurrency:
+            await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+    
+    for key, value in iter_json_items(file_path):
+        position += 1
+        if position <= skip:
+            continue
+        chunk.append((key, value))
+        if len(chunk) >= chunk_size:
+            await submit(chunk)
+            chunk = []
+    
+    if chunk:
+        await submit(chunk)
+    if in_flight:
+        await asyncio.wait(in_flight)
+    
+    elapsed = max(time.monotonic() - started, 1e-9)
+    logger.info(
+        f"Пакетная миграция завершена за {elapsed:.1f} с: "
+        f"{users_total} пользователей, {responses_total} откликов, "
+        f"{(users_total + responses_total) / elapsed:.0f} строк/с"
+    )
+    
+    if failed_chunks == 0 and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
+    return users_total, responses_total, failed_chunks
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Миграция user_data.json (v0.0.1) в Supabase")
+    parser.add_argument("--file", default=JSON_FILE_PATH, help="Путь к user_data.json")
+    parser.add_argument("--bulk", action="store_true", help="Пакетный потоковый режим для больших файлов")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Пользователей в пакете")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY, help="Одновременных пакетов")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Файл контрольной точки")
+    parser.add_argument("--yes", action="store_true", help="Не спрашивать подтверждение")
+    return parser.parse_args()
+
+
+async def main_bulk(args: argparse.Namespace):
+    """Главная функция пакетной миграции"""
+    logger.info("=" * 70)
+    logger.info("🔄 ПАКЕТНАЯ МИГРАЦИЯ ДАННЫХ ИЗ v0.0.1 В v0.0.2")
+    logger.info("=" * 70)
+    
+    if not os.path.exists(args.file):
+        logger.error(f"Файл {args.file} не найден")
+        return
+    
+    if not args.yes:
+        confirm = input(f"\nПеренести {args.file} пакетами по {args.chunk_size}? (yes/no): ")
+        if confirm.lower() not in ['yes', 'y', 'да']:
+            logger.info("Миграция отменена пользователем")
+            return
+    
+    db_client = SupabaseClient(
+        config.SUPABASE_URL,
+        config.SUPABASE_KEY,
+        pool_size=max(config.DB_POOL_SIZE, args.concurrency * 2),
+        max_concurrency=max(config.DB_MAX_CONCURRENCY, args.concurrency * 2)
+    )
+    try:
+        if not await db_client.health_check():
+            logger.error("❌ Не удалось подключиться к Supabase")
+            return
+        
+        users, responses, failed = await migrate_bulk(
+            db_client,
+            args.file,
+            chunk_size=args.chunk_size,
+            concurrency=args.concurrency,
+            checkpoint_path=args.checkpoint
+        )
+        
+        if failed:
+            logger.warning(
+                f"⚠️ {failed} пакетов не перенесено. Запустите скрипт повторно - "
+                f"миграция продолжится с контрольной точки {args.checkpoint}"
+            )
+        else:
+            logger.info("✅ Миграция завершена успешно!")
+    finally:
+        await db_client.close()
+
+
+async def main(json_file_path: str = JSON_FILE_PATH):
     """Главная функция миграции"""
     logger.info("=" * 70)
     logger.info("🔄 МИГРАЦИЯ ДАННЫХ ИЗ v0.0.1 В v0.0.2")
     logger.info("=" * 70)
     
+    db_client = None
     try:
         # Инициализация Supabase клиента
         logger.info("Подключение к Supabase...")
@@ -215,7 +571,7 @@ async def main():
         logger.info("✅ Подключение к Supabase успешно")
         
         # Загрузка данных из JSON
-        json_data = await load_json_data(JSON_FILE_PATH)
+        json_data = await load_json_data(json_file_path)
         
         if not json_data:
             logger.warning("⚠️ Нет данных для миграции")
@@ -259,7 +615,14 @@ async def main():
         
     except Exception as e:
         logger.error(f"❌ Критическая ошибка миграции: {e}", exc_info=True)
+    finally:
+        if db_client:
+            await db_client.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli_args = parse_args()
+    if cli_args.bulk:
+        asyncio.run(main_bulk(cli_args))
+    else:
+        asyncio.run(main(cli_args.file))
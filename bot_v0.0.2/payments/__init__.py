@@ -5,5 +5,6 @@ Payments Module
 
 from .crypto import CryptoPaymentService
 from .freekassa import FreeKassaService
+from .invoice_poller import InvoicePoller
 
-__all__ = ['CryptoPaymentService', 'FreeKassaService']
+__all__ = ['CryptoPaymentService', 'FreeKassaService', 'InvoicePoller']
@@ -3,35 +3,161 @@ CryptoBot Payment Service
 Сервис для работы с CryptoBot API (TON платежи)
 """
 
+import asyncio
+import hashlib
+import hmac
 import logging
+import random
 import aiohttp
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# Максимум счетов в одном запросе getInvoices (параметр count)
+MAX_INVOICES_PER_REQUEST = 1000
+
 
 class CryptoPaymentService:
     """
     Сервис для работы с CryptoBot API
     
+    Все запросы идут через одну долгоживущую HTTP сессию с пулом
+    keep-alive соединений и кешем DNS, поэтому установка TCP и TLS с
+    pay.crypt.bot оплачивается один раз, а не на каждый вызов.
+    Сессия открывается в start() (или при первом запросе) и
+    закрывается в close(). Ответы 5xx, таймауты и сетевые ошибки
+    повторяются до retries раз с экспоненциальной задержкой и
+    случайным разбросом; createInvoice повторяется только если
+    соединение не было установлено, чтобы не создать два счета.
+    
     Документация: https://help.crypt.bot/crypto-pay-api
     """
     
-    def __init__(self, api_token: str):
+    def __init__(
+        self,
+        api_token: str,
+        pool_size: int = 10,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5
+    ):
         """
         Инициализация сервиса
         
         Args:
             api_token: API токен от CryptoBot (@CryptoBot -> /api)
+            pool_size: Максимальное количество открытых HTTP соединений
+            timeout: Таймаут одного запроса в секундах
+            retries: Сколько раз повторять запрос после ошибки 5xx или сети
+            backoff: Базовая задержка перед повтором в секундах
         """
         self.api_token = api_token
         self.base_url = "https://pay.crypt.bot/api"
         self.headers = {
             "Crypto-Pay-API-Token": api_token
         }
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=min(timeout, 5.0))
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional[aiohttp.ClientSession] = None
         logger.info("CryptoPaymentService инициализирован")
     
+    # ========================================================================
+    # HTTP ТРАНСПОРТ
+    # ========================================================================
+    
+    async def start(self):
+        """Открыть HTTP сессию заранее, чтобы первый платеж не ждал соединения"""
+        self._get_session()
+    
+    async def close(self):
+        """Закрыть HTTP сессию и освободить соединения"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("CryptoPaymentService закрыт")
+        self._session = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Получить общую HTTP сессию (создается при первом запросе)
+        
+        Returns:
+            Открытая aiohttp.ClientSession с пулом соединений
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=self.timeout
+            )
+        return self._session
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Задержка перед повтором: экспоненциальная, со случайным разбросом"""
+        return random.uniform(0, self.backoff * 2 ** attempt)
+    
+    async def _request(
+        self,
+        method: str,
+        api_method: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+        idempotent: bool = True
+    ) -> Any:
+        """
+        Выполнить запрос к CryptoBot API
+        
+        Args:
+            method: HTTP метод
+            api_method: Метод API (например 'getInvoices')
+            params: Параметры запроса
+            json: Тело запроса
+            idempotent: Можно ли повторять запрос, который мог дойти до API
+            
+        Returns:
+            Поле result ответа или None при ошибке (ошибка логируется)
+        """
+        url = f"{self.base_url}/{api_method}"
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                async with self._get_session().request(method, url, params=params, json=json) as response:
+                    if response.status >= 500 and idempotent and not last:
+                        logger.warning(f"CryptoBot {api_method}: HTTP {response.status}, повтор")
+                        await asyncio.sleep(self._retry_delay(attempt))
+                        continue
+                    if response.status != 200:
+                        logger.error(f"HTTP ошибка {response.status} ({api_method})")
+                        return None
+                    result = await response.json()
+                    if not result.get("ok"):
+                        logger.error(f"Ошибка CryptoBot {api_method}: {result}")
+                        return None
+                    return result.get("result")
+            except aiohttp.ClientConnectorError as e:
+                # Соединение не установлено: запрос точно не дошел до API
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not idempotent:
+                    raise
+                error = e
+            if last:
+                raise error
+            logger.warning(f"CryptoBot {api_method}: {error!r}, повтор")
+            await asyncio.sleep(self._retry_delay(attempt))
+        return None
+    
+    # ========================================================================
+    # МЕТОДЫ API
+    # ========================================================================
+    
     async def create_invoice(
         self,
         amount: float,
@@ -52,8 +178,6 @@ class CryptoPaymentService:
             Словарь с данными счета или None при ошибке
         """
         try:
-            url = f"{self.base_url}/createInvoice"
-            
             data = {
                 "amount": str(amount),
                 "currency_type": "crypto",
@@ -64,20 +188,10 @@ class CryptoPaymentService:
             if payload:
                 data["payload"] = payload
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=self.headers, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("ok"):
-                            invoice_data = result.get("result", {})
-                            logger.info(f"Счет создан: {invoice_data.get('invoice_id')}")
-                            return invoice_data
-                        else:
-                            logger.error(f"Ошибка создания счета: {result}")
-                            return None
-                    else:
-                        logger.error(f"HTTP ошибка {response.status}")
-                        return None
+            invoice_data = await self._request("POST", "createInvoice", json=data, idempotent=False)
+            if invoice_data is not None:
+                logger.info(f"Счет создан: {invoice_data.get('invoice_id')}")
+            return invoice_data
                         
         except Exception as e:
             logger.error(f"Ошибка создания счета: {e}")
@@ -94,29 +208,47 @@ class CryptoPaymentService:
             Словарь с данными счета или None при ошибке
         """
         try:
-            url = f"{self.base_url}/getInvoices"
-            
             params = {
                 "invoice_ids": invoice_id
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, params=params) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("ok"):
-                            invoices = result.get("result", {}).get("items", [])
-                            if invoices:
-                                return invoices[0]
-                        return None
-                    else:
-                        logger.error(f"HTTP ошибка {response.status}")
-                        return None
+            result = await self._request("GET", "getInvoices", params=params)
+            invoices = (result or {}).get("items", [])
+            if invoices:
+                return invoices[0]
+            return None
                         
         except Exception as e:
             logger.error(f"Ошибка получения счета: {e}")
             return None
     
+    async def get_invoices(self, invoice_ids: Sequence[int]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Получение нескольких счетов одним запросом
+        
+        Args:
+            invoice_ids: ID счетов (не больше MAX_INVOICES_PER_REQUEST)
+        
+        Returns:
+            Список найденных счетов или None при ошибке
+        """
+        if not invoice_ids:
+            return []
+        try:
+            params = {
+                "invoice_ids": ",".join(str(invoice_id) for invoice_id in invoice_ids),
+                "count": len(invoice_ids)
+            }
+            
+            result = await self._request("GET", "getInvoices", params=params)
+            if result is None:
+                return None
+            return result.get("items", [])
+        
+        except Exception as e:
+            logger.error(f"Ошибка получения {len(invoice_ids)} счетов: {e}")
+            return None
+
     async def check_invoice_status(self, invoice_id: int) -> Optional[str]:
         """
         Проверка статуса счета
@@ -140,19 +272,7 @@ class CryptoPaymentService:
             Словарь с балансами по валютам или None при ошибке
         """
         try:
-            url = f"{self.base_url}/getBalance"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("ok"):
-                            return result.get("result", [])
-                        return None
-                    else:
-                        logger.error(f"HTTP ошибка {response.status}")
-                        return None
-                        
+            return await self._request("GET", "getBalance")
         except Exception as e:
             logger.error(f"Ошибка получения баланса: {e}")
             return None
@@ -165,19 +285,7 @@ class CryptoPaymentService:
             Словарь с курсами валют или None при ошибке
         """
         try:
-            url = f"{self.base_url}/getExchangeRates"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("ok"):
-                            return result.get("result", [])
-                        return None
-                    else:
-                        logger.error(f"HTTP ошибка {response.status}")
-                        return None
-                        
+            return await self._request("GET", "getExchangeRates")
         except Exception as e:
             logger.error(f"Ошибка получения курсов: {e}")
             return None
@@ -194,17 +302,22 @@ class CryptoPaymentService:
         """
         return invoice_data.get("pay_url", "")
     
-    async def verify_webhook(self, data: Dict[str, Any]) -> bool:
+    def verify_webhook(self, body: bytes, signature: Optional[str]) -> bool:
         """
-        Проверка webhook от CryptoBot
+        Проверка подписи webhook от CryptoBot
+        
+        Подпись - HMAC-SHA-256 сырого тела запроса с ключом SHA-256 от
+        API токена, передается в заголовке crypto-pay-api-signature.
         
         Args:
-            data: Данные webhook
+            body: Сырое тело запроса
+            signature: Значение заголовка crypto-pay-api-signature
             
         Returns:
-            True если webhook валиден
+            True если подпись совпадает
         """
-        # В production нужно проверять подпись
-        # Для простоты пока просто проверяем наличие нужных полей
-        required_fields = ["update_type", "payload"]
-        return all(field in data for field in required_fields)
+        if not signature:
+            return False
+        secret = hashlib.sha256(self.api_token.encode()).digest()
+        expected = hmac.new(secret, body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature.strip().lower())
@@ -0,0 +1,270 @@
+"""
+Invoice Poller
+Фоновая сверка неоплаченных счетов CryptoBot и единый путь зачисления
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, NamedTuple, Optional
+from database.models import User
+from database.storage import Storage
+from payments.crypto import CryptoPaymentService, MAX_INVOICES_PER_REQUEST
+from services.exchange_service import convert_to_rub
+from services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# Валюты счетов CryptoBot (платежи FreeKassa в RUB сверяются через ее callback)
+CRYPTO_CURRENCIES = ('TON', 'USDT', 'BTC')
+
+# Курс в рублях, если сервис курсов недоступен
+FALLBACK_RUB_RATES = {'TON': 50.0, 'USDT': 100.0, 'BTC': 2500000.0}
+
+# Итоговые статусы счета CryptoBot -> статус платежа
+FINAL_STATUSES = {'paid': 'paid', 'expired': 'expired'}
+
+
+class Settlement(NamedTuple):
+    """Результат зачисления платежа"""
+
+    payment: Dict[str, Any]
+    user: User
+    credited: float
+
+
+class InvoicePoller:
+    """
+    Сверка неоплаченных счетов CryptoBot
+
+    Цикл читает платежи в статусе pending страницами по batch_size
+    (keyset по id) и проверяет каждую страницу одним запросом
+    getInvoices, поэтому число запросов к API не зависит от числа
+    пользователей и их нажатий "Я оплатил". Интервал адаптивный:
+    min_interval, пока счета меняют статус, удваивается до max_interval,
+    пока не меняются; без неоплаченных счетов цикл спит max_interval.
+    wake() (новый счет) и refresh() (нажатие "Я оплатил") запускают
+    цикл раньше, но не чаще одного раза в min_interval; одновременные
+    refresh() ждут один и тот же цикл.
+
+    settle() - единственный путь зачисления: его используют цикл,
+    webhook CryptoBot и кнопка "Я оплатил". Статус платежа меняется
+    условным UPDATE pending -> paid вместе с начислением, поэтому сумма
+    зачисляется ровно один раз.
+    """
+
+    def __init__(
+        self,
+        db_client: Storage,
+        crypto_service: CryptoPaymentService,
+        user_service: UserService,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        batch_size: int = 100
+    ):
+        """
+        Инициализация сверки
+
+        Args:
+            db_client: Хранилище платежей
+            crypto_service: Клиент CryptoBot API
+            user_service: Сервис пользователей (кеш профилей)
+            min_interval: Минимальный период цикла в секундах
+            max_interval: Максимальный период цикла в секундах
+            batch_size: Счетов в одном запросе getInvoices
+        """
+        self.db = db_client
+        self.crypto = crypto_service
+        self.user_service = user_service
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = min(batch_size, MAX_INVOICES_PER_REQUEST)
+
+        self.interval = min_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._cycle_done: Optional[asyncio.Future] = None
+        self._last_cycle = 0.0
+
+        self.cycles = 0
+        self.api_calls = 0
+        self.settled = 0
+        self.errors = 0
+        self.last_cycle: Dict[str, Any] = {}
+
+    # ========================================================================
+    # ЗАПУСК И ОСТАНОВКА
+    # ========================================================================
+
+    async def start(self):
+        """Запустить фоновую сверку"""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(
+            f"Сверка счетов запущена: интервал {self.min_interval:g}-{self.max_interval:g} с, "
+            f"пачка {self.batch_size}"
+        )
+
+    async def stop(self):
+        """Остановить фоновую сверку"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._cycle_done is not None and not self._cycle_done.done():
+            self._cycle_done.cancel()
+        logger.info(f"Сверка счетов остановлена: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Метрики сверки
+
+        Returns:
+            Словарь со счетчиками, текущим интервалом и итогами последнего цикла
+        """
+        return {
+            "cycles": self.cycles,
+            "api_calls": self.api_calls,
+            "settled": self.settled,
+            "errors": self.errors,
+            "interval": self.interval,
+            "last_cycle": dict(self.last_cycle)
+        }
+
+    def wake(self):
+        """Сообщить о новом счете: следующий цикл начнется без ожидания интервала"""
+        self.interval = self.min_interval
+        self._wakeup.set()
+
+    async def refresh(self):
+        """Запустить цикл сверки (не раньше min_interval после прошлого) и дождаться его"""
+        if self._task is None:
+            await self.poll_once()
+            return
+        if self._cycle_done is None or self._cycle_done.done():
+            self._cycle_done = asyncio.get_running_loop().create_future()
+        done = self._cycle_done
+        self.wake()
+        await asyncio.shield(done)
+
+    async def _loop(self):
+        """Выполнять циклы с адаптивным интервалом"""
+        while True:
+            # Ранний запуск (wake/refresh) - не чаще min_interval
+            await asyncio.sleep(max(0.0, self._last_cycle + self.min_interval - time.monotonic()))
+            self._wakeup.clear()
+            done, self._cycle_done = self._cycle_done, None
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Ошибка цикла сверки счетов: {e}")
+            finally:
+                if done is not None and not done.done():
+                    done.set_result(None)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # ========================================================================
+    # СВЕРКА
+    # ========================================================================
+
+    async def poll_once(self) -> Dict[str, Any]:
+        """
+        Проверить все неоплаченные счета CryptoBot
+
+        Returns:
+            Итоги цикла: pending, settled, api_calls
+        """
+        self._last_cycle = time.monotonic()
+        pending = 0
+        settled = 0
+        api_calls = 0
+        after_id = 0
+        while True:
+            page = await self.db.get_pending_payments(CRYPTO_CURRENCIES, after_id, self.batch_size)
+            if not page:
+                break
+            after_id = page[-1]['id']
+            pending += len(page)
+
+            invoice_ids = [int(p['tx_id']) for p in page if str(p.get('tx_id') or '').isdigit()]
+            api_calls += 1
+            invoices = await self.crypto.get_invoices(invoice_ids)
+            if invoices is None:
+                self.errors += 1
+            else:
+                for invoice in invoices:
+                    try:
+                        if await self.settle(invoice) is not None:
+                            settled += 1
+                    except Exception as e:
+                        self.errors += 1
+                        logger.error(f"Ошибка зачисления счета {invoice.get('invoice_id')}: {e}")
+
+            if len(page) < self.batch_size:
+                break
+
+        # Пока счета оплачиваются - проверяем часто, иначе реже
+        if settled:
+            self.interval = self.min_interval
+        elif pending:
+            self.interval = min(self.interval * 2, self.max_interval)
+        else:
+            self.interval = self.max_interval
+
+        self.cycles += 1
+        self.api_calls += api_calls
+        self.last_cycle = {"pending": pending, "settled": settled, "api_calls": api_calls}
+        if pending:
+            logger.info(f"Цикл сверки счетов: {self.last_cycle}, следующий через {self.interval:g} с")
+        return self.last_cycle
+
+    async def settle(self, invoice: Dict[str, Any]) -> Optional[Settlement]:
+        """
+        Применить итоговый статус счета CryptoBot к платежу
+
+        Args:
+            invoice: Счет из getInvoices или webhook (invoice_id, status)
+
+        Returns:
+            Settlement, если платеж завершен этим вызовом; None, если
+            счет еще не оплачен, платеж не найден или уже завершен
+        """
+        status = FINAL_STATUSES.get(invoice.get('status'))
+        invoice_id = invoice.get('invoice_id')
+        if status is None or invoice_id is None:
+            return None
+        tx_id = str(invoice_id)
+
+        credited = 0.0
+        if status == 'paid':
+            payment = await self.db.get_payment_by_tx(tx_id)
+            if payment is None or payment['status'] != 'pending':
+                return None
+            credited = round(await self._to_rub(float(payment['amount']), payment['currency']), 2)
+
+        result = await self.db.settle_payment(tx_id, status, credited)
+        if result is None:
+            return None
+        payment, user = result
+        self.user_service.cache.pop(user.user_id)
+        if status == 'paid':
+            self.settled += 1
+            logger.info(f"Платеж {tx_id} подтвержден для пользователя {user.user_id}: +{credited}₽")
+        return Settlement(payment, user, credited)
+
+    @staticmethod
+    async def _to_rub(amount: float, currency: str) -> float:
+        """Сумма платежа в рублях по текущему курсу (или запасному)"""
+        try:
+            return await convert_to_rub(amount, currency)
+        except Exception as e:
+            logger.warning(f"Не удалось конвертировать {currency} в RUB: {e}. Используется запасной курс")
+            return amount * FALLBACK_RUB_RATES.get(currency.upper(), 1.0)
@@ -0,0 +1,174 @@
+"""
+AI Backend
+Интерфейс бэкенда генерации откликов и локальная заглушка модели
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import re
+from typing import Any, AsyncIterator, List, Mapping, NamedTuple, Optional, Protocol, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Граница "токенов" заглушки: слово вместе с пробелами после него
+_TOKEN_RE = re.compile(r"\S+\s*")
+
+# Поля профиля, влияющие на текст отклика (остальные в промпт не попадают,
+# чтобы одинаковые промпты разных пользователей совпадали)
+PROFILE_FIELDS = ('role', 'skills', 'experience')
+
+
+class Prompt(NamedTuple):
+    """Запрос на генерацию отклика"""
+
+    task: Mapping[str, Any]
+    profile: Optional[Mapping[str, Any]]
+    text: str
+
+    @property
+    def key(self) -> str:
+        """Ключ кеша: одинаковые промпты дают одинаковый ключ"""
+        return hashlib.sha1(self.text.encode("utf-8")).hexdigest()
+
+
+def build_prompt(task: Mapping[str, Any], profile: Optional[Mapping[str, Any]] = None) -> Prompt:
+    """
+    Собрать промпт для генерации отклика
+
+    Args:
+        task: Задание (title, description, category, budget)
+        profile: Профиль исполнителя (учитываются только PROFILE_FIELDS)
+
+    Returns:
+        Prompt с текстом для модели
+    """
+    lines = [
+        "Напиши короткий вежливый отклик фрилансера на задание.",
+        f"Категория: {task.get('category', '')}",
+        f"Задание: {task.get('title', '')}",
+        f"Описание: {task.get('description') or ''}",
+        f"Бюджет: {task.get('budget', 0)}₽",
+    ]
+    if profile:
+        for field in PROFILE_FIELDS:
+            value = profile.get(field)
+            if value:
+                if isinstance(value, (list, tuple)):
+                    value = ", ".join(str(v) for v in value)
+                lines.append(f"Исполнитель ({field}): {value}")
+    return Prompt(task, profile, "\n".join(lines))
+
+
+class AIBackend(Protocol):
+    """
+    Бэкенд генерации
+
+    Получает пачку промптов (не больше max_batch) и возвращает тексты
+    в том же порядке, либо отдает текст одного промпта по мере
+    генерации (stream). Очередь, кеш, таймауты и ограничение числа
+    одновременных вызовов реализует AIService.
+    """
+
+    name: str
+    max_batch: int
+
+    async def generate_batch(self, prompts: Sequence[Prompt]) -> List[str]:
+        """Сгенерировать тексты для пачки промптов"""
+        ...
+
+    def stream(self, prompt: Prompt) -> AsyncIterator[str]:
+        """Генерировать текст одного промпта частями (каждая часть - продолжение)"""
+        ...
+
+    async def close(self) -> None:
+        """Освободить ресурсы бэкенда"""
+        ...
+
+
+class LocalModelBackend:
+    """
+    Заглушка локальной модели
+
+    Имитирует инференс пачки: задержка latency плюс per_item на каждый
+    промпт пачки (пачка выгоднее одиночных вызовов), тексты собираются
+    из шаблонов категории с учетом профиля. В потоковом режиме первое
+    слово приходит через latency, остальные - через token_delay.
+    Подходит для проверки очереди, пакетирования, потоковой выдачи и
+    таймаутов без реальной модели.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        templates: Mapping[str, Sequence[str]],
+        latency: float = 0.3,
+        per_item: float = 0.05,
+        max_batch: int = 8,
+        token_delay: float = 0.05
+    ):
+        """
+        Args:
+            templates: Шаблоны откликов по категориям (см. AIService.templates)
+            latency: Постоянная задержка вызова в секундах
+            per_item: Дополнительная задержка на каждый промпт пачки
+            max_batch: Максимальный размер пачки
+            token_delay: Задержка между словами в потоковом режиме
+        """
+        self.templates = templates
+        self.latency = latency
+        self.per_item = per_item
+        self.max_batch = max_batch
+        self.token_delay = token_delay
+
+    async def generate_batch(self, prompts: Sequence[Prompt]) -> List[str]:
+        """Сгенерировать тексты для пачки промптов"""
+        await asyncio.sleep(self.latency + self.per_item * len(prompts))
+        return [self._complete(prompt) for prompt in prompts]
+
+    async def stream(self, prompt: Prompt) -> AsyncIterator[str]:
+        """Генерировать текст одного промпта по словам"""
+        await asyncio.sleep(self.latency)
+        for index, token in enumerate(_TOKEN_RE.findall(self._complete(prompt))):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    def _complete(self, prompt: Prompt) -> str:
+        task = prompt.task
+        category_templates = self.templates.get(task.get("category")) or next(iter(self.templates.values()))
+        text = random.choice(category_templates).format(title=task.get("title", "задание"))
+        skills = (prompt.profile or {}).get("skills")
+        if skills:
+            if isinstance(skills, (list, tuple)):
+                skills = ", ".join(str(s) for s in skills)
+            text += f" Мои навыки: {skills}."
+        return text
+
+    async def close(self) -> None:
+        """Освободить ресурсы бэкенда"""
+        return None
+
+
+def create_backend(name: str, templates: Mapping[str, Sequence[str]], max_batch: int = 8) -> Optional[AIBackend]:
+    """
+    Создать бэкенд по имени из конфигурации
+
+    Args:
+        name: "template" (без модели, только шаблоны) или "local"
+        templates: Шаблоны откликов по категориям
+        max_batch: Максимальный размер пачки
+
+    Returns:
+        Бэкенд или None для "template"
+
+    Raises:
+        ValueError: Если имя бэкенда неизвестно
+    """
+    if name == "template":
+        return None
+    if name == "local":
+        return LocalModelBackend(templates, max_batch=max_batch)
+    raise ValueError(f"Неизвестный AI-бэкенд: {name}")
@@ -3,60 +3,79 @@ AI Service
 Сервис для AI-генерации откликов на задания
 """
 
+import asyncio
 import logging
 import random
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Mapping, Optional, Set, Tuple
+from services.ai_backend import AIBackend, Prompt, build_prompt
+from services.cache import TTLCache
+from database.response_templates import CATEGORY_TEMPLATES, FALLBACK_TEMPLATE_ID, render_template
 
 logger = logging.getLogger(__name__)
 
+# Шаблоны откликов по категориям (ответ без модели и запасной вариант);
+# отклики по шаблонам хранятся в БД как ID шаблона, см. database.response_templates
+TEMPLATES = CATEGORY_TEMPLATES
+
 
 class AIService:
     """
     Сервис для генерации откликов на задания
     
-    В текущей версии использует шаблоны для генерации.
-    В будущих версиях будет интегрирован с OpenAI/YandexGPT
+    Без бэкенда (AI_BACKEND=template) отклики собираются из шаблонов.
+    С бэкендом модели (см. services.ai_backend) generate():
+    - отдает готовый текст из LRU-кеша по ключу промпта (задание и
+      профиль), одинаковые одновременные запросы ждут одну генерацию;
+    - собирает одновременные запросы в пачки до max_batch, ожидая
+      не дольше batch_window секунд;
+    - ограничивает число одновременных вызовов бэкенда;
+    - при таймауте, ошибке или переполнении очереди возвращает
+      шаблонный отклик, чтобы пользователь не ждал модель.
     """
     
-    def __init__(self):
-        """Инициализация сервиса"""
-        self.templates = {
-            "Копирайтинг": [
-                "Здравствуйте! Готов выполнить задание '{title}'. "
-                "Имею опыт в копирайтинге, портфолио вышлю в личку. "
-                "Срок выполнения: 1-2 дня. Жду вашего ответа!",
-                
-                "Добрый день! Заинтересовало ваше задание. "
-                "Напишу качественный текст с учетом целевой аудитории. "
-                "Готов приступить сразу после согласования деталей."
-            ],
-            "Креатив": [
-                "Привет! Задание '{title}' выглядит интересно. "
-                "Предложу несколько вариантов слоганов на выбор. "
-                "Опыт работы с брендингом есть, примеры покажу.",
-                
-                "Здравствуйте! Креативные задачи — моя специализация. "
-                "Разработаю несколько концепций под ваш бренд. Обсудим?"
-            ],
-            "Переводы": [
-                "Добрый день! Выполню перевод качественно и в срок. "
-                "Опыт технических переводов 3+ года. "
-                "Гарантирую точность и соблюдение терминологии.",
-                
-                "Здравствуйте! Готов взяться за перевод. "
-                "Носитель русского языка, отличное знание английского. "
-                "Срок: 1 день."
-            ],
-            "SMM": [
-                "Привет! Задание '{title}' мне подходит. "
-                "Создам вовлекающий пост с учетом специфики LinkedIn. "
-                "Есть опыт ведения бизнес-аккаунтов.",
-                
-                "Здравствуйте! Напишу пост, который зайдет вашей аудитории. "
-                "Учту тренды и особенности платформы. Обсудим детали?"
-            ]
-        }
-        logger.info("AIService инициализирован")
+    def __init__(
+        self,
+        backend: Optional[AIBackend] = None,
+        max_concurrency: int = 2,
+        timeout: float = 10.0,
+        batch_window: float = 0.02,
+        cache_size: int = 1000,
+        cache_ttl: float = 3600.0
+    ):
+        """
+        Инициализация сервиса
+        
+        Args:
+            backend: Бэкенд модели (None - только шаблоны)
+            max_concurrency: Максимум одновременных вызовов бэкенда
+            timeout: Сколько ждать генерации, прежде чем ответить шаблоном (в секундах)
+            batch_window: Сколько ждать наполнения пачки (в секундах)
+            cache_size: Размер кеша сгенерированных откликов
+            cache_ttl: Время жизни отклика в кеше (в секундах)
+        """
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # Сверх этого числа ожидающих промптов запросы сразу получают шаблон
+        self.max_pending = max_concurrency * (backend.max_batch if backend else 1) * 4
+        
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: List[Tuple[Prompt, asyncio.Future]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Task] = set()
+        
+        self.generated = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+        self.errors = 0
+        
+        self.templates = TEMPLATES
+        backend_name = backend.name if backend else "template"
+        logger.info(f"AIService инициализирован (бэкенд: {backend_name})")
     
     def generate_response(self, task: Dict[str, Any]) -> str:
         """
@@ -91,14 +110,13 @@ class AIService:
         except Exception as e:
             logger.error(f"Ошибка генерации отклика: {e}")
             # Возвращаем базовый отклик в случае ошибки
-            return f"Здравствуйте! Готов выполнить задание '{task.get('title', 'задание')}'. Обсудим детали?"
+            return render_template(FALLBACK_TEMPLATE_ID, task.get('title', 'задание'))
     
-    def generate_custom_response(self, task: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
+    async def generate_custom_response(self, task: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
         """
         Генерирует персонализированный отклик на основе профиля пользователя
         
-        Эта функция будет использоваться в будущих версиях для
-        персонализации откликов на основе навыков и опыта пользователя.
+        Обертка над generate(task, profile) для старых вызовов.
         
         Args:
             task: Словарь с данными задания
@@ -107,9 +125,7 @@ class AIService:
         Returns:
             Персонализированный текст отклика
         """
-        # TODO: Реализовать в версии 0.0.3 с интеграцией AI
-        logger.warning("generate_custom_response еще не реализован, используется базовая генерация")
-        return self.generate_response(task)
+        return await self.generate(task, user_profile)
     
     def validate_response(self, response_text: str) -> bool:
         """
@@ -132,3 +148,182 @@ class AIService:
             return False
         
         return True
+    
+    # ========================================================================
+    # ГЕНЕРАЦИЯ ЧЕРЕЗ БЭКЕНД
+    # ========================================================================
+    
+    async def generate(self, task: Mapping[str, Any], profile: Optional[Mapping[str, Any]] = None) -> str:
+        """
+        Сгенерировать отклик через бэкенд модели
+        
+        Args:
+            task: Словарь с данными задания (id, title, description, category, budget)
+            profile: Профиль исполнителя (см. ai_backend.PROFILE_FIELDS)
+            
+        Returns:
+            Текст отклика (шаблонный, если модель не успела или недоступна)
+        """
+        if self.backend is None:
+            return self.generate_response(task)
+        
+        prompt = build_prompt(task, profile)
+        key = prompt.key
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        future = self._inflight.get(key)
+        if future is None:
+            if len(self._inflight) >= self.max_pending:
+                self.fallbacks += 1
+                logger.warning("Очередь генерации переполнена, отклик собран из шаблона")
+                return self.generate_response(task)
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            self._enqueue(prompt, future)
+        
+        try:
+            # shield: по таймауту перестаем ждать, но генерация
+            # продолжается и ее результат попадет в кеш
+            text = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            text = None
+        
+        if text is None:
+            self.fallbacks += 1
+            return self.generate_response(task)
+        return text
+    
+    async def stream(self, task: Mapping[str, Any], profile: Optional[Mapping[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Генерировать отклик по частям
+        
+        Потоковая генерация идет в обход пачек (каждый поток - отдельный
+        вызов бэкенда), но под тем же ограничением одновременных вызовов.
+        Если очередная часть не пришла за timeout секунд или бэкенд
+        вернул ошибку, последним значением отдается шаблонный отклик.
+        
+        Args:
+            task: Словарь с данными задания
+            profile: Профиль исполнителя (см. ai_backend.PROFILE_FIELDS)
+            
+        Yields:
+            Текст отклика, накопленный к текущему моменту (последнее
+            значение - итоговый отклик)
+        """
+        if self.backend is None:
+            yield self.generate_response(task)
+            return
+        
+        prompt = build_prompt(task, profile)
+        cached = self.cache.get(prompt.key)
+        if cached is not None:
+            yield cached
+            return
+        
+        text = ""
+        try:
+            async with self._semaphore:
+                chunks = self.backend.stream(prompt).__aiter__()
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        text += chunk
+                        yield text
+                finally:
+                    aclose = getattr(chunks, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            text = ""
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Ошибка потоковой генерации отклика на задание {task.get('id')}: {e}")
+            text = ""
+        
+        if text and self.validate_response(text):
+            self.generated += 1
+            self.cache.set(prompt.key, text)
+        else:
+            self.fallbacks += 1
+            yield self.generate_response(task)
+    
+    def _enqueue(self, prompt: Prompt, future: asyncio.Future):
+        """Добавить промпт в текущую пачку"""
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.backend.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+    
+    def _flush(self):
+        """Отправить накопленную пачку бэкенду"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[Prompt, asyncio.Future]]):
+        """Сгенерировать пачку и раздать результаты ожидающим"""
+        texts: List[Optional[str]] = [None] * len(batch)
+        try:
+            async with self._semaphore:
+                result = await self.backend.generate_batch([prompt for prompt, _ in batch])
+            if len(result) != len(batch):
+                raise ValueError(f"бэкенд вернул {len(result)} результатов вместо {len(batch)}")
+            self.batches += 1
+            texts = [text if text and self.validate_response(text) else None for text in result]
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Ошибка генерации пачки из {len(batch)} откликов: {e}")
+        finally:
+            # Неудачная генерация отдает None: ожидающие ответят шаблоном
+            for index, (prompt, future) in enumerate(batch):
+                text = texts[index]
+                self._inflight.pop(prompt.key, None)
+                if text is not None:
+                    self.generated += 1
+                    self.cache.set(prompt.key, text)
+                if not future.done():
+                    future.set_result(text)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Статистика генерации
+        
+        Returns:
+            Словарь со счетчиками, средним размером пачки и статистикой кеша
+        """
+        return {
+            "backend": self.backend.name if self.backend else "template",
+            "generated": self.generated,
+            "batches": self.batches,
+            "avg_batch": round(self.generated / self.batches, 2) if self.batches else 0.0,
+            "fallbacks": self.fallbacks,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "pending": len(self._inflight),
+            "cache": self.cache.stats()
+        }
+    
+    async def close(self):
+        """Дождаться начатых генераций и закрыть бэкенд"""
+        if self.backend is None:
+            return
+        self._flush()
+        if self._batches:
+            await asyncio.wait(self._batches, timeout=self.timeout)
+        await self.backend.close()
+        logger.info(f"AIService остановлен: {self.stats()}")
@@ -0,0 +1,324 @@
+"""
+Auto Earn Engine
+Фоновые автоматические отклики на задания за пользователей
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from database.models import TaskResponse
+from database.storage import Storage
+from services.task_catalog import Task, TaskCatalog
+from services.task_service import TaskService
+from config import TASK_REWARD
+
+logger = logging.getLogger(__name__)
+
+# Допустимые значения суточного лимита (кнопки в меню автозаработка)
+DAILY_LIMIT_CHOICES = (3, 5, 10, 20)
+
+
+def day_start(now: Optional[datetime] = None) -> datetime:
+    """
+    Начало текущих суток в UTC (граница суточного лимита)
+
+    Args:
+        now: Текущее время (None - сейчас)
+
+    Returns:
+        Полночь UTC
+    """
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class AutoEarnEngine:
+    """
+    Движок автоматических откликов
+
+    Раз в interval секунд обходит пользователей с включенным
+    автозаработком страницами по batch_size (keyset по user_id, без
+    OFFSET). Для каждой страницы одним запросом читается сводка
+    откликов: на какие задания пользователь уже откликался и сколько
+    откликов сделал с начала суток. Остаток суточного лимита
+    заполняется самыми дорогими заданиями снимка каталога, на которые
+    откликов еще нет.
+
+    Пары (пользователь, задание) генерируются в пуле из workers
+    воркеров через AIService, готовые отклики записываются пачками
+    (record_responses: вставка и начисление наград одним запросом).
+    Одновременно движок держит не больше одной страницы пользователей
+    и одного обращения к хранилищу, а между пачками отдает управление
+    event loop, поэтому обработка апдейтов не ждет конца цикла.
+    """
+
+    def __init__(
+        self,
+        db_client: Storage,
+        task_service: TaskService,
+        interval: float = 300.0,
+        daily_limit: int = 5,
+        workers: int = 4,
+        batch_size: int = 200
+    ):
+        """
+        Инициализация движка
+
+        Args:
+            db_client: Хранилище с настройками и откликами
+            task_service: Сервис заданий (каталог, AIService, кеш профилей)
+            interval: Период цикла в секундах
+            daily_limit: Лимит откликов в сутки для новых настроек
+            workers: Количество одновременных генераций
+            batch_size: Размер страницы пользователей и пачки записи
+        """
+        self.db = db_client
+        self.task_service = task_service
+        self.interval = interval
+        self.daily_limit = daily_limit
+        self.workers = workers
+        self.batch_size = batch_size
+
+        self._task: Optional[asyncio.Task] = None
+        self._next_run = 0.0
+
+        self.cycles = 0
+        self.responses = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.last_cycle: Dict[str, Any] = {}
+
+    # ========================================================================
+    # ЗАПУСК И ОСТАНОВКА
+    # ========================================================================
+
+    async def start(self):
+        """Запустить периодические циклы"""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(
+            f"Автозаработок запущен: цикл {self.interval:g} с, {self.workers} воркеров, пачка {self.batch_size}"
+        )
+
+    async def stop(self):
+        """Остановить циклы (прерванная пачка будет обработана в следующем цикле)"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        logger.info(f"Автозаработок остановлен: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Метрики автозаработка
+
+        Returns:
+            Словарь со счетчиками, итогами последнего цикла и временем
+            до следующего цикла (в секундах)
+        """
+        return {
+            "cycles": self.cycles,
+            "responses": self.responses,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "last_cycle": dict(self.last_cycle),
+            "next_run": max(0.0, round(self._next_run - time.monotonic(), 1))
+        }
+
+    async def _loop(self):
+        """Выполнять циклы с периодом interval"""
+        while True:
+            self._next_run = time.monotonic() + self.interval
+            try:
+                await self.run_cycle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Ошибка цикла автозаработка: {e}")
+            await asyncio.sleep(max(0.0, self._next_run - time.monotonic()))
+
+    # ========================================================================
+    # НАСТРОЙКИ
+    # ========================================================================
+
+    async def get_settings(self, user_id: int) -> Dict[str, Any]:
+        """
+        Получить настройки пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Настройки (enabled, daily_limit); значения по умолчанию, если их нет
+        """
+        settings = await self.db.get_auto_earn_settings(user_id)
+        if settings is None:
+            settings = {'user_id': user_id, 'enabled': False, 'daily_limit': self.daily_limit}
+        return settings
+
+    async def set_enabled(self, user_id: int, enabled: bool) -> Dict[str, Any]:
+        """
+        Включить или выключить автозаработок
+
+        Args:
+            user_id: Telegram user ID
+            enabled: Новое состояние
+
+        Returns:
+            Сохраненные настройки
+        """
+        settings = await self.get_settings(user_id)
+        return await self.db.save_auto_earn_settings(user_id, {
+            'enabled': enabled,
+            'daily_limit': settings['daily_limit']
+        })
+
+    async def set_daily_limit(self, user_id: int, daily_limit: int) -> Dict[str, Any]:
+        """
+        Изменить суточный лимит автоматических откликов
+
+        Args:
+            user_id: Telegram user ID
+            daily_limit: Лимит из DAILY_LIMIT_CHOICES
+
+        Returns:
+            Сохраненные настройки
+
+        Raises:
+            ValueError: Если лимит не из допустимых значений
+        """
+        if daily_limit not in DAILY_LIMIT_CHOICES:
+            raise ValueError(f"Недопустимый лимит: {daily_limit}")
+        settings = await self.get_settings(user_id)
+        return await self.db.save_auto_earn_settings(user_id, {
+            'enabled': settings['enabled'],
+            'daily_limit': daily_limit
+        })
+
+    async def get_today_count(self, user_id: int) -> int:
+        """
+        Количество откликов пользователя с начала суток (UTC)
+
+        Args:
+            user_id: Telegram user ID
+        """
+        summary = await self.db.get_response_summary([user_id], day_start())
+        return summary[user_id][1]
+
+    # ========================================================================
+    # ЦИКЛ
+    # ========================================================================
+
+    @staticmethod
+    def _pick_tasks(catalog: TaskCatalog, responded: Set[int], quota: int) -> Tuple[Task, ...]:
+        """Самые дорогие задания каталога без отклика пользователя, не больше quota"""
+        # Откликнутые задания могут стоять в начале выдачи, поэтому
+        # берем с запасом на их количество
+        tasks, _, _ = catalog.page(limit=quota + len(responded))
+        return tuple(task for task in tasks if task["id"] not in responded)[:quota]
+
+    async def _generate(self, pairs: asyncio.Queue, ready: List[TaskResponse]):
+        """Воркер: генерировать отклики для пар (пользователь, задание) из очереди"""
+        ai = self.task_service.ai
+        while True:
+            user_id, task = await pairs.get()
+            try:
+                text = await ai.generate(task)
+                ready.append(TaskResponse(
+                    user_id=user_id,
+                    task_id=task["id"],
+                    task_title=task["title"],
+                    response_text=text,
+                    earned=TASK_REWARD
+                ))
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Ошибка генерации отклика пользователя {user_id} на задание {task['id']}: {e}")
+            finally:
+                pairs.task_done()
+
+    async def _write(self, responses: List[TaskResponse]) -> int:
+        """Записать отклики пачками по batch_size, сбросить кеш профилей и пометить отклики"""
+        written = 0
+        user_cache = self.task_service.user_cache
+        for start in range(0, len(responses), self.batch_size):
+            batch = responses[start:start + self.batch_size]
+            try:
+                created = await self.db.record_responses(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Ошибка записи {len(batch)} автоматических откликов: {e}")
+                continue
+
+            written += len(created)
+            self.duplicates += len(batch) - len(created)
+            by_user: Dict[int, List[int]] = {}
+            for response in created:
+                by_user.setdefault(response.user_id, []).append(response.task_id)
+            for user_id, task_ids in by_user.items():
+                self.task_service.mark_responded(user_id, task_ids)
+                if user_cache is not None:
+                    user_cache.pop(user_id)
+            await asyncio.sleep(0)
+        return written
+
+    async def run_cycle(self) -> Dict[str, Any]:
+        """
+        Выполнить один цикл по всем пользователям с автозаработком
+
+        Returns:
+            Итоги цикла: users, responses, duration
+        """
+        started = time.monotonic()
+        since = day_start()
+        # Весь цикл работает с одним снимком каталога
+        catalog = self.task_service.catalog
+
+        pairs: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 4)
+        ready: List[TaskResponse] = []
+        workers = [asyncio.create_task(self._generate(pairs, ready)) for _ in range(self.workers)]
+
+        users = 0
+        written = 0
+        after_user_id = 0
+        try:
+            while True:
+                page = await self.db.get_auto_earn_users(after_user_id, self.batch_size)
+                if not page:
+                    break
+                after_user_id = page[-1]['user_id']
+                users += len(page)
+
+                summary = await self.db.get_response_summary([s['user_id'] for s in page], since)
+                for settings in page:
+                    responded, today = summary[settings['user_id']]
+                    quota = settings['daily_limit'] - today
+                    if quota <= 0:
+                        continue
+                    for task in self._pick_tasks(catalog, responded, quota):
+                        await pairs.put((settings['user_id'], task))
+
+                await pairs.join()
+                batch, ready[:] = list(ready), []
+                written += await self._write(batch)
+
+                if len(page) < self.batch_size:
+                    break
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        self.cycles += 1
+        self.responses += written
+        self.last_cycle = {
+            "users": users,
+            "responses": written,
+            "duration": round(time.monotonic() - started, 2)
+        }
+        logger.info(f"Цикл автозаработка завершен: {self.last_cycle}")
+        return self.last_cycle
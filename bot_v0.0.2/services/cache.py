@@ -0,0 +1,104 @@
+"""
+Cache
+Ограниченный in-memory кеш с LRU вытеснением и TTL
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    LRU кеш с ограничением по времени жизни записей
+
+    Используется сервисами для хранения часто читаемых данных
+    (профили пользователей и т.п.) в памяти процесса.
+    Не потокобезопасен: рассчитан на работу внутри одного event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        """
+        Инициализация кеша
+
+        Args:
+            maxsize: Максимальное количество записей
+            ttl: Время жизни записи в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Получить значение из кеша
+
+        Args:
+            key: Ключ записи
+            default: Значение, если записи нет или она устарела
+
+        Returns:
+            Закешированное значение или default
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохранить значение в кеш
+
+        Args:
+            key: Ключ записи
+            value: Значение
+            ttl: Время жизни записи (по умолчанию self.ttl)
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Удалить запись и вернуть ее значение"""
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def clear(self) -> None:
+        """Очистить кеш"""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Статистика использования кеша
+
+        Returns:
+            Словарь с hits, misses, hit_rate и size
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._data)
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
@@ -0,0 +1,97 @@
+"""
+Catalog Watcher
+Фоновая перезагрузка каталога заданий при изменении источника
+"""
+
+import asyncio
+import logging
+from typing import Hashable, Optional
+from services.task_service import TaskService
+from services.task_sources import TaskSource
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogWatcher:
+    """
+    Следит за источником заданий и обновляет каталог TaskService
+
+    Раз в interval секунд запрашивает версию источника; если она
+    изменилась, загружает задания и подменяет каталог новым снимком
+    (TaskService.replace_tasks). Ошибки источника не останавливают
+    бота: продолжает работать последний успешно загруженный каталог.
+    """
+
+    def __init__(self, task_service: TaskService, source: TaskSource, interval: float = 30.0):
+        """
+        Args:
+            task_service: Сервис, каталог которого обновляется
+            source: Источник заданий
+            interval: Период опроса источника в секундах
+        """
+        self.task_service = task_service
+        self.source = source
+        self.interval = interval
+        self._version: Optional[Hashable] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Перезагрузить каталог, если источник изменился
+
+        Args:
+            force: Загрузить задания даже при неизменной версии
+
+        Returns:
+            True если каталог был обновлен
+        """
+        version = await self.source.version()
+        if version is None:
+            if self._version is not None or force:
+                logger.warning(f"Источник заданий {self.source.name} недоступен, используется текущий каталог")
+            self._version = None
+            return False
+
+        if version == self._version and not force:
+            return False
+
+        tasks = await self.source.load()
+        if not tasks:
+            logger.warning(f"Источник заданий {self.source.name} пуст, каталог не изменен")
+            self._version = version
+            return False
+
+        self.task_service.replace_tasks(tasks)
+        self._version = version
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка перезагрузки каталога из {self.source.name}: {e}")
+
+    async def start(self):
+        """Загрузить каталог и запустить фоновый опрос источника"""
+        try:
+            await self.reload(force=True)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки каталога из {self.source.name}: {e}")
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Каталог заданий отслеживается: {self.source.name}, опрос каждые {self.interval} с")
+
+    async def stop(self):
+        """Остановить фоновый опрос"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,569 @@
+"""
+Delivery Engine
+Доставка уведомлений и рассылок с учетом лимитов Telegram
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter
+)
+from aiogram.types import InlineKeyboardMarkup
+from database.storage import Storage
+from keyboards.inline_keyboards import get_task_notification_keyboard
+
+logger = logging.getLogger(__name__)
+
+# Попыток отправки при сетевых ошибках
+MAX_ATTEMPTS = 3
+
+# Окно расчета скорости доставки (в секундах)
+THROUGHPUT_WINDOW = 60.0
+
+# Сколько уведомлений одного чата держать в памяти; остальные строки
+# очереди чата откладываются и перечитываются через poll_interval
+MAX_CHAT_PENDING = 10
+
+
+class TokenBucket:
+    """
+    Ведро токенов
+
+    Токены пополняются со скоростью rate в секунду до capacity.
+    Если токена нет, acquire() резервирует следующий (счетчик уходит
+    в минус) и спит до его появления, поэтому одновременные вызовы
+    выстраиваются в очередь без блокировки. delay() показывает, через
+    сколько секунд появится токен, не забирая его.
+    """
+
+    __slots__ = ('rate', 'capacity', '_tokens', '_updated')
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Токенов в секунду
+            capacity: Максимальный запас токенов (размер всплеска)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Взять токен, дождавшись его при необходимости"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+    def delay(self) -> float:
+        """Через сколько секунд появится токен (0 - есть сейчас)"""
+        tokens = min(self.capacity, self._tokens + (time.monotonic() - self._updated) * self.rate)
+        return max(0.0, (1 - tokens) / self.rate)
+
+    def acquire_nowait(self):
+        """Взять токен без ожидания (счетчик может уйти в минус)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - 1
+        self._updated = now
+
+    def idle(self) -> bool:
+        """Ведро полное (давно не использовалось)"""
+        return self._tokens + (time.monotonic() - self._updated) * self.rate >= self.capacity
+
+
+class _Message:
+    """Сообщение в очереди отправки"""
+
+    __slots__ = ('chat_id', 'text', 'reply_markup', 'enqueued_at', 'future')
+
+    def __init__(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup],
+        enqueued_at: Optional[float],
+        future: asyncio.Future
+    ):
+        self.chat_id = chat_id
+        self.text = text
+        self.reply_markup = reply_markup
+        self.enqueued_at = enqueued_at
+        self.future = future
+
+
+class DeliveryEngine:
+    """
+    Движок доставки сообщений
+
+    Источники сообщений:
+    - очередь уведомлений notification_outbox (строка удаляется после
+      отправки, поэтому после перезапуска доставка продолжается);
+    - рассылки broadcasts: получатели читаются из users страницами по
+      user_id, а позиция сохраняется после каждой страницы.
+
+    Сообщения ждут в очередях своих чатов. Чат попадает в очередь
+    готовых, когда в его ведре (лимит на чат) появляется токен; пока
+    его сообщение отправляется, следующее сообщение чата не берется, а
+    токен чата берется непосредственно перед отправкой.
+    Воркеры берут готовые чаты и ждут только общее ведро (лимит бота),
+    поэтому чат с длинной очередью не занимает воркеры и не задерживает
+    остальных. Ответ 429 (TelegramRetryAfter) приостанавливает всю
+    отправку на retry_after секунд, после чего сообщение отправляется
+    повторно.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        db_client: Storage,
+        rate: float = 25.0,
+        chat_rate: float = 1.0,
+        workers: int = 8,
+        page_size: int = 100,
+        poll_interval: float = 5.0,
+        max_chats: int = 10000,
+        max_pending: int = 1000
+    ):
+        """
+        Инициализация движка
+
+        Args:
+            bot: Бот для отправки сообщений
+            db_client: Хранилище с очередью уведомлений и рассылками
+            rate: Общий лимит сообщений в секунду
+            chat_rate: Лимит сообщений в секунду в один чат
+            workers: Количество одновременных отправок
+            page_size: Размер страницы чтения очереди и получателей
+            poll_interval: Период проверки очереди без сигнала (в секундах)
+            max_chats: Сколько ведер чатов держать в памяти
+            max_pending: Максимум уведомлений очереди в памяти (прочитанных, но не отправленных)
+        """
+        self.bot = bot
+        self.db = db_client
+        self.chat_rate = chat_rate
+        self.workers = workers
+        self.page_size = page_size
+        self.poll_interval = poll_interval
+        self.max_chats = max_chats
+        self.max_pending = max_pending
+
+        self._bucket = TokenBucket(rate, capacity=max(1.0, rate))
+        self._chat_buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._paused_until = 0.0
+
+        # chat_id -> сообщения чата (чат есть в словаре, пока у него есть
+        # сообщение в очереди готовых, в ожидании токена или в отправке)
+        self._chat_queues: Dict[int, Deque[_Message]] = {}
+        # Чаты, в ведре которых есть токен
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._outbox_ready = asyncio.Event()
+        self._broadcast_ready = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0
+        self._sent_times: Deque[float] = deque()
+        self._lag = 0.0
+        self._last_lag = 0.0
+        self._broadcast_progress: Dict[int, Tuple[int, int, int]] = {}
+
+    # ========================================================================
+    # ЗАПУСК И ОСТАНОВКА
+    # ========================================================================
+
+    async def start(self):
+        """Запустить воркеры и чтение очереди и рассылок"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._outbox_loop()))
+        self._tasks.append(asyncio.create_task(self._broadcast_loop()))
+        logger.info(f"Движок доставки запущен: {self._bucket.rate:g} сообщ./с, {self.workers} воркеров")
+
+    async def stop(self):
+        """Остановить доставку (неотправленное останется в хранилище)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Движок доставки остановлен: {self.stats()}")
+
+    def wake(self):
+        """Сообщить о новых уведомлениях в очереди"""
+        self._outbox_ready.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Метрики доставки
+
+        Returns:
+            Словарь со счетчиками, скоростью (сообщений в секунду за
+            последнюю минуту), задержкой уведомлений (от постановки в
+            очередь до отправки, сглаженной и последней) и прогрессом
+            рассылок
+        """
+        now = time.monotonic()
+        self._trim_sent_times(now)
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "throughput": len(self._sent_times) / THROUGHPUT_WINDOW,
+            "lag": round(self._lag, 2),
+            "last_lag": round(self._last_lag, 2),
+            "queue": sum(len(queue) for queue in self._chat_queues.values()),
+            "chats": len(self._chat_queues),
+            "paused": max(0.0, round(self._paused_until - now, 1)),
+            "broadcasts": dict(self._broadcast_progress)
+        }
+
+    def _trim_sent_times(self, now: float):
+        while self._sent_times and self._sent_times[0] < now - THROUGHPUT_WINDOW:
+            self._sent_times.popleft()
+
+    # ========================================================================
+    # ОТПРАВКА
+    # ========================================================================
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, capacity=1.0)
+            self._chat_buckets[chat_id] = bucket
+            # Вытесняем давно не использованные ведра
+            while len(self._chat_buckets) > self.max_chats:
+                oldest_id, oldest = next(iter(self._chat_buckets.items()))
+                if not oldest.idle():
+                    break
+                del self._chat_buckets[oldest_id]
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def _wait_pause(self):
+        """Подождать окончания паузы после 429"""
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def _send(self, message: _Message) -> bool:
+        """
+        Отправить сообщение с учетом лимитов
+
+        Returns:
+            True если доставлено, False при окончательной ошибке
+        """
+        attempts = 0
+        while True:
+            await self._wait_pause()
+            await self._bucket.acquire()
+            await self._wait_pause()
+            # Токен чата уже есть (см. _worker), ожидания здесь нет
+            self._chat_bucket(message.chat_id).acquire_nowait()
+            try:
+                await self.bot.send_message(message.chat_id, message.text, reply_markup=message.reply_markup)
+                return True
+            except TelegramRetryAfter as e:
+                self.throttled += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                logger.warning(f"Лимит Telegram: пауза доставки {e.retry_after} с")
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                logger.info(f"Сообщение пользователю {message.chat_id} не доставлено: {e}")
+                return False
+            except (TelegramNetworkError, asyncio.TimeoutError) as e:
+                attempts += 1
+                if attempts >= MAX_ATTEMPTS:
+                    logger.warning(f"Сообщение пользователю {message.chat_id} не доставлено после {attempts} попыток: {e}")
+                    return False
+                self.retries += 1
+                await asyncio.sleep(2 ** attempts)
+            except Exception as e:
+                logger.error(f"Ошибка отправки пользователю {message.chat_id}: {e}")
+                return False
+
+    def _submit(
+        self,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup],
+        enqueued_at: Optional[float]
+    ) -> asyncio.Future:
+        """
+        Поставить сообщение в очередь чата
+
+        Returns:
+            Future с результатом доставки (True - доставлено)
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self._chat_queues.get(chat_id)
+        if queue is None:
+            queue = self._chat_queues[chat_id] = deque()
+            queue.append(_Message(chat_id, text, reply_markup, enqueued_at, future))
+            self._schedule(chat_id)
+        else:
+            queue.append(_Message(chat_id, text, reply_markup, enqueued_at, future))
+        return future
+
+    def _schedule(self, chat_id: int):
+        """Сделать чат готовым, когда в его ведре появится токен"""
+        delay = self._chat_bucket(chat_id).delay()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._ready.put_nowait, chat_id)
+        else:
+            self._ready.put_nowait(chat_id)
+
+    async def _worker(self):
+        """Воркер: отправлять сообщения готовых чатов"""
+        while True:
+            chat_id = await self._ready.get()
+            if self._chat_bucket(chat_id).delay() > 0:
+                # Таймер готовности сработал раньше появления токена
+                self._schedule(chat_id)
+                continue
+            queue = self._chat_queues[chat_id]
+            message = queue.popleft()
+            try:
+                delivered = await self._send(message)
+            except asyncio.CancelledError:
+                message.future.cancel()
+                raise
+
+            # Следующее сообщение чата - после отправки текущего и по токену чата
+            if queue:
+                self._schedule(chat_id)
+            else:
+                del self._chat_queues[chat_id]
+
+            now = time.monotonic()
+            if delivered:
+                self.sent += 1
+                self._sent_times.append(now)
+                self._trim_sent_times(now)
+            else:
+                self.failed += 1
+            if message.enqueued_at is not None:
+                self._last_lag = max(0.0, time.time() - message.enqueued_at)
+                self._lag = self._last_lag if not self._lag else 0.9 * self._lag + 0.1 * self._last_lag
+            if not message.future.done():
+                message.future.set_result(delivered)
+
+    async def _dispatch(self, items: List[Tuple[int, str, Optional[InlineKeyboardMarkup], Optional[float]]]) -> List[bool]:
+        """
+        Отправить пачку сообщений и дождаться результатов
+
+        Args:
+            items: Список (chat_id, текст, клавиатура, время постановки в очередь)
+
+        Returns:
+            Результаты доставки в том же порядке
+        """
+        futures = [self._submit(*item) for item in items]
+        return list(await asyncio.gather(*futures))
+
+    # ========================================================================
+    # УВЕДОМЛЕНИЯ
+    # ========================================================================
+
+    @staticmethod
+    def _enqueued_at(value: Any) -> Optional[float]:
+        """Время постановки уведомления в очередь (unix time)"""
+        if not value:
+            return None
+        try:
+            moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+
+    async def _outbox_loop(self):
+        """
+        Читать очередь уведомлений и отправлять, не дожидаясь страницы целиком
+
+        Строки читаются по возрастанию id, пока в памяти меньше
+        max_pending уведомлений; обработанные строки удаляются пачками.
+        Строки чата, у которого в памяти уже MAX_CHAT_PENDING
+        уведомлений, пропускаются и перечитываются с начала таблицы через
+        poll_interval, поэтому один чат не занимает всю память очереди.
+        """
+        loop = asyncio.get_running_loop()
+        after_id = 0
+        # ID строк, переданных на отправку и еще не удаленных
+        taken: Set[int] = set()
+        done_ids: List[int] = []
+        in_flight: Set[asyncio.Future] = set()
+        deferred = False
+        rescan_at: Optional[float] = None
+
+        def on_done(row_id: int, future: asyncio.Future):
+            in_flight.discard(future)
+            done_ids.append(row_id)
+
+        while True:
+            # Недоставленные окончательно тоже удаляются, чтобы не блокировать очередь
+            if done_ids:
+                batch = list(done_ids)
+                try:
+                    await self.db.delete_notifications(batch)
+                    del done_ids[:len(batch)]
+                    taken.difference_update(batch)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Ошибка удаления отправленных уведомлений: {e}")
+                    await asyncio.sleep(self.poll_interval)
+
+            if len(in_flight) >= self.max_pending:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            if rescan_at is not None and loop.time() >= rescan_at:
+                after_id, rescan_at = 0, None
+
+            self._outbox_ready.clear()
+            try:
+                rows = await self.db.get_notifications(after_id, self.page_size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка чтения очереди уведомлений: {e}")
+                rows = []
+
+            if not rows:
+                # Отложенные строки перечитываются с начала через poll_interval
+                if deferred and rescan_at is None:
+                    rescan_at = loop.time() + self.poll_interval
+                    deferred = False
+                timeout = self.poll_interval if rescan_at is None else max(0.0, rescan_at - loop.time())
+                if in_flight or done_ids:
+                    # Отправленные строки удаляются не позже чем через секунду
+                    timeout = min(timeout, 1.0)
+                try:
+                    await asyncio.wait_for(self._outbox_ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            after_id = rows[-1]['id']
+            for row in rows:
+                if row['id'] in taken:
+                    continue
+                if len(self._chat_queues.get(row['user_id'], ())) >= MAX_CHAT_PENDING:
+                    deferred = True
+                    continue
+                future = self._submit(
+                    row['user_id'],
+                    row['text'],
+                    get_task_notification_keyboard(row['task_id']) if row.get('task_id') else None,
+                    self._enqueued_at(row.get('created_at'))
+                )
+                taken.add(row['id'])
+                in_flight.add(future)
+                future.add_done_callback(functools.partial(on_done, row['id']))
+
+    # ========================================================================
+    # РАССЫЛКИ
+    # ========================================================================
+
+    async def broadcast(self, text: str, created_by: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Создать рассылку всем пользователям
+
+        Args:
+            text: Текст сообщения (HTML)
+            created_by: Telegram ID автора
+
+        Returns:
+            Созданная рассылка
+        """
+        broadcast = await self.db.create_broadcast({'text': text, 'created_by': created_by})
+        self._broadcast_ready.set()
+        logger.info(f"Создана рассылка {broadcast['id']} (автор {created_by})")
+        return broadcast
+
+    async def cancel_broadcast(self, broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Отменить рассылку (остановится после текущей страницы получателей)
+
+        Args:
+            broadcast_id: ID рассылки
+
+        Returns:
+            Обновленная рассылка или None, если не найдена
+        """
+        broadcast = await self.db.update_broadcast(broadcast_id, {'status': 'cancelled'})
+        if broadcast:
+            logger.info(f"Рассылка {broadcast_id} отменена")
+        return broadcast
+
+    async def _broadcast_loop(self):
+        """Выполнять незавершенные рассылки по очереди"""
+        while True:
+            self._broadcast_ready.clear()
+            try:
+                broadcasts = await self.db.get_running_broadcasts()
+                for broadcast in broadcasts:
+                    await self._run_broadcast(broadcast)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка выполнения рассылки: {e}")
+                broadcasts = []
+
+            if not broadcasts:
+                try:
+                    await asyncio.wait_for(self._broadcast_ready.wait(), self.poll_interval * 12)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _run_broadcast(self, broadcast: Dict[str, Any]):
+        """Разослать сообщение от сохраненной позиции до конца таблицы users"""
+        broadcast_id = broadcast['id']
+        last_user_id = broadcast['last_user_id']
+        sent, failed = broadcast['sent'], broadcast['failed']
+        logger.info(f"Рассылка {broadcast_id}: продолжение после user_id {last_user_id}")
+
+        while True:
+            user_ids = await self.db.get_user_ids(last_user_id, self.page_size)
+            if not user_ids:
+                await self.db.update_broadcast(broadcast_id, {'status': 'done'})
+                self._broadcast_progress.pop(broadcast_id, None)
+                logger.info(f"Рассылка {broadcast_id} завершена: доставлено {sent}, ошибок {failed}")
+                return
+
+            results = await self._dispatch([(user_id, broadcast['text'], None, None) for user_id in user_ids])
+            delivered = sum(results)
+            sent += delivered
+            failed += len(results) - delivered
+            last_user_id = user_ids[-1]
+            self._broadcast_progress[broadcast_id] = (sent, failed, last_user_id)
+
+            # Позиция сохраняется после страницы: после перезапуска
+            # повторно может уйти не больше одной страницы
+            current = await self.db.update_broadcast(broadcast_id, {
+                'last_user_id': last_user_id,
+                'sent': sent,
+                'failed': failed
+            })
+            if current is None or current['status'] != 'running':
+                self._broadcast_progress.pop(broadcast_id, None)
+                logger.info(f"Рассылка {broadcast_id} остановлена: доставлено {sent}, ошибок {failed}")
+                return
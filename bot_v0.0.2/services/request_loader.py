@@ -0,0 +1,130 @@
+"""
+Request Loader
+Загрузчик данных в рамках обработки одного update
+"""
+
+import asyncio
+import logging
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from database.storage import Storage
+from database.models import User, TaskResponse
+
+logger = logging.getLogger(__name__)
+
+# Загрузчик текущего update (устанавливается middleware в bot.py)
+_current_loader: ContextVar[Optional["RequestLoader"]] = ContextVar("request_loader", default=None)
+
+
+class _BatchLoader:
+    """
+    Мемоизирующий загрузчик с объединением запросов
+
+    Все ключи, запрошенные в течение одной итерации event loop,
+    загружаются одним вызовом batch_fn. Повторный запрос того же
+    ключа возвращает уже полученный (или ожидаемый) результат.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]):
+        """
+        Args:
+            batch_fn: Корутина, принимающая список ключей и возвращающая словарь ключ -> значение
+        """
+        self._batch_fn = batch_fn
+        self._results: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[Hashable] = []
+
+    async def load(self, key: Hashable) -> Any:
+        """Получить значение по ключу (None, если batch_fn его не вернула)"""
+        future = self._results.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._results[key] = future
+            self._pending.append(key)
+            if len(self._pending) == 1:
+                loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Положить заранее известное значение (например, после записи в БД)"""
+        future = self._results.get(key)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self._results[key] = future
+        future.set_result(value)
+
+    def clear(self, key: Hashable) -> None:
+        """Забыть значение ключа, чтобы следующий load перечитал его"""
+        future = self._results.get(key)
+        if future is not None and future.done():
+            del self._results[key]
+
+    def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        asyncio.ensure_future(self._run(keys))
+
+    async def _run(self, keys: List[Hashable]) -> None:
+        try:
+            values = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._results.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._results.get(key)
+            if future is not None and not future.done():
+                future.set_result(values.get(key))
+
+
+class RequestLoader:
+    """
+    Загрузчик пользователей и откликов в рамках одного update
+
+    Создается middleware на каждый update и живет, пока он обрабатывается.
+    Повторные чтения одного и того же пользователя или списка откликов
+    внутри handler'а и сервисов не приводят к новым запросам в БД.
+    """
+
+    def __init__(self, db_client: Storage):
+        """
+        Args:
+            db_client: Клиент для работы с БД
+        """
+        self.db = db_client
+        self._users = _BatchLoader(db_client.get_users_by_ids)
+        self._responses = _BatchLoader(db_client.get_responses_by_user_ids)
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        """Получить пользователя (один запрос на update)"""
+        return await self._users.load(user_id)
+
+    async def get_user_responses(self, user_id: int) -> List[TaskResponse]:
+        """Получить отклики пользователя (один запрос на update)"""
+        return await self._responses.load(user_id) or []
+
+    def prime_user(self, user: User) -> None:
+        """Запомнить актуальную версию пользователя после записи"""
+        self._users.prime(user.user_id, user)
+
+    def clear_responses(self, user_id: int) -> None:
+        """Сбросить отклики пользователя после добавления нового"""
+        self._responses.clear(user_id)
+
+
+def get_request_loader() -> Optional[RequestLoader]:
+    """Загрузчик текущего update или None вне обработки update"""
+    return _current_loader.get()
+
+
+def bind_request_loader(loader: RequestLoader) -> Token:
+    """Сделать загрузчик текущим для обработки update"""
+    return _current_loader.set(loader)
+
+
+def reset_request_loader(token: Token) -> None:
+    """Вернуть предыдущий загрузчик после обработки update"""
+    _current_loader.reset(token)
@@ -0,0 +1,152 @@
+"""
+Subscription Matcher
+Индекс подписок для сопоставления новых заданий с подписчиками
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set
+from services.task_search import tokenize
+
+# Задание каталога (см. services.task_catalog.Task)
+Task = Mapping[str, Any]
+
+
+class Rule:
+    """Подписка в виде, удобном для проверки задания"""
+
+    __slots__ = ('id', 'user_id', 'categories', 'terms', 'min_budget')
+
+    def __init__(self, subscription: Mapping[str, Any]):
+        """
+        Args:
+            subscription: Подписка из хранилища (id, user_id, categories, keywords, min_budget)
+        """
+        self.id: int = subscription['id']
+        self.user_id: int = subscription['user_id']
+        self.categories: FrozenSet[str] = frozenset(subscription.get('categories') or ())
+        self.terms: FrozenSet[str] = frozenset(
+            term for keyword in subscription.get('keywords') or () for term in tokenize(keyword)
+        )
+        self.min_budget: float = float(subscription.get('min_budget') or 0)
+
+    def matches(self, task: Task, terms: FrozenSet[str]) -> bool:
+        """
+        Подходит ли задание подписке
+
+        Args:
+            task: Задание
+            terms: Термы заголовка и описания задания (см. task_search.tokenize)
+        """
+        if self.categories and task['category'] not in self.categories:
+            return False
+        if task['budget'] < self.min_budget:
+            return False
+        return not self.terms or not self.terms.isdisjoint(terms)
+
+
+class SubscriptionMatcher:
+    """
+    Индекс подписок
+
+    Каждая подписка попадает ровно в одну корзину:
+    - по каждому своему ключевому слову, если слова заданы;
+    - иначе по каждой своей категории;
+    - иначе в общую корзину (подписка только на бюджет).
+
+    Для нового задания кандидаты берутся из корзин его слов, его
+    категории и общей корзины, после чего каждый кандидат проверяется
+    целиком. Стоимость сопоставления зависит от числа слов задания и
+    числа кандидатов, а не от общего числа подписок.
+    """
+
+    def __init__(self, subscriptions: Iterable[Mapping[str, Any]] = ()):
+        """
+        Args:
+            subscriptions: Начальный набор подписок
+        """
+        self._rules: Dict[int, Rule] = {}
+        self._by_term: Dict[str, Set[int]] = {}
+        self._by_category: Dict[str, Set[int]] = {}
+        self._any: Set[int] = set()
+        for subscription in subscriptions:
+            self.add(subscription)
+
+    def _buckets(self, rule: Rule) -> List[Set[int]]:
+        if rule.terms:
+            return [self._by_term.setdefault(term, set()) for term in rule.terms]
+        if rule.categories:
+            return [self._by_category.setdefault(category, set()) for category in rule.categories]
+        return [self._any]
+
+    def add(self, subscription: Mapping[str, Any]) -> Rule:
+        """
+        Добавить или заменить подписку
+
+        Args:
+            subscription: Подписка из хранилища
+
+        Returns:
+            Правило подписки
+        """
+        self.remove(subscription['id'])
+        rule = Rule(subscription)
+        self._rules[rule.id] = rule
+        for bucket in self._buckets(rule):
+            bucket.add(rule.id)
+        return rule
+
+    def remove(self, subscription_id: int) -> Optional[Rule]:
+        """
+        Удалить подписку из индекса
+
+        Args:
+            subscription_id: ID подписки
+
+        Returns:
+            Удаленное правило или None, если подписки нет
+        """
+        rule = self._rules.pop(subscription_id, None)
+        if rule is None:
+            return None
+        if rule.terms:
+            index, keys = self._by_term, rule.terms
+        elif rule.categories:
+            index, keys = self._by_category, rule.categories
+        else:
+            self._any.discard(rule.id)
+            return rule
+        for key in keys:
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.discard(rule.id)
+                if not bucket:
+                    del index[key]
+        return rule
+
+    def match(self, task: Task) -> Set[int]:
+        """
+        Найти подписчиков, которым подходит задание
+
+        Args:
+            task: Новое задание
+
+        Returns:
+            Telegram ID пользователей (каждый не более одного раза)
+        """
+        terms = frozenset(tokenize(f"{task['title']} {task.get('description') or ''}"))
+
+        candidates: Set[int] = set(self._any)
+        candidates.update(self._by_category.get(task['category'], ()))
+        for term in terms:
+            bucket = self._by_term.get(term)
+            if bucket:
+                candidates.update(bucket)
+
+        users: Set[int] = set()
+        for subscription_id in candidates:
+            rule = self._rules[subscription_id]
+            if rule.user_id not in users and rule.matches(task, terms):
+                users.add(rule.user_id)
+        return users
+
+    def __len__(self) -> int:
+        return len(self._rules)
@@ -0,0 +1,367 @@
+"""
+Subscription Service
+Подписки пользователей на новые задания и очередь уведомлений
+"""
+
+import asyncio
+import html
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from database.storage import Storage
+from services.delivery_engine import DeliveryEngine
+from services.subscription_matcher import SubscriptionMatcher
+from services.task_search import tokenize
+from services.task_service import TaskService, Task
+
+logger = logging.getLogger(__name__)
+
+# Максимум ключевых слов в одной подписке
+MAX_KEYWORDS = 10
+
+# Страница загрузки подписок при запуске
+LOAD_PAGE_SIZE = 1000
+
+# Пачка записи уведомлений в хранилище и максимальная задержка (в секундах)
+FLUSH_BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+
+# Сколько заданий перечислять в сводке уведомлений
+DIGEST_TITLES = 5
+
+_BUDGET_RE = re.compile(r"(?:\bот|>=?)\s*(\d[\d\s]*)\s*(?:₽|руб\.?|р\.?)?", re.IGNORECASE)
+_WORD_SPLIT_RE = re.compile(r"[\s,;]+")
+
+
+def parse_subscription(text: str, categories: Sequence[str]) -> Tuple[List[str], List[str], float]:
+    """
+    Разобрать аргументы команды /subscribe
+
+    Известные названия категорий становятся фильтром по категории,
+    "от 1000" (или ">1000") - минимальным бюджетом, остальные слова -
+    ключевыми словами.
+
+    Args:
+        text: Текст после команды, например "статья кофейня Копирайтинг от 300"
+        categories: Категории каталога
+
+    Returns:
+        Tuple (категории, ключевые слова, минимальный бюджет)
+    """
+    found: List[str] = []
+    for category in sorted(categories, key=len, reverse=True):
+        pattern = re.compile(rf"(?<!\w){re.escape(category)}(?!\w)", re.IGNORECASE)
+        if pattern.search(text):
+            found.append(category)
+            text = pattern.sub(" ", text)
+
+    min_budget = 0.0
+    match = _BUDGET_RE.search(text)
+    if match:
+        min_budget = float(re.sub(r"\s", "", match.group(1)))
+        text = text[:match.start()] + " " + text[match.end():]
+
+    keywords: List[str] = []
+    for word in _WORD_SPLIT_RE.split(text.lower()):
+        if word and tokenize(word) and word not in keywords:
+            keywords.append(word)
+
+    return found, keywords[:MAX_KEYWORDS], min_budget
+
+
+def format_subscription(subscription: Dict[str, Any]) -> str:
+    """
+    Описание подписки для сообщений (HTML)
+
+    Args:
+        subscription: Подписка из хранилища
+
+    Returns:
+        Строка вида "🏷 Копирайтинг · 💰 от 300₽ · 🔑 статья, кофейня"
+    """
+    parts = []
+    if subscription.get('categories'):
+        parts.append("🏷 " + ", ".join(html.escape(c) for c in subscription['categories']))
+    if subscription.get('min_budget'):
+        parts.append(f"💰 от {int(subscription['min_budget'])}₽")
+    if subscription.get('keywords'):
+        parts.append("🔑 " + ", ".join(html.escape(k) for k in subscription['keywords']))
+    return " · ".join(parts) or "все задания"
+
+
+class SubscriptionService:
+    """
+    Сервис подписок на новые задания
+
+    Подписки хранятся в БД и дублируются в памяти в индексе
+    SubscriptionMatcher. TaskService сообщает о каждом новом задании
+    каталога, сервис находит подписчиков и кладет уведомления в
+    ограниченную очередь в памяти; при переполнении
+    уведомления отбрасываются, а не тормозят публикацию заданий.
+    Очередь пачками переносится в хранилище (notification_outbox),
+    откуда уведомления отправляет DeliveryEngine.
+
+    Пользователь получает не больше notify_limit уведомлений за
+    notify_interval секунд; задания сверх лимита собираются в одну
+    сводку, которая отправляется в конце интервала.
+    """
+
+    def __init__(
+        self,
+        db_client: Storage,
+        task_service: TaskService,
+        delivery: DeliveryEngine,
+        max_per_user: int = 10,
+        queue_size: int = 10000,
+        notify_limit: int = 10,
+        notify_interval: float = 3600.0
+    ):
+        """
+        Инициализация сервиса
+
+        Args:
+            db_client: Хранилище данных (Supabase или SQLite)
+            task_service: Сервис заданий, о новых заданиях которого уведомлять
+            delivery: Движок доставки уведомлений
+            max_per_user: Максимум подписок у одного пользователя
+            queue_size: Емкость очереди уведомлений в памяти
+            notify_limit: Максимум уведомлений пользователю за notify_interval
+            notify_interval: Интервал лимита и отправки сводок (в секундах)
+        """
+        self.db = db_client
+        self.task_service = task_service
+        self.delivery = delivery
+        self.max_per_user = max_per_user
+        self.notify_limit = notify_limit
+        self.notify_interval = notify_interval
+        self.matcher = SubscriptionMatcher()
+        self.notifications: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # user_id -> уведомлений в текущем интервале
+        self._sent_in_window: Dict[int, int] = {}
+        # user_id -> (заданий сверх лимита, первые DIGEST_TITLES из них)
+        self._digests: Dict[int, Tuple[int, List[Task]]] = {}
+        self._batch: List[Dict[str, Any]] = []
+        self._worker: Optional[asyncio.Task] = None
+        self._digest_worker: Optional[asyncio.Task] = None
+
+        self.matched = 0
+        self.dropped = 0
+        self.queued = 0
+        self.digested = 0
+        logger.info("SubscriptionService инициализирован")
+
+    # ========================================================================
+    # ЗАПУСК И ОСТАНОВКА
+    # ========================================================================
+
+    async def start(self):
+        """Загрузить подписки, подключиться к каталогу и запустить запись уведомлений"""
+        after_id = 0
+        while True:
+            page = await self.db.get_subscriptions(after_id, LOAD_PAGE_SIZE)
+            for subscription in page:
+                self.matcher.add(subscription)
+            if len(page) < LOAD_PAGE_SIZE:
+                break
+            after_id = page[-1]['id']
+
+        self.task_service.add_listener(self.on_new_tasks)
+        self._worker = asyncio.create_task(self._flush())
+        self._digest_worker = asyncio.create_task(self._digest_loop())
+        logger.info(f"Подписки загружены: {len(self.matcher)}")
+
+    async def stop(self):
+        """Остановить запись уведомлений в очередь доставки"""
+        workers = [task for task in (self._worker, self._digest_worker) if task is not None]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._worker = self._digest_worker = None
+
+        # Уведомления и сводки из памяти сохраняем, чтобы отправить их после перезапуска
+        self._close_window()
+        pending, self._batch = self._batch, []
+        while not self.notifications.empty():
+            pending.append(self.notifications.get_nowait())
+        if pending:
+            try:
+                await self.db.enqueue_notifications(pending)
+                self.queued += len(pending)
+            except Exception as e:
+                self.dropped += len(pending)
+                logger.error(f"Не удалось сохранить {len(pending)} уведомлений: {e}")
+        logger.info(f"Подписки остановлены: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Статистика подписок
+
+        Returns:
+            Словарь со счетчиками и глубиной очереди уведомлений
+        """
+        return {
+            "subscriptions": len(self.matcher),
+            "matched": self.matched,
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "digested": self.digested,
+            "queue": self.notifications.qsize()
+        }
+
+    # ========================================================================
+    # ПОДПИСКИ
+    # ========================================================================
+
+    async def get_user_subscriptions(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Получить подписки пользователя
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Список подписок (старые первыми)
+        """
+        return await self.db.get_user_subscriptions(user_id)
+
+    async def subscribe(self, user_id: int, query: str) -> Dict[str, Any]:
+        """
+        Создать подписку по тексту команды
+
+        Args:
+            user_id: Telegram user ID
+            query: Аргументы /subscribe (см. parse_subscription)
+
+        Returns:
+            Созданная подписка
+
+        Raises:
+            ValueError: Если в запросе нет условий или превышен лимит подписок
+        """
+        categories, keywords, min_budget = parse_subscription(query, self.task_service.get_available_categories())
+        if not (categories or keywords or min_budget):
+            raise ValueError("Укажите категорию, ключевые слова или минимальный бюджет")
+
+        existing = await self.db.get_user_subscriptions(user_id)
+        if len(existing) >= self.max_per_user:
+            raise ValueError(f"Можно иметь не более {self.max_per_user} подписок")
+
+        subscription = await self.db.create_subscription({
+            'user_id': user_id,
+            'categories': categories,
+            'keywords': keywords,
+            'min_budget': min_budget
+        })
+        self.matcher.add(subscription)
+        logger.info(f"Пользователь {user_id} подписался: {categories} {keywords} от {min_budget}")
+        return subscription
+
+    async def unsubscribe(self, user_id: int, subscription_id: Optional[int] = None) -> int:
+        """
+        Удалить подписку пользователя или все его подписки
+
+        Args:
+            user_id: Telegram user ID
+            subscription_id: ID подписки (None - все)
+
+        Returns:
+            Количество удаленных подписок
+        """
+        removed = await self.db.delete_subscriptions(user_id, subscription_id)
+        for removed_id in removed:
+            self.matcher.remove(removed_id)
+        logger.info(f"Пользователь {user_id} удалил подписки: {removed}")
+        return len(removed)
+
+    # ========================================================================
+    # УВЕДОМЛЕНИЯ
+    # ========================================================================
+
+    def on_new_tasks(self, tasks: List[Task]):
+        """
+        Сопоставить новые задания с подписками и поставить уведомления в очередь
+
+        Задания сверх лимита пользователя откладываются в его сводку.
+
+        Args:
+            tasks: Задания, появившиеся в каталоге
+        """
+        for task in tasks:
+            for user_id in self.matcher.match(task):
+                self.matched += 1
+                sent = self._sent_in_window.get(user_id, 0)
+                if sent >= self.notify_limit:
+                    count, listed = self._digests.get(user_id, (0, []))
+                    if len(listed) < DIGEST_TITLES:
+                        listed.append(task)
+                    self._digests[user_id] = (count + 1, listed)
+                    continue
+                self._sent_in_window[user_id] = sent + 1
+                self._put({'user_id': user_id, 'task_id': task['id'], 'text': self._render(task)})
+
+    def _put(self, notification: Dict[str, Any]):
+        """Поставить уведомление в очередь в памяти (при переполнении - отбросить)"""
+        try:
+            self.notifications.put_nowait(notification)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _close_window(self):
+        """Завершить интервал лимита: поставить сводки в очередь и обнулить счетчики"""
+        digests, self._digests = self._digests, {}
+        # Сводка засчитывается в лимит следующего интервала
+        self._sent_in_window = dict.fromkeys(digests, 1)
+        for user_id, (count, listed) in digests.items():
+            self.digested += count
+            self._put({'user_id': user_id, 'task_id': None, 'text': self._render_digest(count, listed)})
+
+    async def _digest_loop(self):
+        """Раз в notify_interval отправлять сводки и обнулять лимиты"""
+        while True:
+            await asyncio.sleep(self.notify_interval)
+            self._close_window()
+
+    @staticmethod
+    def _render(task: Task) -> str:
+        """Текст уведомления о задании (HTML)"""
+        return (
+            "🔔 <b>Новое задание по вашей подписке</b>\n\n"
+            f"📌 <b>{html.escape(task['title'])}</b>\n"
+            f"💰 {task['budget']}₽ · 🏷 {html.escape(task['category'])}"
+        )
+
+    @staticmethod
+    def _render_digest(count: int, tasks: List[Task]) -> str:
+        """Текст сводки заданий сверх лимита уведомлений (HTML)"""
+        lines = [f"🔔 <b>Новых заданий по вашим подпискам: {count}</b>\n"]
+        for task in tasks:
+            lines.append(f"📌 {html.escape(task['title'])} · 💰 {task['budget']}₽")
+        if count > len(tasks):
+            lines.append(f"…и еще {count - len(tasks)}")
+        lines.append("\nВсе задания: /tasks")
+        return "\n".join(lines)
+
+    async def _flush(self):
+        """Переносить уведомления из памяти в очередь доставки в хранилище пачками"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Собираемая пачка видна stop(), чтобы не потерять ее при остановке
+            self._batch = batch = [await self.notifications.get()]
+            deadline = loop.time() + FLUSH_INTERVAL
+            while len(batch) < FLUSH_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.notifications.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self.db.enqueue_notifications(batch)
+                self.queued += len(batch)
+                self.delivery.wake()
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.error(f"Не удалось поставить в очередь {len(batch)} уведомлений: {e}")
+            self._batch = []
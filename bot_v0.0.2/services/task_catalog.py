@@ -0,0 +1,273 @@
+"""
+Task Catalog
+Неизменяемый индексированный каталог заданий
+"""
+
+import math
+import zlib
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from services.task_search import TaskSearchIndex
+
+# Задание в каталоге: словарь только для чтения
+Task = Mapping[str, Any]
+
+# Позиция задания в постраничной выдаче: (-бюджет, -id), по возрастанию
+PageKey = Tuple[float, int]
+
+
+def freeze_task(task: Mapping[str, Any], previous: Optional[Task] = None) -> Task:
+    """
+    Сделать задание неизменяемым
+
+    Args:
+        task: Словарь с данными задания (id, title, description, budget, category)
+        previous: Задание с тем же id из прошлого снимка; если данные
+            не изменились, возвращается оно, а не новая копия
+
+    Returns:
+        Представление словаря только для чтения
+    """
+    if isinstance(task, MappingProxyType):
+        return task
+    if previous is not None and previous == task:
+        return previous
+    return MappingProxyType(dict(task))
+
+
+def category_key(category: str) -> str:
+    """
+    Короткий стабильный ключ категории для callback_data
+
+    Args:
+        category: Название категории
+
+    Returns:
+        8 шестнадцатеричных символов (crc32 названия)
+    """
+    return f"{zlib.crc32(category.encode()):08x}"
+
+
+def page_key(task: Task) -> PageKey:
+    """Позиция задания в выдаче: сначала дорогие, при равном бюджете - новые"""
+    return -task["budget"], -task["id"]
+
+
+def encode_page_cursor(task: Task) -> str:
+    """
+    Упаковать позицию задания для callback_data
+
+    Бюджет записывается точно (целое - без дробной части, дробное -
+    через repr), чтобы decode_page_cursor вернул ровно page_key(task).
+
+    Returns:
+        Строка вида "<бюджет>:<id>"
+    """
+    budget = task['budget']
+    if isinstance(budget, float) and budget.is_integer():
+        budget = int(budget)
+    return f"{budget!r}:{task['id']}"
+
+
+def decode_page_cursor(token: Optional[str]) -> Optional[PageKey]:
+    """
+    Распаковать курсор выдачи заданий
+
+    Args:
+        token: Строка, полученная из encode_page_cursor
+
+    Returns:
+        Позиция (см. page_key) или None, если курсор пустой или поврежден
+    """
+    if not token:
+        return None
+    try:
+        budget, task_id = token.split(":", 1)
+        try:
+            value = int(budget)
+        except ValueError:
+            value = float(budget)
+        return -value, -int(task_id)
+    except ValueError:
+        return None
+
+
+class TaskCatalog:
+    """
+    Снимок каталога заданий с индексами
+
+    Индексы строятся один раз при создании снимка:
+    - id -> задание (поиск за O(1));
+    - категория -> задания категории;
+    - задания, отсортированные по бюджету (выборка диапазона через bisect);
+    - постраничная выдача (все и по категориям) по убыванию бюджета:
+      страница с фильтром по бюджету и курсору - срез через bisect;
+    - полнотекстовый индекс (строится лениво, при первом поиске).
+
+    Снимок не меняется после создания. Чтобы обновить каталог, сервис
+    строит новый снимок и подменяет ссылку на него целиком, поэтому
+    читатели никогда не видят частично обновленные индексы.
+    """
+
+    __slots__ = ('version', '_tasks', '_by_id', '_by_category', '_by_budget', '_budgets', '_categories',
+                 '_listings', '_search_index', '_search_seed')
+
+    def __init__(
+        self,
+        tasks: Iterable[Mapping[str, Any]] = (),
+        version: int = 0,
+        previous: Optional['TaskCatalog'] = None
+    ):
+        """
+        Построение снимка каталога
+
+        Args:
+            tasks: Задания (при повторе id остается последнее)
+            version: Номер версии снимка
+            previous: Прошлый снимок; неизмененные задания берутся из него,
+                поэтому при перезагрузке в памяти не появляется вторая копия
+                всех заданий, а пересоздаются только индексы
+        """
+        previous_by_id = previous._by_id if previous is not None else {}
+        by_id: Dict[int, Task] = {}
+        for task in tasks:
+            frozen = freeze_task(task, previous_by_id.get(task["id"]))
+            by_id[frozen["id"]] = frozen
+
+        by_category: Dict[str, List[Task]] = {}
+        for task in by_id.values():
+            by_category.setdefault(task["category"], []).append(task)
+
+        by_budget = sorted(by_id.values(), key=lambda t: (t["budget"], t["id"]))
+
+        self.version = version
+        self._tasks: Tuple[Task, ...] = tuple(by_id.values())
+        self._by_id = by_id
+        self._by_category: Dict[str, Tuple[Task, ...]] = {
+            category: tuple(items) for category, items in by_category.items()
+        }
+        self._by_budget: Tuple[Task, ...] = tuple(by_budget)
+        self._budgets: Tuple[float, ...] = tuple(t["budget"] for t in by_budget)
+        self._categories: Tuple[str, ...] = tuple(by_category)
+
+        # Выдача строится из уже отсортированного индекса бюджета за O(n)
+        listing = by_budget[::-1]
+        listings: Dict[Optional[str], List[Task]] = {None: listing}
+        for task in listing:
+            listings.setdefault(task["category"], []).append(task)
+        self._listings: Dict[Optional[str], Tuple[Tuple[Task, ...], Tuple[PageKey, ...]]] = {
+            category: (tuple(items), tuple(page_key(t) for t in items))
+            for category, items in listings.items()
+        }
+        self._search_index: Optional[TaskSearchIndex] = None
+        # Индекс прошлого снимка: из него берется разбор неизмененных заданий
+        self._search_seed: Optional[TaskSearchIndex] = None
+        if previous is not None:
+            self._search_seed = previous._search_index if previous._search_index is not None else previous._search_seed
+
+    def get(self, task_id: int) -> Optional[Task]:
+        """Задание по ID или None"""
+        return self._by_id.get(task_id)
+
+    def all(self) -> Tuple[Task, ...]:
+        """Все задания в порядке добавления"""
+        return self._tasks
+
+    def by_category(self, category: str) -> Tuple[Task, ...]:
+        """Задания категории"""
+        return self._by_category.get(category, ())
+
+    def by_budget(self, min_budget: Optional[float] = None, max_budget: Optional[float] = None) -> Tuple[Task, ...]:
+        """
+        Задания с бюджетом в диапазоне [min_budget, max_budget], по возрастанию бюджета
+
+        Args:
+            min_budget: Нижняя граница (None - без ограничения)
+            max_budget: Верхняя граница (None - без ограничения)
+
+        Returns:
+            Срез индекса по бюджету
+        """
+        start = 0 if min_budget is None else bisect_left(self._budgets, min_budget)
+        end = len(self._budgets) if max_budget is None else bisect_right(self._budgets, max_budget)
+        return self._by_budget[start:end]
+
+    def page(
+        self,
+        category: Optional[str] = None,
+        min_budget: Optional[float] = None,
+        max_budget: Optional[float] = None,
+        cursor: Optional[PageKey] = None,
+        direction: str = "next",
+        limit: int = 10
+    ) -> Tuple[Tuple[Task, ...], int, int]:
+        """
+        Страница выдачи заданий (по убыванию бюджета)
+
+        Args:
+            category: Категория (None - все)
+            min_budget: Нижняя граница бюджета (None - без ограничения)
+            max_budget: Верхняя граница бюджета (None - без ограничения)
+            cursor: Позиция задания, от которого листать (None - первая страница)
+            direction: "next" - задания после курсора, "prev" - перед курсором
+            limit: Размер страницы
+
+        Returns:
+            Tuple (задания страницы, смещение страницы в выборке, размер выборки)
+        """
+        tasks, keys = self._listings.get(category, ((), ()))
+        low = 0 if max_budget is None else bisect_left(keys, (-max_budget, -math.inf))
+        high = len(keys) if min_budget is None else bisect_right(keys, (-min_budget, math.inf))
+
+        if cursor is None:
+            start = low
+            end = min(high, start + limit)
+        elif direction == "prev":
+            end = min(high, max(low, bisect_left(keys, cursor)))
+            start = max(low, end - limit)
+        else:
+            start = min(high, max(low, bisect_right(keys, cursor)))
+            end = min(high, start + limit)
+
+        return tasks[start:end], start - low, high - low
+
+    def search_index(self) -> TaskSearchIndex:
+        """Полнотекстовый индекс снимка (строится при первом обращении)"""
+        index = self._search_index
+        if index is None:
+            index = TaskSearchIndex(self._tasks, self._search_seed)
+            self._search_index = index
+            self._search_seed = None
+        return index
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None) -> List[Tuple[Task, float]]:
+        """
+        Поиск заданий по ключевым словам
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимум результатов
+            category: Искать только в категории (None - везде)
+
+        Returns:
+            Список (задание, релевантность), самые релевантные первыми
+        """
+        return self.search_index().search(query, limit, category)
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        """Категории в порядке первого появления"""
+        return self._categories
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._by_id
+
+    def __repr__(self) -> str:
+        return f"TaskCatalog(version={self.version}, tasks={len(self._tasks)}, categories={len(self._categories)})"
@@ -0,0 +1,166 @@
+"""
+Task Search
+Инвертированный индекс заданий с русским стеммингом и ранжированием BM25
+"""
+
+import heapq
+import math
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Any
+
+# Задание каталога (см. services.task_catalog.Task)
+Task = Mapping[str, Any]
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Вес вхождения слова в заголовок относительно описания
+TITLE_WEIGHT = 3
+
+# Минимальная длина основы после отсечения окончания
+MIN_STEM_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[а-яa-z0-9]+")
+
+STOP_WORDS = frozenset({
+    "и", "в", "во", "на", "с", "со", "по", "для", "из", "к", "ко", "о", "об", "от",
+    "до", "за", "у", "не", "а", "но", "или", "как", "что", "это", "the", "a", "an",
+    "of", "for", "to", "in", "on", "and", "or"
+})
+
+# Окончания русских слов, от длинных к коротким (упрощенный стеммер
+# в духе Snowball: отсекаем одно самое длинное подходящее окончание)
+_SUFFIXES = tuple(sorted({
+    # прилагательные и причастия
+    "ими", "ыми", "его", "ого", "ему", "ому", "ее", "ие", "ые", "ое", "ей", "ий", "ый", "ой",
+    "ем", "им", "ым", "ом", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+    "ющий", "ующий", "вший", "ивший", "ывший", "енный", "анный",
+    # глаголы
+    "ать", "ять", "еть", "ить", "уть", "ыть", "ться", "тся", "ешь", "ете", "ите", "ют", "ут",
+    "ала", "ило", "ыла", "ена", "ено", "ишь", "ует", "уют", "ать",
+    # существительные
+    "ами", "ями", "ах", "ях", "ов", "ев", "ам", "ям", "ия", "ие", "ию", "ии", "ью",
+    "ость", "ости", "ение", "ения", "ений", "ание", "ания", "аний", "тель", "теля",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+}, key=len, reverse=True))
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """
+    Упрощенная основа слова
+
+    Args:
+        word: Слово в нижнем регистре
+
+    Returns:
+        Слово без окончания (латиница и числа не изменяются)
+    """
+    # Словарь заданий невелик, поэтому основы кэшируются
+    if not ("а" <= word[0] <= "я"):
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Разбить текст на нормализованные термы
+
+    Args:
+        text: Произвольный текст
+
+    Returns:
+        Основы слов без стоп-слов
+    """
+    words = _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+    return [stem(word) for word in words if word not in STOP_WORDS]
+
+
+# Термы документа: (задание, терм -> взвешенная частота, длина документа)
+_DocTerms = Tuple[Task, Dict[str, int], int]
+
+
+class TaskSearchIndex:
+    """
+    Инвертированный индекс по заголовкам и описаниям заданий
+
+    Строится для одного снимка каталога и далее не меняется. Разбор
+    текста заданий, не изменившихся с прошлого снимка, берется из
+    прошлого индекса, поэтому перестройка после публикации пачки
+    заданий стоит только слияния словарей.
+    """
+
+    def __init__(self, tasks: Iterable[Task], previous: Optional['TaskSearchIndex'] = None):
+        """
+        Args:
+            tasks: Задания снимка каталога
+            previous: Индекс прошлого снимка
+        """
+        previous_docs = previous._docs if previous is not None else {}
+        self._docs: Dict[int, _DocTerms] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        total_length = 0
+
+        for task in tasks:
+            doc = previous_docs.get(task["id"])
+            if doc is None or doc[0] is not task:
+                doc = self._analyze(task)
+            self._docs[task["id"]] = doc
+            total_length += doc[2]
+            for term, freq in doc[1].items():
+                self._postings.setdefault(term, {})[task["id"]] = freq
+
+        self._avg_length = total_length / len(self._docs) if self._docs else 0.0
+
+    @staticmethod
+    def _analyze(task: Task) -> _DocTerms:
+        terms: Dict[str, int] = {}
+        title = tokenize(task["title"])
+        description = tokenize(task.get("description") or "")
+        for term in title:
+            terms[term] = terms.get(term, 0) + TITLE_WEIGHT
+        for term in description:
+            terms[term] = terms.get(term, 0) + 1
+        return task, terms, len(title) * TITLE_WEIGHT + len(description)
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None) -> List[Tuple[Task, float]]:
+        """
+        Найти задания по запросу
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимум результатов
+            category: Искать только в категории (None - везде)
+
+        Returns:
+            Список (задание, релевантность), самые релевантные первыми
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._docs:
+            return []
+
+        total = len(self._docs)
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for task_id, freq in postings.items():
+                length = self._docs[task_id][2]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length)
+                scores[task_id] = scores.get(task_id, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+
+        if category is not None:
+            scores = {task_id: s for task_id, s in scores.items() if self._docs[task_id][0]["category"] == category}
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self._docs[task_id][0], score) for task_id, score in best]
+
+    def __len__(self) -> int:
+        return len(self._docs)
@@ -4,15 +4,21 @@ Task Service
 """
 
 import logging
-from typing import List, Optional, Dict, Any
-from database.supabase_client import SupabaseClient
-from database.models import TaskResponse
+from collections import OrderedDict
+from typing import AbstractSet, Callable, Iterable, List, Mapping, Optional, Dict, Any, Set, Tuple
+from database.storage import Storage
+from database.models import TaskResponse, User
+from database.exceptions import DuplicateResponseError
+from database.pagination import encode_cursor, decode_cursor
 from services.ai_service import AIService
+from services.cache import TTLCache
+from services.task_catalog import Task, TaskCatalog, encode_page_cursor, decode_page_cursor
+from services.request_loader import get_request_loader
 from config import TASK_REWARD
 
 logger = logging.getLogger(__name__)
 
-# Тестовые задания (в памяти)
+# Встроенный каталог заданий (TASKS_SOURCE=builtin и до первой загрузки из источника)
 TASKS = [
     {
         "id": 1,
@@ -60,29 +66,149 @@ class TaskService:
     создания откликов и работы с историей
     """
     
-    def __init__(self, db_client: SupabaseClient, ai_service: AIService):
+    def __init__(
+        self,
+        db_client: Storage,
+        ai_service: AIService,
+        user_cache: Optional[TTLCache] = None,
+        max_ingested_tasks: int = 5000,
+        responded_cache_size: int = 10000,
+        responded_cache_ttl: float = 600.0
+    ):
         """
         Инициализация сервиса
         
         Args:
-            db_client: Клиент для работы с Supabase
+            db_client: Хранилище данных (Supabase или SQLite)
             ai_service: Сервис для AI-генерации откликов
+            user_cache: Кеш профилей UserService (обновляется после начисления награды)
+            max_ingested_tasks: Максимум заданий с бирж в каталоге (старые вытесняются)
+            responded_cache_size: Для скольких пользователей держать множества откликов
+            responded_cache_ttl: Время жизни множества откликов в памяти (в секундах)
         """
         self.db = db_client
         self.ai = ai_service
-        logger.info("TaskService инициализирован")
+        self.user_cache = user_cache
+        self.max_ingested_tasks = max_ingested_tasks
+        self.catalog = TaskCatalog(TASKS)
+        # user_id -> множество ID заданий с откликом (см. get_responded_task_ids)
+        self._responded = TTLCache(maxsize=responded_cache_size, ttl=responded_cache_ttl)
+        # ID заданий с бирж в порядке публикации (сами задания живут в каталоге)
+        self._ingested_ids: "OrderedDict[int, None]" = OrderedDict()
+        # Получатели новых заданий (вызываются после подмены снимка)
+        self._listeners: List[Callable[[List[Task]], None]] = []
+        logger.info(f"TaskService инициализирован ({len(self.catalog)} заданий)")
     
-    def get_all_tasks(self) -> List[Dict[str, Any]]:
+    def _swap_catalog(
+        self,
+        tasks: Iterable[Mapping[str, Any]],
+        new_ids: Optional[AbstractSet[int]] = None
+    ) -> TaskCatalog:
+        """
+        Построить новый снимок каталога и подменить ссылку на него
+        
+        Индексы нового снимка строятся до подмены, поэтому обработчики,
+        читающие каталог в это время, видят либо старую, либо новую
+        версию целиком. Получатели новых заданий узнают о заданиях,
+        которых не было в прошлом снимке (и которые есть в new_ids,
+        если он передан).
+        """
+        current = self.catalog
+        catalog = TaskCatalog(tasks, version=current.version + 1, previous=current)
+        self.catalog = catalog
+        
+        if self._listeners:
+            added = [
+                task for task in catalog
+                if task["id"] not in current and (new_ids is None or task["id"] in new_ids)
+            ]
+            if added:
+                for listener in self._listeners:
+                    try:
+                        listener(added)
+                    except Exception as e:
+                        logger.error(f"Ошибка обработчика новых заданий {listener}: {e}")
+        return catalog
+    
+    def add_listener(self, listener: Callable[[List[Task]], None]):
+        """
+        Подписаться на новые задания каталога
+        
+        Обработчик вызывается синхронно после каждой подмены снимка со
+        списком заданий, которых не было в прошлом снимке (для заданий с
+        бирж - только появившихся впервые, см. publish_tasks).
+        
+        Args:
+            listener: Функция, принимающая список новых заданий
+        """
+        self._listeners.append(listener)
+    
+    def replace_tasks(self, tasks: Iterable[Mapping[str, Any]]) -> TaskCatalog:
+        """
+        Заменить основной каталог заданий (из файла или таблицы tasks)
+        
+        Задания, опубликованные конвейером бирж, сохраняются.
+        
+        Args:
+            tasks: Новый список заданий
+            
+        Returns:
+            Новый снимок каталога
+        """
+        current = self.catalog
+        ingested = [current.get(task_id) for task_id in self._ingested_ids if task_id in current]
+        catalog = self._swap_catalog([*tasks, *ingested])
+        logger.info(f"Каталог заданий обновлен: версия {catalog.version}, {len(catalog)} заданий")
+        return catalog
+    
+    def publish_tasks(
+        self,
+        tasks: List[Mapping[str, Any]],
+        new_ids: Optional[AbstractSet[int]] = None
+    ) -> TaskCatalog:
+        """
+        Добавить или обновить задания с бирж
+        
+        Если заданий с бирж больше max_ingested_tasks, самые старые
+        удаляются из каталога. После перезапуска каталог пуст, и лента
+        биржи публикуется заново целиком, поэтому конвейер передает в
+        new_ids только задания, появившиеся впервые: подписчики не
+        получают повторных уведомлений.
+        
+        Args:
+            tasks: Нормализованные задания (см. ingestion.normalize)
+            new_ids: ID заданий, о которых сообщать подписчикам (None - обо всех,
+                которых не было в каталоге)
+            
+        Returns:
+            Новый снимок каталога
+        """
+        for task in tasks:
+            self._ingested_ids[task["id"]] = None
+            self._ingested_ids.move_to_end(task["id"])
+        
+        evicted = set()
+        while len(self._ingested_ids) > self.max_ingested_tasks:
+            evicted.add(self._ingested_ids.popitem(last=False)[0])
+        
+        fresh = {task["id"]: task for task in tasks if task["id"] not in evicted}
+        kept = [task for task in self.catalog if task["id"] not in fresh and task["id"] not in evicted]
+        catalog = self._swap_catalog([*kept, *fresh.values()], new_ids)
+        logger.debug(f"Опубликовано {len(fresh)} заданий с бирж, каталог: версия {catalog.version}, {len(catalog)} заданий")
+        return catalog
+    
+    def get_all_tasks(self) -> Tuple[Task, ...]:
         """
         Получить список всех доступных заданий
         
         Returns:
             Список заданий
         """
-        logger.debug(f"Получен список из {len(TASKS)} заданий")
-        return TASKS
+        tasks = self.catalog.all()
+        logger.debug(f"Получен список из {len(tasks)} заданий")
+        return tasks
     
-    def get_task_by_id(self, task_id: int) -> Optional[Dict[str, Any]]:
+    def get_task_by_id(self, task_id: int) -> Optional[Task]:
         """
         Получить задание по ID
         
@@ -90,9 +216,9 @@ class TaskService:
             task_id: ID задания
             
         Returns:
-            Словарь с данными задания или None если не найдено
+            Данные задания (только для чтения) или None если не найдено
         """
-        task = next((t for t in TASKS if t["id"] == task_id), None)
+        task = self.catalog.get(task_id)
         
         if task:
             logger.debug(f"Задание {task_id} найдено")
@@ -101,6 +227,50 @@ class TaskService:
         
         return task
     
+    async def get_responded_task_ids(self, user_id: int) -> AbstractSet[int]:
+        """
+        Получить ID заданий, на которые пользователь уже откликался
+        
+        Множество загружается одним запросом при первом обращении и
+        дальше пополняется при создании откликов, поэтому список
+        заданий и карточка задания не обращаются к БД за каждой
+        проверкой. Окончательно дубликат отклоняет уникальный индекс
+        БД, множество лишь избавляет от лишних запросов.
+        
+        Args:
+            user_id: Telegram user ID
+            
+        Returns:
+            Множество ID заданий (только для чтения)
+        """
+        responded = self._responded.get(user_id)
+        if responded is None:
+            try:
+                responded = await self.db.get_responded_task_ids(user_id)
+            except Exception as e:
+                logger.error(f"Ошибка загрузки откликов пользователя {user_id}: {e}")
+                raise
+            # Пока шла загрузка, множество мог создать параллельный запрос
+            responded = self._responded.get(user_id) or responded
+            self._responded.set(user_id, responded)
+            logger.debug(f"Загружено {len(responded)} откликов пользователя {user_id}")
+        return responded
+    
+    def mark_responded(self, user_id: int, task_ids: Iterable[int]):
+        """
+        Добавить задания в множество откликов пользователя
+        
+        Если множество еще не загружено, ничего не делает: при первом
+        обращении оно будет прочитано из БД вместе с новыми откликами.
+        
+        Args:
+            user_id: Telegram user ID
+            task_ids: ID заданий с новыми откликами
+        """
+        responded: Optional[Set[int]] = self._responded.get(user_id)
+        if responded is not None:
+            responded.update(task_ids)
+    
     async def has_user_responded(self, user_id: int, task_id: int) -> bool:
         """
         Проверить, откликался ли пользователь на задание
@@ -112,30 +282,32 @@ class TaskService:
         Returns:
             True если отклик существует, False иначе
         """
-        try:
-            exists = await self.db.check_response_exists(user_id, task_id)
-            logger.debug(f"Проверка отклика пользователя {user_id} на задание {task_id}: {exists}")
-            return exists
-            
-        except Exception as e:
-            logger.error(f"Ошибка проверки существования отклика: {e}")
-            raise
+        return task_id in await self.get_responded_task_ids(user_id)
     
-    async def create_response(self, user_id: int, task_id: int) -> TaskResponse:
+    async def create_response(
+        self,
+        user_id: int,
+        task_id: int,
+        response_text: Optional[str] = None
+    ) -> Tuple[TaskResponse, User]:
         """
         Создать отклик на задание
         
-        Генерирует AI-отклик, сохраняет в БД, обновляет баланс и счетчик заданий
+        Генерирует AI-отклик (если он не передан) и одним запросом к БД
+        сохраняет его, начисляет награду и увеличивает счетчик заданий
         
         Args:
             user_id: Telegram user ID
             task_id: ID задания
+            response_text: Готовый текст отклика (например, показанный
+                пользователю при потоковой генерации)
             
         Returns:
-            Созданный объект TaskResponse
+            Tuple (созданный TaskResponse, обновленный User)
             
         Raises:
-            Exception: Если задание не найдено, отклик уже существует или ошибка БД
+            DuplicateResponseError: Если отклик на задание уже существует
+            Exception: Если задание не найдено или ошибка БД
         """
         try:
             # Проверяем существование задания
@@ -143,13 +315,16 @@ class TaskService:
             if not task:
                 raise Exception(f"Задание {task_id} не найдено")
             
-            # Проверяем, не откликался ли уже
-            if await self.has_user_responded(user_id, task_id):
-                raise Exception(f"Вы уже откликались на задание {task_id}")
+            # Известный дубликат отклоняем до генерации отклика
+            if task_id in await self.get_responded_task_ids(user_id):
+                raise DuplicateResponseError(
+                    f"Пользователь {user_id} уже откликался на задание {task_id}"
+                )
             
             # Генерируем AI-отклик
-            response_text = self.ai.generate_response(task)
-            logger.info(f"AI-отклик сгенерирован для пользователя {user_id} на задание {task_id}")
+            if response_text is None:
+                response_text = await self.ai.generate(task)
+                logger.info(f"AI-отклик сгенерирован для пользователя {user_id} на задание {task_id}")
             
             # Создаем объект отклика
             response = TaskResponse(
@@ -160,19 +335,25 @@ class TaskService:
                 earned=TASK_REWARD
             )
             
-            # Сохраняем в БД
-            created_response = await self.db.create_response(response)
-            
-            # Обновляем баланс пользователя
-            await self.db.update_balance(user_id, TASK_REWARD)
-            
-            # Увеличиваем счетчик выполненных заданий
-            await self.db.increment_completed_tasks(user_id)
+            # Сохраняем отклик, начисляем награду и увеличиваем счетчик
+            # одним запросом; дубликат отклоняется самой БД
+            created_response, user = await self.db.record_response(response)
+            self.mark_responded(user_id, (task_id,))
+            if self.user_cache is not None:
+                self.user_cache.set(user_id, user)
+            loader = get_request_loader()
+            if loader is not None:
+                loader.prime_user(user)
+                loader.clear_responses(user_id)
             
             logger.info(f"Отклик пользователя {user_id} на задание {task_id} успешно создан")
             
-            return created_response
+            return created_response, user
             
+        except DuplicateResponseError:
+            self.mark_responded(user_id, (task_id,))
+            logger.info(f"Повторный отклик пользователя {user_id} на задание {task_id} отклонен")
+            raise
         except Exception as e:
             logger.error(f"Ошибка создания отклика: {e}")
             raise
@@ -188,7 +369,11 @@ class TaskService:
             Список объектов TaskResponse
         """
         try:
-            responses = await self.db.get_user_responses(user_id)
+            loader = get_request_loader()
+            if loader is not None:
+                responses = await loader.get_user_responses(user_id)
+            else:
+                responses = await self.db.get_user_responses(user_id)
             logger.debug(f"Получено {len(responses)} откликов пользователя {user_id}")
             return responses
             
@@ -196,6 +381,47 @@ class TaskService:
             logger.error(f"Ошибка получения откликов пользователя {user_id}: {e}")
             raise
     
+    async def get_responses_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        direction: str = "older"
+    ) -> Tuple[List[TaskResponse], Optional[str], Optional[str]]:
+        """
+        Получить страницу истории откликов
+        
+        Args:
+            user_id: Telegram user ID
+            limit: Размер страницы
+            cursor: Курсор из callback_data (None - первая страница)
+            direction: "older" - следующая страница, "newer" - предыдущая
+            
+        Returns:
+            Tuple (отклики, курсор первого отклика, курсор последнего отклика)
+        """
+        try:
+            responses = await self.db.get_user_responses_page(
+                user_id,
+                limit=limit,
+                cursor=decode_cursor(cursor),
+                direction=direction
+            )
+            
+            if not responses:
+                return [], None, None
+            
+            first, last = responses[0], responses[-1]
+            return (
+                responses,
+                encode_cursor(first.created_at, first.id),
+                encode_cursor(last.created_at, last.id)
+            )
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения страницы откликов пользователя {user_id}: {e}")
+            raise
+    
     async def get_response_stats(self, user_id: int) -> Dict[str, Any]:
         """
         Получить статистику откликов пользователя
@@ -207,39 +433,26 @@ class TaskService:
             Словарь со статистикой
         """
         try:
-            responses = await self.get_user_responses(user_id)
-            
-            if not responses:
-                return {
-                    "total_responses": 0,
-                    "total_earned": 0,
-                    "avg_earned": 0,
-                    "categories": {}
-                }
+            # Агрегаты считаются в БД, здесь только раскладка по категориям
+            stats = await self.db.get_response_stats(user_id)
             
             # Подсчет по категориям
+            catalog = self.catalog
             categories = {}
-            for response in responses:
-                task = self.get_task_by_id(response.task_id)
+            for task_id, count in stats.pop("task_counts").items():
+                task = catalog.get(task_id)
                 if task:
                     category = task["category"]
-                    if category not in categories:
-                        categories[category] = 0
-                    categories[category] += 1
+                    categories[category] = categories.get(category, 0) + count
             
-            return {
-                "total_responses": len(responses),
-                "total_earned": sum(r.earned for r in responses),
-                "avg_earned": sum(r.earned for r in responses) / len(responses),
-                "categories": categories,
-                "latest_response": responses[0].created_at if responses else None
-            }
+            stats["categories"] = categories
+            return stats
             
         except Exception as e:
             logger.error(f"Ошибка получения статистики откликов пользователя {user_id}: {e}")
             raise
     
-    def get_tasks_by_category(self, category: str) -> List[Dict[str, Any]]:
+    def get_tasks_by_category(self, category: str) -> Tuple[Task, ...]:
         """
         Получить задания по категории
         
@@ -249,7 +462,7 @@ class TaskService:
         Returns:
             Список заданий в категории
         """
-        tasks = [t for t in TASKS if t["category"] == category]
+        tasks = self.catalog.by_category(category)
         logger.debug(f"Найдено {len(tasks)} заданий в категории {category}")
         return tasks
     
@@ -260,6 +473,53 @@ class TaskService:
         Returns:
             Список уникальных категорий
         """
-        categories = list(set(t["category"] for t in TASKS))
+        categories = list(self.catalog.categories)
         logger.debug(f"Доступные категории: {categories}")
         return categories
+
+    def get_tasks_page(
+        self,
+        category: Optional[str] = None,
+        min_budget: Optional[float] = None,
+        max_budget: Optional[float] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        direction: str = "next"
+    ) -> Tuple[Tuple[Task, ...], Optional[str], Optional[str], int, int]:
+        """
+        Получить страницу списка заданий с фильтрами
+        
+        Args:
+            category: Категория (None - все)
+            min_budget: Минимальный бюджет (None - без ограничения)
+            max_budget: Максимальный бюджет (None - без ограничения)
+            limit: Размер страницы
+            cursor: Курсор из callback_data (None - первая страница)
+            direction: "next" - следующая страница, "prev" - предыдущая
+            
+        Returns:
+            Tuple (задания, курсор первого задания, курсор последнего задания,
+            смещение страницы, всего заданий по фильтру)
+        """
+        tasks, offset, total = self.catalog.page(
+            category, min_budget, max_budget, decode_page_cursor(cursor), direction, limit
+        )
+        if not tasks:
+            return tasks, None, None, offset, total
+        return tasks, encode_page_cursor(tasks[0]), encode_page_cursor(tasks[-1]), offset, total
+
+    def search_tasks(self, query: str, limit: int = 10, category: Optional[str] = None) -> List[Task]:
+        """
+        Поиск заданий по ключевым словам
+
+        Args:
+            query: Поисковый запрос (слова в любой форме)
+            limit: Максимум результатов
+            category: Искать только в категории (None - везде)
+
+        Returns:
+            Задания, самые релевантные первыми
+        """
+        tasks = [task for task, _ in self.catalog.search(query, limit, category)]
+        logger.debug(f"Поиск '{query}': найдено {len(tasks)} заданий")
+        return tasks
@@ -0,0 +1,127 @@
+"""
+Task Sources
+Источники каталога заданий (JSON файл, хранилище)
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Hashable, List, Optional, Protocol
+from database.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Обязательные поля задания
+REQUIRED_TASK_FIELDS = ("id", "title", "category")
+
+
+class TaskSource(Protocol):
+    """
+    Источник заданий для каталога
+
+    version() должен быть дешевым: его опрашивают периодически,
+    а load() вызывается только когда версия изменилась.
+    """
+
+    name: str
+
+    async def version(self) -> Optional[Hashable]:
+        """Метка версии источника (None - источник недоступен)"""
+        ...
+
+    async def load(self) -> List[Dict[str, Any]]:
+        """Загрузить все задания источника"""
+        ...
+
+
+def normalize_task(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Привести запись задания к формату каталога
+
+    Args:
+        data: Запись из источника
+
+    Returns:
+        Словарь с полями id, title, description, budget, category
+        или None, если запись некорректна
+    """
+    if not isinstance(data, dict) or any(not data.get(name) for name in REQUIRED_TASK_FIELDS):
+        return None
+    try:
+        return {
+            "id": int(data["id"]),
+            "title": str(data["title"]),
+            "description": str(data.get("description") or ""),
+            "budget": int(data.get("budget") or 0),
+            "category": str(data["category"])
+        }
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_tasks(items: List[Any], source: str) -> List[Dict[str, Any]]:
+    """Нормализовать записи, пропуская некорректные с предупреждением"""
+    tasks = []
+    for item in items:
+        task = normalize_task(item)
+        if task is None:
+            logger.warning(f"Пропущено некорректное задание из {source}: {item!r}")
+            continue
+        tasks.append(task)
+    return tasks
+
+
+class JsonTaskSource:
+    """
+    Задания из JSON файла
+
+    Файл содержит список заданий или объект {"tasks": [...]}.
+    Версия - время изменения и размер файла, поэтому опрос стоит один stat().
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к JSON файлу с заданиями
+        """
+        self.path = path
+        self.name = f"json:{path}"
+
+    async def version(self) -> Optional[Hashable]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> List[Dict[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("tasks", [])
+        return normalize_tasks(data, self.name)
+
+    async def load(self) -> List[Dict[str, Any]]:
+        # Чтение и разбор файла не должны блокировать event loop
+        return await asyncio.to_thread(self._read)
+
+
+class StorageTaskSource:
+    """
+    Задания из таблицы tasks хранилища (Supabase или SQLite)
+    """
+
+    def __init__(self, db_client: Storage):
+        """
+        Args:
+            db_client: Хранилище данных
+        """
+        self.db = db_client
+        self.name = "storage:tasks"
+
+    async def version(self) -> Optional[Hashable]:
+        return await self.db.get_tasks_version()
+
+    async def load(self) -> List[Dict[str, Any]]:
+        return normalize_tasks(await self.db.get_tasks(), self.name)
@@ -4,9 +4,11 @@ User Service
 """
 
 import logging
-from typing import Optional
-from database.supabase_client import SupabaseClient
+from typing import Optional, Dict, Any
+from database.storage import Storage
 from database.models import User
+from services.cache import TTLCache
+from services.request_loader import get_request_loader
 
 logger = logging.getLogger(__name__)
 
@@ -19,16 +21,66 @@ class UserService:
     обновления баланса и других операций с пользователями
     """
     
-    def __init__(self, db_client: SupabaseClient):
+    def __init__(self, db_client: Storage, cache_size: int = 10000, cache_ttl: float = 60.0):
         """
         Инициализация сервиса
         
         Args:
-            db_client: Клиент для работы с Supabase
+            db_client: Хранилище данных (Supabase или SQLite)
+            cache_size: Максимум профилей в кеше
+            cache_ttl: Время жизни профиля в кеше (в секундах)
         """
         self.db = db_client
+        # Кеш профилей: обновляется при каждой записи (write-through)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
         logger.info("UserService инициализирован")
     
+    async def _load_user(self, user_id: int) -> Optional[User]:
+        """
+        Получить пользователя из кеша, при промахе - из БД
+        
+        Args:
+            user_id: Telegram user ID
+            
+        Returns:
+            Объект User или None если не найден
+        """
+        user = self.cache.get(user_id)
+        if user is not None:
+            return user
+        
+        # В рамках update повторные чтения объединяются загрузчиком
+        loader = get_request_loader()
+        if loader is not None:
+            user = await loader.get_user(user_id)
+        else:
+            user = await self.db.get_user(user_id)
+        
+        if user is not None:
+            self.cache.set(user_id, user)
+        return user
+    
+    def _remember(self, user: User) -> None:
+        """
+        Сохранить актуальную версию пользователя после записи в БД
+        
+        Args:
+            user: Объект User, возвращенный БД
+        """
+        self.cache.set(user.user_id, user)
+        loader = get_request_loader()
+        if loader is not None:
+            loader.prime_user(user)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Статистика кеша профилей
+        
+        Returns:
+            Словарь с hits, misses, hit_rate и size
+        """
+        return self.cache.stats()
+    
     async def register_user(self, user_id: int, username: str) -> User:
         """
         Регистрация нового пользователя
@@ -45,7 +97,7 @@ class UserService:
         """
         try:
             # Проверяем, не зарегистрирован ли уже
-            existing_user = await self.db.get_user(user_id)
+            existing_user = await self._load_user(user_id)
             if existing_user:
                 logger.warning(f"Попытка повторной регистрации пользователя {user_id}")
                 raise Exception(f"Пользователь {user_id} уже зарегистрирован")
@@ -60,6 +112,7 @@ class UserService:
             )
             
             created_user = await self.db.create_user(new_user)
+            self._remember(created_user)
             logger.info(f"Пользователь {user_id} ({username}) успешно зарегистрирован")
             
             return created_user
@@ -79,7 +132,7 @@ class UserService:
             Объект User или None если не найден
         """
         try:
-            user = await self.db.get_user(user_id)
+            user = await self._load_user(user_id)
             
             if user:
                 logger.debug(f"Профиль пользователя {user_id} получен")
@@ -103,7 +156,7 @@ class UserService:
             True если зарегистрирован, False иначе
         """
         try:
-            user = await self.db.get_user(user_id)
+            user = await self._load_user(user_id)
             return user is not None
             
         except Exception as e:
@@ -123,22 +176,15 @@ class UserService:
             Обновленный объект User
             
         Raises:
-            Exception: Если пользователь не найден или ошибка БД
+            RecordNotFoundError: Если пользователь не найден
+            InsufficientFundsError: Если баланс станет отрицательным
         """
         try:
-            # Проверяем существование пользователя
-            user = await self.db.get_user(user_id)
-            if not user:
-                raise Exception(f"Пользователь {user_id} не найден")
-            
-            # Проверяем, что баланс не станет отрицательным
-            new_balance = user.balance + amount
-            if new_balance < 0:
-                raise Exception(f"Недостаточно средств. Текущий баланс: {user.balance}, попытка списать: {abs(amount)}")
-            
-            # Обновляем баланс
+            # Баланс меняется атомарно на стороне БД; отрицательный
+            # результат отклоняется самой БД (InsufficientFundsError)
             updated_user = await self.db.update_balance(user_id, amount)
-            logger.info(f"Баланс пользователя {user_id} обновлен: {user.balance} -> {updated_user.balance}")
+            self._remember(updated_user)
+            logger.info(f"Баланс пользователя {user_id} изменен на {amount:+}: {updated_user.balance}")
             
             return updated_user
             
@@ -160,14 +206,9 @@ class UserService:
             Exception: Если пользователь не найден или ошибка БД
         """
         try:
-            # Проверяем существование пользователя
-            user = await self.db.get_user(user_id)
-            if not user:
-                raise Exception(f"Пользователь {user_id} не найден")
-            
-            # Увеличиваем счетчик
             updated_user = await self.db.increment_completed_tasks(user_id)
-            logger.info(f"Счетчик заданий пользователя {user_id} увеличен: {user.completed_tasks} -> {updated_user.completed_tasks}")
+            self._remember(updated_user)
+            logger.info(f"Счетчик заданий пользователя {user_id} увеличен: {updated_user.completed_tasks}")
             
             return updated_user
             
@@ -188,6 +229,7 @@ class UserService:
         """
         try:
             updated_user = await self.db.update_user(user_id, {"username": new_username})
+            self._remember(updated_user)
             logger.info(f"Username пользователя {user_id} обновлен на {new_username}")
             return updated_user
             
@@ -207,6 +249,7 @@ class UserService:
         """
         try:
             updated_user = await self.db.update_user(user_id, {"role": "pro"})
+            self._remember(updated_user)
             logger.info(f"Пользователь {user_id} повышен до Pro")
             return updated_user
             
@@ -225,11 +268,12 @@ class UserService:
             Словарь со статистикой
         """
         try:
-            user = await self.db.get_user(user_id)
+            user = await self._load_user(user_id)
             if not user:
                 raise Exception(f"Пользователь {user_id} не найден")
             
-            responses = await self.db.get_user_responses(user_id)
+            # Агрегаты по откликам считаются на стороне БД
+            response_stats = await self.db.get_response_stats(user_id)
             
             return {
                 "user_id": user.user_id,
@@ -237,9 +281,9 @@ class UserService:
                 "balance": user.balance,
                 "completed_tasks": user.completed_tasks,
                 "role": user.role,
-                "total_responses": len(responses),
-                "total_earned": sum(r.earned for r in responses),
-                "avg_earned": sum(r.earned for r in responses) / len(responses) if responses else 0,
+                "total_responses": response_stats["total_responses"],
+                "total_earned": response_stats["total_earned"],
+                "avg_earned": response_stats["avg_earned"],
                 "member_since": user.created_at
             }
             
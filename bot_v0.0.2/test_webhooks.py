@@ -10,6 +10,8 @@ import asyncio
 import aiohttp
 import json
 import hashlib
+import hmac
+import os
 import time
 from typing import Dict, Any
 
@@ -18,6 +20,9 @@ WEBHOOK_HOST = "http://localhost:8080"
 CRYPTOBOT_WEBHOOK_URL = f"{WEBHOOK_HOST}/webhook/cryptobot"
 FREEKASSA_WEBHOOK_URL = f"{WEBHOOK_HOST}/webhook/freekassa"
 
+# Токен CryptoBot бота (тот же, что в .env): им подписывается тело webhook
+CRYPTOBOT_TOKEN = os.getenv("CRYPTOBOT_TOKEN", "your_cryptobot_token")
+
 # FreeKassa test credentials (замените на ваши)
 FK_MERCHANT_ID = "123456"
 FK_SECRET1 = "secret1_key"
@@ -35,17 +40,28 @@ async def test_cryptobot_webhook():
             "hash": "test_invoice_hash",
             "currency": "TON",
             "amount": "10",
+            "status": "paid",
             "paid_at": int(time.time()),
             "usd_rate": "5"
         }
     }
     
+    # Подпись: HMAC-SHA256 тела, ключ - SHA256 от токена
+    body = json.dumps(payload).encode('utf-8')
+    secret = hashlib.sha256(CRYPTOBOT_TOKEN.encode('utf-8')).digest()
+    signature = hmac.new(secret, body, hashlib.sha256).hexdigest()
+    
+    print(f"  Signature: {signature}")
+    
     try:
         async with aiohttp.ClientSession() as session:
             async with session.post(
                 CRYPTOBOT_WEBHOOK_URL,
-                json=payload,
-                headers={"Content-Type": "application/json"}
+                data=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "crypto-pay-api-signature": signature
+                }
             ) as response:
                 result = await response.text()
                 print(f"✓ Status: {response.status}")
@@ -100,7 +116,7 @@ async def test_freekassa_webhook():
 
 
 async def test_invalid_cryptobot_webhook():
-    """Тест невалидного webhook от CryptoBot"""
+    """Тест невалидного webhook от CryptoBot (без подписи)"""
     print("\n🧪 Тестирование невалидного CryptoBot webhook...")
     
     payload = {
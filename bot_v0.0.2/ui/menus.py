@@ -3,6 +3,7 @@ UI Menus
 Обновленные меню для версии 0.0.4
 """
 
+from typing import Sequence
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 
@@ -148,20 +149,40 @@ def get_future_menu() -> InlineKeyboardMarkup:
     return keyboard
 
 
-def get_auto_earn_menu() -> InlineKeyboardMarkup:
+def get_auto_earn_menu(
+    enabled: bool = False,
+    daily_limit: int = 5,
+    limit_choices: Sequence[int] = ()
+) -> InlineKeyboardMarkup:
     """
     Меню автоматического заработка
     
+    Args:
+        enabled: Включен ли автозаработок
+        daily_limit: Текущий суточный лимит откликов
+        limit_choices: Варианты суточного лимита
+    
     Returns:
         InlineKeyboardMarkup с опциями
     """
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+    toggle_text = "⏸ Выключить автоотклики" if enabled else "▶️ Включить автоотклики"
+    limit_buttons = [
+        InlineKeyboardButton(
+            text=f"• {limit} •" if limit == daily_limit else str(limit),
+            callback_data=f"auto_earn_limit_{limit}"
+        )
+        for limit in limit_choices
+    ]
+    
+    rows = [[InlineKeyboardButton(text=toggle_text, callback_data="auto_earn_toggle")]]
+    if limit_buttons:
+        rows.append(limit_buttons)
+    rows.extend([
         [InlineKeyboardButton(text="📋 Список заданий", callback_data="tasks_list")],
         [InlineKeyboardButton(text="✍️ Мои отклики", callback_data="my_responses")],
-        [InlineKeyboardButton(text="⚙️ Настройки (скоро)", callback_data="auto_settings_soon")],
         [InlineKeyboardButton(text="◀️ Главное меню", callback_data="main_menu")]
     ])
-    return keyboard
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def get_agreement_menu() -> InlineKeyboardMarkup:
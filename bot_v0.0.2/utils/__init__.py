@@ -4,5 +4,6 @@ Utils Layer
 """
 
 from .error_handler import require_registration, setup_error_handler
+from .message_streamer import MessageStreamer
 
-__all__ = ['require_registration', 'setup_error_handler']
+__all__ = ['require_registration', 'setup_error_handler', 'MessageStreamer']
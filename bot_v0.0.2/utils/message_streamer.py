@@ -0,0 +1,106 @@
+"""
+Message Streamer
+Потоковое обновление сообщения с ограничением частоты правок
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+
+class MessageStreamer:
+    """
+    Правка одного сообщения по мере генерации текста
+
+    update() правит сообщение не чаще одного раза в interval секунд и
+    пропускает текст, совпадающий с уже показанным; промежуточные
+    версии, пришедшие между правками, заменяются более новыми, а не
+    копятся. Принудительная правка (заглушка до первой части текста)
+    интервал не запускает, поэтому следующая за ней правка, в том числе
+    итоговая, не ждет. finish() дожидается разрешенного момента и
+    показывает итоговый текст. Ответ 429 (TelegramRetryAfter) сдвигает следующую
+    правку на retry_after секунд.
+    """
+
+    def __init__(self, message: Message, interval: float = 1.0, parse_mode: Optional[str] = "HTML"):
+        """
+        Args:
+            message: Сообщение бота, которое будет меняться
+            interval: Минимальный интервал между правками в секундах
+            parse_mode: Режим разметки текста
+        """
+        self.message = message
+        self.interval = interval
+        self.parse_mode = parse_mode
+        self.edits = 0
+        self.skipped = 0
+        self._shown: Optional[str] = None
+        self._next_edit = 0.0
+
+    async def update(
+        self,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        force: bool = False
+    ) -> bool:
+        """
+        Показать промежуточный текст, если с прошлой правки прошло interval
+
+        Args:
+            text: Новый текст сообщения
+            reply_markup: Клавиатура
+            force: Править без учета интервала и не запускать его (первая обратная связь)
+
+        Returns:
+            True если сообщение изменено
+        """
+        if text == self._shown:
+            return False
+        if not force and time.monotonic() < self._next_edit:
+            self.skipped += 1
+            return False
+        return await self._edit(text, reply_markup, arm=not force)
+
+    async def finish(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> bool:
+        """
+        Показать итоговый текст, дождавшись окончания интервала
+
+        Args:
+            text: Итоговый текст сообщения
+            reply_markup: Клавиатура
+
+        Returns:
+            True если сообщение изменено
+        """
+        for _ in range(3):
+            delay = self._next_edit - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if text == self._shown or await self._edit(text, reply_markup):
+                return True
+            if time.monotonic() >= self._next_edit:
+                # Ошибка не связана с лимитом: повторять бессмысленно
+                return False
+        return False
+
+    async def _edit(self, text: str, reply_markup: Optional[InlineKeyboardMarkup], arm: bool = True) -> bool:
+        if arm:
+            self._next_edit = time.monotonic() + self.interval
+        try:
+            await self.message.edit_text(text, reply_markup=reply_markup, parse_mode=self.parse_mode)
+        except TelegramRetryAfter as e:
+            self._next_edit = time.monotonic() + e.retry_after
+            logger.warning(f"Правка сообщения отложена на {e.retry_after} с (лимит Telegram)")
+            return False
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.error(f"Ошибка правки сообщения: {e}")
+                return False
+        self._shown = text
+        self.edits += 1
+        return True